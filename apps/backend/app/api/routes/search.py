@@ -4,26 +4,47 @@ Search API Route
 
 This is the MAIN endpoint of the entire RAG system.
 Handles: POST /api/search
+         POST /api/search/stream (Server-Sent Events)
 """
 
-from fastapi import APIRouter, Header, HTTPException
-from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Dict, Any, Tuple, Awaitable, TypeVar
 from app.models.schemas import SearchRequest, SearchResponse
 import asyncio
-from app.services import auth, embeddings, retrieval, llm, audit
+import json
+import logging
+import time
+from app.services import auth, embeddings, retrieval, llm, audit, context_packer, answer_cache, db
+from app.services.embedding_cache import normalize_query
+from app.services.single_flight import SingleFlight
+from app.core.tracing import span
+from app.core.constants import RERANK_CANDIDATES
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-@router.post("/search")
-async def search(
-    request: SearchRequest,  # Uncomment when schemas.py is implemented
-    authorization: Optional[str] = Header(None)
-):
+# How often a long-running step checks whether the client went away
+DISCONNECT_POLL_SECONDS = 0.25
+
+# Identical concurrent POST /search requests share one pipeline execution
+search_flights = SingleFlight()
+
+
+async def _authorize(
+    request: SearchRequest,
+    authorization: Optional[str]
+) -> Tuple[str, List[str]]:
     """
-    Main RAG search endpoint - the heart of the system.
+    Runs steps 1-3 of the search pipeline (auth, permissions, validation).
+
+    Shared by POST /search and POST /search/stream.
+
+    Returns:
+        (user_id, user_projects)
     """
-    
     # --------- Step 1: Authentication ---------
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid or missing Authorization header")
@@ -37,44 +58,115 @@ async def search(
     if not request.query or not request.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
 
+    return user_id, user_projects
+
+
+async def _embed(request: SearchRequest, timings: Dict[str, float]) -> List[float]:
+    """Runs step 4 of the search pipeline (query embedding)."""
     # --------- Step 4: Embed Query ---------
+    started = time.perf_counter()
     try:
-        query_vector = embeddings.embed_query(request.query)
+        query_vector = await embeddings.embed_query(request.query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to embed query: {e}")
+    timings["embed_ms"] = (time.perf_counter() - started) * 1000
+
+    return query_vector
+
+
+async def _flight_key(request: SearchRequest, user_id: str, user_projects: List[str]) -> Tuple:
+    """
+    Key under which identical in-flight searches are coalesced.
 
-    # --------- Step 5: Vector Search with ACL (includes documents + handovers) ---------
+    Two searches may share one execution only if they would see exactly the
+    same sources: same normalized query, top_k, project set and visible
+    handovers. Users with no handovers (the common case) share freely.
+    """
     try:
-        candidate_chunks = await retrieval.run_vector_search(
+        handover_ids = await db.fetch_visible_handover_ids(user_id)
+        handover_scope = ("handovers", tuple(handover_ids))
+    except Exception as e:
+        logger.warning(f"Handover lookup for request coalescing failed: {e}")
+        handover_scope = ("user", user_id)
+
+    return (
+        normalize_query(request.query),
+        request.top_k or 12,
+        tuple(sorted(set(user_projects))),
+        handover_scope,
+    )
+
+
+async def _cached_answer(
+    request: SearchRequest,
+    user_id: str,
+    user_projects: List[str],
+    query_vector: List[float],
+    timings: Dict[str, float]
+) -> Optional[Dict[str, Any]]:
+    """Looks up a semantically similar answer for the same access scope (best effort)."""
+    started = time.perf_counter()
+    try:
+        entry = await answer_cache.lookup_answer(user_id, user_projects, request.top_k or 12, query_vector)
+    except Exception as e:
+        logger.warning(f"Answer cache lookup failed: {e}")
+        entry = None
+    timings["answer_cache_ms"] = (time.perf_counter() - started) * 1000
+    return entry
+
+
+async def _retrieve(
+    request: SearchRequest,
+    user_id: str,
+    user_projects: List[str],
+    query_vector: List[float],
+    timings: Dict[str, float]
+) -> List[Dict[str, Any]]:
+    """
+    Runs steps 5-6 of the search pipeline (hybrid search → reranked chunks).
+
+    Returns:
+        reranked_chunks
+    """
+    # --------- Step 5: Vector + Full-Text Search with ACL (includes documents + handovers) ---------
+    # Both run concurrently and are fused with reciprocal rank fusion
+    started = time.perf_counter()
+    try:
+        candidate_chunks = await retrieval.run_hybrid_search(
+            query=request.query,
             query_vector=query_vector,
             user_projects=user_projects,
             user_id=user_id,
-            top_k=200
+            top_k=RERANK_CANDIDATES
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Vector search failed: {e}")
+    timings["search_ms"] = (time.perf_counter() - started) * 1000
 
     # --------- Step 6: Rerank ---------
+    started = time.perf_counter()
     try:
         top_k = request.top_k or 12
         chunks = await retrieval.rerank(candidate_chunks, request.query, top_k=top_k)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Rerank failed: {e}")
+    timings["rerank_ms"] = (time.perf_counter() - started) * 1000
 
-    # --------- Step 7: Generate Answer ---------
+    return chunks
+
+
+async def _source_versions(chunks: List[Dict[str, Any]]) -> Optional[Dict[Tuple[str, int], str]]:
+    """Snapshots the cited sources' versions for the answer cache (None if it fails)."""
     try:
-        context_texts = [c["text"] for c in chunks]
-        answer = llm.call_llm(request.query, context_texts)
+        return await db.fetch_source_versions(*answer_cache.cited_sources(chunks))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM generation failed: {e}")
+        logger.warning(f"Answer cache version lookup failed: {e}")
+        return None
 
-    # --------- Step 8: Audit Log (async, non-blocking) ---------
-    # Include both doc_ids and handover_ids in audit (filter out None values)
-    used_doc_ids = [c["doc_id"] for c in chunks if c.get("doc_id")]
-    asyncio.create_task(audit.audit_log(user_id, request.query, used_doc_ids))
 
-    # --------- Step 9: Format Chunks for Response ---------
-    response_chunks = [
+def _format_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Formats reranked chunks as citations for the response."""
+    return [
         {
             "doc_id": c.get("doc_id") or c.get("handover_id"),  # Support both documents and handovers
             "title": c["title"],
@@ -85,11 +177,248 @@ async def search(
         for c in chunks
     ]
 
-    # --------- Step 10: Return Response ---------
+
+async def _cancel_on_disconnect(http_request: Request, work: Awaitable[T]) -> T:
+    """
+    Awaits work, cancelling it if the HTTP client disconnects first.
+
+    Cancelling an in-flight LLM call closes its HTTP request, so Groq stops
+    generating an answer nobody will read and the concurrency slot is freed.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Formats one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _answer(
+    request: SearchRequest,
+    user_id: str,
+    user_projects: List[str],
+    timings: Dict[str, float]
+) -> Dict[str, Any]:
+    """
+    Runs steps 4-9 of POST /search (embed → cached or generated answer).
+
+    Executed once per group of coalesced requests, so errors are raised as
+    HTTPExceptions that every waiting request can return as-is.
+
+    Returns:
+        {"answer": str, "chunks": [...], "used_doc_ids": [...], "timings": {...}}
+    """
+    query_vector = await _embed(request, timings)
+
+    # --------- Answer Cache: a paraphrase of an earlier question in the same scope ---------
+    cached = await _cached_answer(request, user_id, user_projects, query_vector, timings)
+    if cached:
+        return {
+            "answer": cached["answer"],
+            "chunks": cached["chunks"],
+            "used_doc_ids": cached["used_doc_ids"],
+            "timings": timings,
+        }
+
+    # --------- Steps 5-6: Vector search, rerank ---------
+    chunks = await _retrieve(request, user_id, user_projects, query_vector, timings)
+
+    # Snapshot cited source versions while the LLM runs (answer cache invalidation)
+    versions_task = asyncio.create_task(_source_versions(chunks))
+
+    # --------- Step 7: Generate Answer ---------
+    try:
+        context_texts = context_packer.pack_context(chunks)
+        answer = await llm.call_llm(request.query, context_texts, timings)
+    except asyncio.TimeoutError:
+        versions_task.cancel()
+        raise HTTPException(status_code=504, detail="LLM generation timed out")
+    except Exception as e:
+        versions_task.cancel()
+        raise HTTPException(status_code=500, detail=f"LLM generation failed: {e}")
+
+    # --------- Step 8: Format Chunks for Response ---------
+    # Include both doc_ids and handover_ids in audit (filter out None values)
+    used_doc_ids = [c["doc_id"] for c in chunks if c.get("doc_id")]
+    response_chunks = _format_chunks(chunks)
+
+    # --------- Step 9: Cache the Answer ---------
+    versions = await versions_task
+    if chunks and versions is not None:
+        answer_cache.store_answer(
+            user_id, user_projects, request.top_k or 12, query_vector,
+            answer=answer,
+            chunks=chunks,
+            citations=response_chunks,
+            used_doc_ids=used_doc_ids,
+            versions=versions,
+            cost_ms=sum(timings.get(stage, 0.0) for stage in ("search_ms", "rerank_ms", "llm_queue_ms", "llm_generation_ms"))
+        )
+
+    return {
+        "answer": answer,
+        "chunks": response_chunks,
+        "used_doc_ids": used_doc_ids,
+        "timings": timings,
+    }
+
+
+@router.post("/search")
+async def search(
+    request: SearchRequest,  # Uncomment when schemas.py is implemented
+    http_request: Request,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Main RAG search endpoint - the heart of the system.
+    """
+    timings: Dict[str, float] = {}
+
+    # --------- Steps 1-3: Auth, permissions, validate ---------
+    user_id, user_projects = await _authorize(request, authorization)
+
+    # --------- Steps 4-9: Shared with identical in-flight searches ---------
+    # The client disconnecting only stops this request from waiting; the
+    # shared work is cancelled once no request is waiting for it.
+    key = await _flight_key(request, user_id, user_projects)
+    with span("search.pipeline"):
+        result = await _cancel_on_disconnect(
+            http_request,
+            search_flights.do(key, lambda: _answer(request, user_id, user_projects, timings))
+        )
+
+    logger.info(f"search timings (ms): {result['timings']}")
+
+    # --------- Step 10: Audit Log (async, non-blocking, one entry per asker) ---------
+    asyncio.create_task(audit.audit_log(user_id, request.query, result["used_doc_ids"]))
+
+    # --------- Step 11: Return Response ---------
     return SearchResponse(
-        answer=answer,
-        chunks=response_chunks,
-        used_doc_ids=used_doc_ids
+        answer=result["answer"],
+        chunks=result["chunks"],
+        used_doc_ids=result["used_doc_ids"]
+    )
+
+
+@router.post("/search/stream")
+async def search_stream(
+    request: SearchRequest,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Streaming variant of POST /api/search (Server-Sent Events).
+
+    Auth, validation and retrieval errors are returned as normal HTTP errors
+    before the stream starts. Once the stream is open, events are:
+
+        event: citations   data: {"chunks": [...]}             (right after rerank)
+        event: token       data: {"text": "To deploy"}         (one per LLM token)
+        event: done        data: {"used_doc_ids": [...], "timings": {...}}
+        event: error       data: {"detail": "..."}             (LLM failed mid-stream)
+
+    On an answer cache hit the whole answer is sent as one token event and
+    done carries "cached": true.
+
+    The audit log is written when the stream finishes or the client disconnects.
+    """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    # --------- Steps 1-4: Auth, permissions, validate, embed ---------
+    user_id, user_projects = await _authorize(request, authorization)
+    query_vector = await _embed(request, timings)
+
+    # --------- Answer Cache: replay a cached answer as a single token event ---------
+    cached = await _cached_answer(request, user_id, user_projects, query_vector, timings)
+    if cached:
+        async def cached_stream():
+            try:
+                yield _sse("citations", {"chunks": cached["chunks"]})
+                yield _sse("token", {"text": cached["answer"]})
+                timings["total_ms"] = (time.perf_counter() - started) * 1000
+                yield _sse("done", {
+                    "used_doc_ids": cached["used_doc_ids"],
+                    "timings": {stage: round(ms, 1) for stage, ms in timings.items()},
+                    "cached": True
+                })
+            finally:
+                asyncio.create_task(audit.audit_log(user_id, request.query, cached["used_doc_ids"]))
+
+        return StreamingResponse(
+            cached_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    # --------- Steps 5-6: Vector search, rerank ---------
+    chunks = await _retrieve(request, user_id, user_projects, query_vector, timings)
+
+    used_doc_ids = [c["doc_id"] for c in chunks if c.get("doc_id")]
+    context_texts = context_packer.pack_context(chunks)
+
+    async def event_stream():
+        # Snapshot cited source versions while the LLM runs (answer cache invalidation)
+        versions_task = asyncio.create_task(_source_versions(chunks))
+        try:
+            # Citations first, so the UI can render sources while the answer streams
+            citations = _format_chunks(chunks)
+            yield _sse("citations", {"chunks": citations})
+
+            llm_started = time.perf_counter()
+            tokens = []
+            try:
+                async for token in llm.stream_llm(request.query, context_texts, timings):
+                    if "llm_first_token_ms" not in timings:
+                        timings["llm_first_token_ms"] = (time.perf_counter() - llm_started) * 1000
+                    tokens.append(token)
+                    yield _sse("token", {"text": token})
+            except asyncio.TimeoutError:
+                yield _sse("error", {"detail": "LLM generation timed out"})
+                return
+            except Exception as e:
+                yield _sse("error", {"detail": f"LLM generation failed: {e}"})
+                return
+            timings["llm_ms"] = (time.perf_counter() - llm_started) * 1000
+            timings["total_ms"] = (time.perf_counter() - started) * 1000
+
+            yield _sse("done", {
+                "used_doc_ids": used_doc_ids,
+                "timings": {stage: round(ms, 1) for stage, ms in timings.items()}
+            })
+
+            versions = await versions_task
+            if chunks and versions is not None:
+                answer_cache.store_answer(
+                    user_id, user_projects, request.top_k or 12, query_vector,
+                    answer="".join(tokens),
+                    chunks=chunks,
+                    citations=citations,
+                    used_doc_ids=used_doc_ids,
+                    versions=versions,
+                    cost_ms=sum(timings.get(stage, 0.0) for stage in ("search_ms", "rerank_ms", "llm_ms"))
+                )
+        finally:
+            # Runs on normal completion and when the client disconnects (generator is closed)
+            versions_task.cancel()
+            asyncio.create_task(audit.audit_log(user_id, request.query, used_doc_ids))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering so events flush immediately
+        }
     )
     
 
@@ -147,12 +476,16 @@ async def search(
             - Call embeddings.embed_query(request.query) → [0.1, 0.2, ...]
             - Converts text to 1024-dim vector
 
-        Step 4: Vector Search with ACL
-            - Call retrieval.run_vector_search(
+        Step 4: Hybrid Search with ACL
+            - Call retrieval.run_hybrid_search(
+                  query=request.query,
                   query_vector=embedding,
                   user_projects=projects,
-                  top_k=200
-              ) → 200 candidate chunks
+                  user_id=user_id,
+                  top_k=100
+              ) → 100 candidate chunks
+            - Vector search (200) and full-text search (50) run concurrently
+              and are fused with reciprocal rank fusion
             - Only returns chunks from Public docs or user's projects
 
         Step 5: Rerank
@@ -162,6 +495,8 @@ async def search(
                   top_k=request.top_k or 12
               ) → 12 best chunks
             - Uses Cohere reranker for better relevance
+            - Sends only as many candidates as the vector score curve
+              warrants (adaptive budget, 25-100), each cut to 512 tokens
 
         Step 6: Generate Answer
             - Extract text from chunks: [c["text"] for c in chunks]
@@ -1,24 +1,58 @@
 """
 File Upload API Route
 
-Handles manager file uploads (PDF, DOCX) and ingests them into the knowledge base.
-Endpoint: POST /api/upload
+Handles manager file uploads (PDF, DOCX) and queues them for ingestion into
+the knowledge base (see app/services/ingest_jobs.py).
+Endpoints:
+    POST /api/upload                 → 202 + job id (200 if the file is already indexed)
+    GET  /api/upload/jobs/{job_id}   → ingestion progress
 """
 
 from fastapi import APIRouter, File, UploadFile, Header, HTTPException, Form
+from fastapi.responses import JSONResponse
 from typing import Optional
-from app.services import auth, extraction
-from app.services.embeddings import embed_document
-from app.services.db import insert_document, insert_chunk
-from app.services.chunker import chunk_markdown
-from app.services.storage import upload_file_to_storage
-from app.core.constants import CHUNK_SIZE, CHUNK_OVERLAP, VALID_VISIBILITIES
-import uuid
+from app.services import auth, ingest_jobs
+from app.services.db import find_document_by_source, reuse_document, fetch_ingest_job
+from app.core.constants import VALID_VISIBILITIES
 
 router = APIRouter()
 
 
-@router.post("/upload")
+def upload_source_id(content_hash: str, project_id: Optional[str]) -> str:
+    """
+    Builds the idempotency key of an upload from the file's sha256.
+
+    The same file uploaded to the same project maps to the same document.
+    The project is part of the key so a file shared by two projects keeps
+    each project's access rules.
+
+    Example:
+        >>> upload_source_id("3b1f...", "Atlas")
+        "upload:Atlas:3b1f..."
+    """
+    return f"upload:{project_id or 'public'}:{content_hash}"
+
+
+async def _existing_upload(source_id: str, filename: str, visibility: str) -> Optional[dict]:
+    """Returns the response for an already-ingested upload, or None if it is new."""
+    existing = await find_document_by_source(source_id)
+    if existing is None:
+        return None
+
+    await reuse_document(existing["doc_id"], visibility)
+
+    return {
+        "doc_id": existing["doc_id"],
+        "title": existing["title"],
+        "chunks_created": 0,
+        "total_chunks": existing["chunk_count"],
+        "duplicate": True,
+        "message": f"{filename} was already indexed; reusing the existing document",
+        "errors": None
+    }
+
+
+@router.post("/upload", status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
     project_id: Optional[str] = Form(None),
@@ -26,7 +60,7 @@ async def upload_document(
     authorization: Optional[str] = Header(None)
 ):
     """
-    Upload and ingest a document (PDF/DOCX) into the knowledge base.
+    Upload a document (PDF/DOCX) and queue it for ingestion.
 
     Args:
         file: Uploaded file (PDF, DOCX, TXT, MD)
@@ -35,22 +69,26 @@ async def upload_document(
         authorization: JWT token in header
 
     Returns:
+        202 Accepted:
         {
-            "doc_id": 123,
+            "job_id": 88,
+            "status": "queued",
+            "status_url": "/api/upload/jobs/88",
             "title": "uploaded_file.pdf",
-            "chunks_created": 15,
-            "message": "Document uploaded and indexed successfully"
+            "message": "Upload accepted; ingestion is running in the background"
         }
+        200 OK with "duplicate": true and the existing doc_id if this project
+        already has the file.
+        409 Conflict if the same file is already being ingested for this
+        project with the other visibility (retry once that job has finished).
 
     Flow:
         1. Authenticate user
-        2. Validate file type
-        3. Extract text to Markdown
-        4. Create document record in DB
-        5. Chunk markdown
-        6. Embed each chunk
-        7. Insert chunks into DB
-        8. Return success
+        2. Validate inputs
+        3. Stream the file to the staging dir (size cap: 413), hashing it;
+           if this project already has it, return the existing document
+        4. Queue an ingest job (or join the active job for the same file)
+        5. Return 202; poll status_url for progress
     """
 
     # --------- Step 1: Authentication ---------
@@ -75,89 +113,122 @@ async def upload_document(
     if not file.filename:
         raise HTTPException(status_code=400, detail="File must have a filename")
 
-    # --------- Step 3: Read File ---------
+    # --------- Step 3: Stream File to Staging ---------
+    # Copied block by block from Starlette's spooled temp file, hashed on the way
     try:
-        file_bytes = await file.read()
+        file_path, content_hash, size = await ingest_jobs.stage_upload(file.file)
+    except ingest_jobs.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to read file: {e}")
-    # This also ensures file_bytes is not empty ..
 
-    # --------- Step 4: Extract Text ---------
-    try:
-        markdown, sections = extraction.extract_text_from_file(file_bytes, file.filename)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to extract text: {e}")
-
-    if not markdown.strip():
-        raise HTTPException(status_code=400, detail="Extracted document is empty")
+    if size == 0:
+        await ingest_jobs.discard_staged(file_path)
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
 
-    # --------- Step 5: Upload File to Storage ---------
+    # Same bytes + same project = same document: skip ingestion entirely
+    source_id = upload_source_id(content_hash, project_id)
     try:
-        file_url = upload_file_to_storage(
-            file_bytes=file_bytes,
-            filename=file.filename,
-            project_id=project_id
-        )
+        existing = await _existing_upload(source_id, file.filename, visibility)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload file to storage: {e}")
+        await ingest_jobs.discard_staged(file_path)
+        raise HTTPException(status_code=500, detail=f"Failed to check for duplicate upload: {e}")
+    if existing:
+        await ingest_jobs.discard_staged(file_path)
+        return JSONResponse(existing, status_code=200)
 
-    # --------- Step 6: Create Document Record ---------
+    # --------- Step 4: Queue Job ---------
     try:
-        doc_id = await insert_document(
-            title=file.filename,
+        job = await ingest_jobs.enqueue_upload(
+            file_path=file_path,
+            filename=file.filename,
             project_id=project_id,
             visibility=visibility,
-            uri=file_url,  # Use storage URL instead of fake URI
-            language="en"
+            uploaded_by=user_id,
+            source_external_id=source_id,
+            content_hash=content_hash
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to create document record: {e}")
+        await ingest_jobs.discard_staged(file_path)
+        raise HTTPException(status_code=500, detail=f"Failed to queue upload: {e}")
+
+    # Joined another manager's active job: it keeps that upload's visibility
+    if job["visibility"] != visibility:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"{file.filename} is already being ingested for this project as {job['visibility']} "
+                f"(job {job['job_id']}); upload it again once that job has finished to make it {visibility}"
+            )
+        )
+
+    # --------- Step 5: Return Response ---------
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/upload/jobs/{job['job_id']}",
+        "title": file.filename,
+        "message": "Upload accepted; ingestion is running in the background"
+    }
+
+
+@router.get("/upload/jobs/{job_id}")
+async def get_upload_job(
+    job_id: int,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Reports the progress of an ingestion job.
+
+    Visible to every manager of the job's project (an upload of a file that
+    is already being ingested joins the active job, so the uploader may be
+    another manager).
+
+    Returns:
+        {
+            "job_id": 88,
+            "status": "running",          # queued | running | succeeded | failed
+            "stage": "embedding",         # queued | extracting | chunking | embedding | uploading | writing | done
+            "chunks_done": 384,
+            "chunks_total": 1210,
+            "doc_id": null,               # set once succeeded
+            "errors": [],
+            "created_at": "...", "started_at": "...", "finished_at": null
+        }
+    """
 
-    # --------- Step 6: Chunk Markdown ---------
+    # --------- Step 1: Authentication ---------
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Invalid or missing Authorization header")
+
+    token = authorization.replace("Bearer ", "")
     try:
-        chunks = chunk_markdown(markdown, sections, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        user_id = auth.verify_jwt(token)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to chunk document: {e}")
-
-    if not chunks:
-        raise HTTPException(status_code=400, detail="No chunks created from document")
-
-    # --------- Step 7: Embed and Insert Chunks ---------
-    chunks_created = 0
-    errors = []
-
-    for idx, chunk in enumerate(chunks):
-        try:
-            # Embed chunk
-            embedding = embed_document(chunk["text"])
-
-            # Insert into database
-            await insert_chunk(
-                doc_id=doc_id,
-                text=chunk["text"],
-                heading_path=chunk["heading_path"],
-                embedding=embedding,
-                order_in_doc=idx
-            )
+        raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
 
-            chunks_created += 1
-        except Exception as e:
-            errors.append(f"Chunk {idx + 1}: {str(e)}")
-            # Continue processing other chunks even if one fails
+    # --------- Step 2: Fetch Job ---------
+    try:
+        job = await fetch_ingest_job(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch job: {e}")
 
-    # --------- Step 8: Return Response ---------
-    if chunks_created == 0:
-        raise HTTPException(status_code=500, detail=f"Failed to create any chunks. Errors: {errors}")
+    if job is None or not await auth.check_user_is_manager(user_id, job["project_id"]):
+        raise HTTPException(status_code=404, detail="Job not found")
 
     return {
-        "doc_id": doc_id,
-        "title": file.filename,
-        "chunks_created": chunks_created,
-        "total_chunks": len(chunks),
-        "message": "Document uploaded and indexed successfully",
-        "errors": errors if errors else None
+        "job_id": job["job_id"],
+        "title": job["filename"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "chunks_done": job["chunks_done"],
+        "chunks_total": job["chunks_total"],
+        "doc_id": job["doc_id"],
+        "errors": job["errors"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"].isoformat() if job["created_at"] else None,
+        "started_at": job["started_at"].isoformat() if job["started_at"] else None,
+        "finished_at": job["finished_at"].isoformat() if job["finished_at"] else None
     }
 
 
@@ -0,0 +1,97 @@
+"""
+Request Body Size Limit
+
+ASGI middleware that rejects oversized uploads with 413 before they are
+read into the multipart parser's temp files.
+
+What This Does:
+    1. If Content-Length is above the limit, answers 413 without reading the body
+    2. Otherwise (or for chunked uploads) counts body bytes as they stream in
+       and stops reading as soon as the limit is passed; the parser's error
+       response is replaced by 413
+
+Why:
+    FastAPI parses the whole multipart form before the route runs, so a size
+    check inside the route only happens after the file has been received.
+"""
+
+import json
+from typing import Iterable
+from app.core.constants import UPLOAD_MAX_BYTES
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class BodyLimitMiddleware:
+    """
+    Limits request bodies on selected paths.
+
+    Example:
+        >>> app.add_middleware(BodyLimitMiddleware, paths=["/api/upload"], max_bytes=100 * 1024 * 1024)
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_bytes: int = UPLOAD_MAX_BYTES):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({
+            "detail": f"File exceeds the {self.max_bytes // (1024 * 1024)} MB upload limit"
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        # --------- Step 1: Declared size ---------
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    if int(value) > self.max_bytes:
+                        await self._reject(send)
+                        return
+                except ValueError:
+                    pass
+                break
+
+        # --------- Step 2: Actual size, counted while streaming ---------
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded:
+                # The app failed while parsing the truncated body; answer 413 instead
+                if message["type"] == "http.response.start" and not started:
+                    started = True
+                    await self._reject(send)
+                return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except BodyTooLarge:
+            if not started:
+                await self._reject(send)
@@ -7,15 +7,82 @@ These values must be kept in sync with worker constants and database schema.
 # Embedding configuration (must match workers!)
 EMBEDDING_MODEL = "embed-english-v3.0"
 EMBEDDING_DIM = 1024  # Must match database VECTOR(1024) dimension
+EMBED_BATCH_SIZE = 96  # Cohere accepts at most 96 texts per embed request
+EMBED_MAX_CONCURRENT_BATCHES = 4  # Batches in flight at once during uploads
+EMBED_MAX_RETRIES = 3  # Attempts per batch before its chunks are reported as failed
+
+# Cohere client configuration (one shared async client per process)
+COHERE_MAX_CONCURRENCY = 8  # Cohere requests in flight at once per worker
+COHERE_EMBED_TIMEOUT = 10  # Seconds per embed call
+COHERE_RERANK_TIMEOUT = 15  # Seconds per rerank call
+COHERE_MAX_RETRIES = 1  # Transport-level retries inside the client
+
+# LLM client configuration (one shared async Groq client per process)
+LLM_MAX_CONCURRENCY = 4  # Generations in flight at once per worker
+LLM_TIMEOUT = 30  # Seconds per generation (streaming: to open the stream, then per token)
+LLM_MAX_RETRIES = 1
+
+# Query embedding cache (in-process, per worker)
+QUERY_CACHE_MAX_ENTRIES = 2048  # ~8 MB of float32 vectors
+QUERY_CACHE_TTL_SECONDS = 3600
+
+# Semantic answer cache (in-process, per worker)
+ANSWER_CACHE_MAX_ENTRIES = 1024
+ANSWER_CACHE_TTL_SECONDS = 900  # Bounds staleness from newly added documents
+ANSWER_CACHE_SIMILARITY = 0.95  # Min cosine similarity between query embeddings for a hit
+
+# Upload intake (see app/core/body_limit.py and ingest_jobs.stage_upload)
+UPLOAD_MAX_BYTES = 100 * 1024 * 1024  # Largest accepted upload (overridable via UPLOAD_MAX_BYTES)
+UPLOAD_COPY_CHUNK_BYTES = 1024 * 1024  # Block size when streaming an upload to the staging dir
+
+# Background ingestion jobs (see app/services/ingest_jobs.py)
+INGEST_WORKERS = 2  # Job worker tasks per API process (0 = only separate worker processes)
+INGEST_POLL_SECONDS = 2  # Queue poll interval when idle
+INGEST_JOB_LEASE_SECONDS = 600  # A running job without progress for this long is re-claimed
+INGEST_JOB_MAX_ATTEMPTS = 3
+INGEST_EMBED_WINDOW = EMBED_BATCH_SIZE * EMBED_MAX_CONCURRENT_BATCHES  # Chunks embedded between progress updates
+
+# CPU offload pool for extraction and chunking (see app/services/offload.py)
+OFFLOAD_WORKERS = 2  # Worker processes per API process (overridable via OFFLOAD_WORKERS)
+OFFLOAD_TIME_LIMIT_SECONDS = 300  # Per extraction job; also per chunking task
+OFFLOAD_MEMORY_LIMIT_MB = 2048  # Address-space cap per worker process (0 = no cap)
+OFFLOAD_MAX_TASKS_PER_CHILD = 50  # Recycle worker processes to release memory
+PDF_PAGES_PER_BATCH = 25  # Pages extracted per task (batches run in parallel)
 
 # Chunking configuration
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
+CHUNK_MODE = "window"  # "window" slides across the document; "sections" packs whole sections per topic; "content" keeps boundaries stable across edits
 
 # Retrieval configuration
 RERANK_MODEL = "rerank-english-v3.0"
-MAX_INITIAL_CANDIDATES = 200
+MAX_INITIAL_CANDIDATES = 200  # Vector search candidates per query
 DEFAULT_TOP_K = 12
 
+# Hybrid retrieval: full-text matches fused with vector candidates (see app/services/retrieval.py)
+FULLTEXT_CANDIDATES = 50  # Full-text matches per query (identifiers, error codes, names)
+RRF_K = 60  # Reciprocal rank fusion: score = sum of 1 / (RRF_K + rank) over both lists
+RERANK_CANDIDATES = 100  # Fused candidates passed to rerank; ceiling of the rerank budget (vector-only search sent 200)
+
+# Adaptive rerank budget (see choose_rerank_budget in app/services/retrieval.py)
+RERANK_MIN_CANDIDATES = 25  # Floor of the budget (raised to top_k when that is larger)
+RERANK_ELBOW_MIN_DEPTH = 0.15  # Elbow must sit this far off the straight line (fraction of the score range)
+RERANK_DOC_TOKENS = 512  # Tokens of each chunk sent to rerank (chunks are ~500; longer ones are cut)
+RERANK_CHARS_PER_TOKEN = 4  # Longer chunks are cut at RERANK_DOC_TOKENS * this many characters (approximate: English text averages ~4 per token)
+
+# HNSW vector search (pgvector >= 0.8.0; set per query in app/services/retrieval.py)
+HNSW_ITERATIVE_SCAN = "relaxed_order"  # Keep scanning the index until k rows pass the ACL filter
+HNSW_MIN_EF_SEARCH = 40  # pgvector's default candidate list size
+HNSW_MAX_EF_SEARCH = 1000  # pgvector's upper limit for ef_search
+HNSW_MAX_SCAN_TUPLES = 20000  # Stop an iterative scan after visiting this many tuples
+
+# LLM context packing
+CONTEXT_TOKEN_BUDGET = 3000  # Max context tokens sent to the LLM per answer
+LLM_COMPACT_PROMPT = True  # Short system prompt (same rules, no worked example)
+
+# Request tracing (see app/core/tracing.py; overridable via environment variables)
+TRACE_SAMPLE_RATE = 0.05  # Fraction of requests written to the JSONL trace file (export needs TRACE_EXPORT_PATH set)
+TRACE_SLOW_MS = 5000  # Requests slower than this are always written
+
 # Document visibility options
 VALID_VISIBILITIES = ["Public", "Private"]
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Prometheus Metrics
+
+Defines the metrics served at GET /metrics (Prometheus text format).
+
+What We Expose:
+    - rag_http_request_duration_seconds{method, route, status}   (histogram)
+    - rag_stage_duration_seconds{stage}                           (histogram, from trace spans)
+    - rag_db_pool_size / _idle / _max_size                        (gauges, read at scrape time)
+    - rag_db_pool_acquire_seconds                                 (histogram, wait for a connection)
+    - rag_external_calls_total{service, operation, outcome}      (ok / error / timeout / cancelled)
+    - rag_external_call_duration_seconds{service, operation}      (histogram)
+    - rag_ingested_documents_total / rag_ingested_chunks_total{source}
+    - rag_*_cache_* and rag_search_coalesced_total                (cache and coalescing counters)
+
+Why:
+    - Sizing the asyncpg pool: compare acquire wait and idle connections under load
+    - Sizing uvicorn workers: compare route latency with stage latency and
+      external-call concurrency
+
+Note:
+    Metrics are per process. With several uvicorn workers, scrape each one
+    (or run Prometheus multiprocess mode).
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Buckets from 5 ms to 30 s: covers DB queries up to full LLM generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# ============================================================================
+# Latency
+# ============================================================================
+
+HTTP_REQUEST_DURATION = Histogram(
+    "rag_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+STAGE_DURATION = Histogram(
+    "rag_stage_duration_seconds",
+    "Latency of pipeline stages (trace span names, e.g. embed, vector_search, llm.generate)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def observe_trace(trace) -> None:
+    """Feeds every finished span of a request trace into the stage histogram."""
+    for span in trace.spans:
+        if span.end is not None:
+            STAGE_DURATION.labels(stage=span.name).observe(span.end - span.start)
+
+
+# ============================================================================
+# Database pool
+# ============================================================================
+
+DB_POOL_ACQUIRE = Histogram(
+    "rag_db_pool_acquire_seconds",
+    "Time spent waiting for a pool connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+
+def _pool():
+    # Imported lazily: app.db.client imports this module
+    from app.db import client
+    return client.pool
+
+
+Gauge("rag_db_pool_size", "Open connections in the asyncpg pool").set_function(
+    lambda: _pool().get_size() if _pool() else 0
+)
+Gauge("rag_db_pool_idle", "Idle connections in the asyncpg pool").set_function(
+    lambda: _pool().get_idle_size() if _pool() else 0
+)
+Gauge("rag_db_pool_max_size", "Configured maximum pool size").set_function(
+    lambda: _pool().get_max_size() if _pool() else 0
+)
+
+
+# ============================================================================
+# External calls (Cohere, Groq)
+# ============================================================================
+
+EXTERNAL_CALLS = Counter(
+    "rag_external_calls_total",
+    "Calls to external APIs by outcome",
+    ["service", "operation", "outcome"],
+)
+
+EXTERNAL_CALL_DURATION = Histogram(
+    "rag_external_call_duration_seconds",
+    "External API call latency (excluding time queued for a concurrency slot)",
+    ["service", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@contextmanager
+def track_call(service: str, operation: str) -> Iterator[None]:
+    """
+    Counts and times one external API call.
+
+    Example:
+        >>> with track_call("cohere", "embed"):
+        ...     response = await co.embed(...)
+    """
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    except (asyncio.CancelledError, GeneratorExit):
+        # Client disconnected (task cancelled or stream generator closed)
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        EXTERNAL_CALLS.labels(service, operation, outcome).inc()
+        EXTERNAL_CALL_DURATION.labels(service, operation).observe(time.perf_counter() - started)
+
+
+# ============================================================================
+# Ingestion
+# ============================================================================
+
+INGESTED_DOCUMENTS = Counter(
+    "rag_ingested_documents_total",
+    "Documents ingested",
+    ["source"],
+)
+
+INGESTED_CHUNKS = Counter(
+    "rag_ingested_chunks_total",
+    "Chunks ingested, by result",
+    ["source", "result"],
+)
+
+
+# ============================================================================
+# Caches and request coalescing (read from their stats() at scrape time)
+# ============================================================================
+
+class _StatsCollector:
+    """Exports the in-process caches' and single-flight counters."""
+
+    def describe(self):
+        # Without this, register() would call collect() at import time
+        return []
+
+    def collect(self):
+        from app.services.embedding_cache import query_cache
+        from app.services.answer_cache import answer_cache
+        from app.api.routes.search import search_flights
+
+        for prefix, stats in (("rag_query_embedding_cache", query_cache.stats()),
+                              ("rag_answer_cache", answer_cache.stats())):
+            yield GaugeMetricFamily(f"{prefix}_entries", "Entries currently cached", value=stats["size"])
+            for name in ("hits", "misses", "evictions"):
+                yield CounterMetricFamily(f"{prefix}_{name}", f"Cache {name}", value=stats[name])
+
+        answers = answer_cache.stats()
+        yield CounterMetricFamily("rag_answer_cache_invalidations", "Answers dropped because a cited source changed",
+                                  value=answers["invalidations"])
+        yield CounterMetricFamily("rag_answer_cache_saved_seconds", "Pipeline time saved by answer cache hits",
+                                  value=answers["saved_ms"] / 1000)
+
+        flights = search_flights.stats()
+        yield GaugeMetricFamily("rag_search_in_flight", "Distinct searches currently executing",
+                                value=flights["in_flight"])
+        yield CounterMetricFamily("rag_search_executions", "Search pipeline executions",
+                                  value=flights["executions"])
+        yield CounterMetricFamily("rag_search_coalesced", "Searches served by joining an identical in-flight search",
+                                  value=flights["coalesced"])
+
+
+REGISTRY.register(_StatsCollector())
+
+
+def route_label(request) -> str:
+    """Route template for a request ("/api/docs/{doc_id}"), so paths with ids don't explode label cardinality."""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
@@ -0,0 +1,231 @@
+"""
+Request Tracing
+
+Lightweight per-request tracing: nested spans around service calls and
+database queries, reported as a Server-Timing header and (sampled, when
+enabled) appended to a local JSONL file for offline tail-latency analysis.
+
+What This Does:
+    1. The HTTP middleware in main.py starts a trace per request
+    2. Code wraps work in `with span("name"):` or decorates functions with
+       @traced("name"); spans nest automatically (contextvars), including
+       across asyncio tasks started inside the request
+    3. When the response is ready, span durations are summed by name into a
+       Server-Timing header (visible in the browser's network tab)
+    4. When the request finishes, the trace is written as one JSON line if
+       export is enabled (TRACE_EXPORT_PATH) and it was sampled
+       (TRACE_SAMPLE_RATE) or slower than TRACE_SLOW_MS
+
+Outside a request (workers, tests, startup) spans are no-ops.
+
+Example JSONL line:
+    {"trace_id": "9f2c...", "name": "POST /api/search", "duration_ms": 2140.3,
+     "spans": [{"id": 1, "parent": 0, "name": "embed", "start_ms": 3.1, "duration_ms": 81.0}, ...]}
+
+Configuration (environment variables):
+    TRACE_SAMPLE_RATE   Fraction of requests exported (default: constants)
+    TRACE_SLOW_MS       Always export requests slower than this (default: constants)
+    TRACE_EXPORT_PATH   JSONL file to append to (unset: no export)
+"""
+
+import asyncio
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from app.core.constants import TRACE_SAMPLE_RATE, TRACE_SLOW_MS
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", TRACE_SAMPLE_RATE))
+SLOW_MS = float(os.getenv("TRACE_SLOW_MS", TRACE_SLOW_MS))
+EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")  # Opt-in: None disables the JSONL export
+
+
+class Span:
+    """One timed operation inside a trace."""
+
+    __slots__ = ("id", "parent", "name", "attrs", "start", "end")
+
+    def __init__(self, span_id: int, parent: Optional[int], name: str, attrs: Dict[str, Any]):
+        self.id = span_id
+        self.parent = parent
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, name: str, sampled: bool):
+        self.trace_id = uuid.uuid4().hex
+        self.sampled = sampled
+        self.started_at = time.time()
+        self._ids = itertools.count(1)
+        self.spans: List[Span] = []
+        self.root = Span(0, None, name, {})
+
+    def new_span(self, parent: Optional[Span], name: str, attrs: Dict[str, Any]) -> Span:
+        span = Span(next(self._ids), parent.id if parent else 0, name, attrs)
+        self.spans.append(span)
+        return span
+
+    def server_timing(self) -> str:
+        """
+        Formats span totals as a Server-Timing header value.
+
+        Spans with the same name are summed (e.g. several db.query spans).
+
+        Example:
+            "auth.projects;dur=4.1, embed;dur=80.3, db.query;dur=35.0, total;dur=2140.2"
+        """
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            if span.end is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        totals["total"] = self.root.duration_ms
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in totals.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.root.duration_ms, 3),
+            "attrs": self.root.attrs,
+            "spans": [
+                {
+                    "id": span.id,
+                    "parent": span.parent,
+                    "name": span.name,
+                    "start_ms": round((span.start - self.root.start) * 1000, 3),
+                    "duration_ms": round(span.duration_ms, 3),
+                    **({"attrs": span.attrs} if span.attrs else {}),
+                }
+                for span in self.spans
+            ],
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def start_trace(name: str) -> Trace:
+    """Starts a trace for the current request (called by the middleware)."""
+    trace = Trace(name, sampled=random.random() < SAMPLE_RATE)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """
+    Times the enclosed block as a child of the current span.
+
+    Example:
+        >>> with span("vector_search", top_k=200):
+        ...     rows = await fetch_all(sql, ...)
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = trace.new_span(_current_span.get(), name, attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def record(name: str, started: float, **attrs: Any) -> None:
+    """
+    Adds an already-finished span that began at `started` (time.perf_counter()).
+
+    For code that cannot wrap a block in span(), e.g. async generators,
+    whose steps may run in different contexts, or a semaphore wait.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return
+
+    finished = trace.new_span(_current_span.get(), name, attrs)
+    finished.start = started
+    finished.end = time.perf_counter()
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator that wraps every call of a function (sync or async) in a span.
+
+    Example:
+        >>> @traced("auth.projects")
+        ... async def get_user_projects(user_id): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+_export_lock = threading.Lock()
+
+
+def _append(line: str) -> None:
+    with _export_lock:
+        with open(EXPORT_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+async def finish_trace(trace: Trace) -> None:
+    """
+    Ends a trace and exports it if export is enabled and it is sampled or slow.
+
+    The file write runs in a thread so the event loop never blocks on disk.
+    """
+    trace.root.end = time.perf_counter()
+
+    if EXPORT_PATH is None or not (trace.sampled or trace.root.duration_ms >= SLOW_MS):
+        return
+
+    try:
+        await asyncio.to_thread(_append, json.dumps(trace.to_dict(), default=str))
+    except Exception as e:
+        logger.warning(f"Trace export failed: {e}")
@@ -7,7 +7,49 @@ All database queries go through this client.
 
 import asyncpg
 import os
-from typing import List, Dict, Any, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional
+from app.core.tracing import span
+from app.core.metrics import DB_POOL_ACQUIRE
+from app.db.codecs import register_codecs
+
+
+class TracedConnection(asyncpg.Connection):
+    """
+    asyncpg connection that records a "db.query" span for every query.
+
+    Spans are no-ops outside a traced request (see app.core.tracing).
+    """
+
+    async def fetch(self, query, *args, **kwargs):
+        with span("db.query", sql=_sql_summary(query)):
+            return await super().fetch(query, *args, **kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        with span("db.query", sql=_sql_summary(query)):
+            return await super().fetchrow(query, *args, **kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        with span("db.query", sql=_sql_summary(query)):
+            return await super().fetchval(query, *args, **kwargs)
+
+    async def execute(self, query, *args, **kwargs):
+        with span("db.query", sql=_sql_summary(query)):
+            return await super().execute(query, *args, **kwargs)
+
+    async def executemany(self, command, args, **kwargs):
+        with span("db.query", sql=_sql_summary(command)):
+            return await super().executemany(command, args, **kwargs)
+
+    async def copy_records_to_table(self, table_name, **kwargs):
+        with span("db.copy", table=table_name):
+            return await super().copy_records_to_table(table_name, **kwargs)
+
+
+def _sql_summary(query: str) -> str:
+    """First 80 characters of a query on one line (enough to tell queries apart)."""
+    return " ".join(query.split())[:80]
 
 
 # Global connection pool (initialized on startup)
@@ -67,8 +109,10 @@ async def init_db_pool():
 
     pool = await asyncpg.create_pool(
         database_url,
+        connection_class=TracedConnection,
+        init=register_codecs,  # Binary pgvector + JSONB codecs on every connection
         min_size=1,
-        max_size=5,
+        max_size=5,  # A hybrid search holds 2 at once (vector + full-text, see retrieval.py)
         command_timeout=60
     )
 
@@ -126,6 +170,48 @@ def get_db_pool() -> asyncpg.Pool:
     return pool
 
 
+@asynccontextmanager
+async def acquire() -> AsyncIterator[asyncpg.Connection]:
+    """
+    Borrows a connection from the pool, tracing the wait as "db.acquire".
+
+    Use instead of pool.acquire() so time spent waiting for a free
+    connection (pool exhausted) shows up in traces and Server-Timing.
+
+    Example:
+        >>> async with acquire() as conn:
+        >>>     rows = await conn.fetch("SELECT 1")
+    """
+    db_pool = get_db_pool()
+    with span("db.acquire"):
+        started = time.perf_counter()
+        connection = await db_pool.acquire()
+        DB_POOL_ACQUIRE.observe(time.perf_counter() - started)
+    try:
+        yield connection
+    finally:
+        await db_pool.release(connection)
+
+
+@asynccontextmanager
+async def transaction() -> AsyncIterator[asyncpg.Connection]:
+    """
+    Borrows a connection and runs the block in one transaction.
+
+    Commits when the block exits normally, rolls back if it raises. Pass the
+    connection to the db.py functions that accept `conn=` so they join the
+    transaction instead of borrowing a second connection.
+
+    Example:
+        >>> async with transaction() as conn:
+        >>>     doc_id = await insert_document(..., conn=conn)
+        >>>     await insert_chunks_bulk(doc_id, chunks, embeddings, conn=conn)
+    """
+    async with acquire() as connection:
+        async with connection.transaction():
+            yield connection
+
+
 async def fetch_one(query: str, *args) -> Optional[Dict[str, Any]]:
     """
     Executes a SELECT query and returns a single row.
@@ -162,10 +248,7 @@ async def fetch_one(query: str, *args) -> Optional[Dict[str, Any]]:
         -     row = await connection.fetchrow(query, *args)
         -     return dict(row) if row else None
     """
-    if pool is None:
-        raise Exception("Database pool not initialized. Call init_db_pool() first.")
-
-    async with pool.acquire() as connection:
+    async with acquire() as connection:
         row = await connection.fetchrow(query, *args)
         return dict(row) if row else None
 
@@ -212,10 +295,7 @@ async def fetch_all(query: str, *args) -> List[Dict[str, Any]]:
         -     rows = await connection.fetch(query, *args)
         -     return [dict(row) for row in rows]
     """
-    if pool is None:
-        raise Exception("Database pool not initialized. Call init_db_pool() first.")
-
-    async with pool.acquire() as connection:
+    async with acquire() as connection:
         rows = await connection.fetch(query, *args)
         return [dict(row) for row in rows]
 
@@ -250,10 +330,7 @@ async def execute(query: str, *args) -> str:
         -     status = await connection.execute(query, *args)
         -     return status
     """
-    if pool is None:
-        raise Exception("Database pool not initialized. Call init_db_pool() first.")
-
-    async with pool.acquire() as connection:
+    async with acquire() as connection:
         status = await connection.execute(query, *args)
         return status
 
@@ -0,0 +1,69 @@
+"""
+asyncpg Type Codecs
+
+Registered on every pool connection (init hook in app/db/client.py) so that:
+
+    - pgvector `vector` values travel in pgvector's binary format
+      (uint16 dim, uint16 unused, dim × big-endian float32) and come back
+      as NumPy float32 arrays. Before, every query turned 1024 floats into
+      a '[0.1,0.2,...]' string with str() and Postgres parsed it back
+    - JSONB columns are decoded once by the driver (json.loads) instead of
+      being returned as strings and parsed in each db.py function
+
+Usage:
+    - Pass a list or NumPy array wherever a vector parameter is expected
+      (`$1::vector`); it is encoded automatically
+    - Selected vector columns are np.ndarray (dtype float32)
+    - Pass Python lists/dicts for JSONB parameters (do NOT json.dumps them)
+"""
+
+import json
+import struct
+from typing import Sequence, Union
+import asyncpg
+import numpy as np
+
+_VECTOR_HEADER = struct.Struct(">HH")
+
+
+def encode_vector(value: Union[Sequence[float], np.ndarray]) -> bytes:
+    """
+    Encodes a vector in pgvector's binary wire format.
+
+    Example:
+        >>> encode_vector([1.0, 2.0])
+        b'\\x00\\x02\\x00\\x00?\\x80\\x00\\x00@\\x00\\x00\\x00'
+    """
+    array = np.asarray(value, dtype=">f4")
+    if array.ndim != 1:
+        raise ValueError(f"Vector must be one-dimensional, got shape {array.shape}")
+    return _VECTOR_HEADER.pack(array.shape[0], 0) + array.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Decodes pgvector's binary wire format into a float32 array."""
+    dim, _ = _VECTOR_HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=_VECTOR_HEADER.size).astype(np.float32)
+
+
+async def register_codecs(conn: asyncpg.Connection) -> None:
+    """
+    Registers the vector and JSONB codecs on a new connection.
+
+    The vector type's schema is looked up because Supabase installs the
+    extension in `extensions`, not `public`.
+    """
+    schema = await conn.fetchval("""
+        SELECT n.nspname
+        FROM pg_type t
+        JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE t.typname = 'vector'
+    """)
+    if schema:
+        await conn.set_type_codec(
+            "vector", schema=schema, encoder=encode_vector, decoder=decode_vector, format="binary"
+        )
+
+    await conn.set_type_codec(
+        "jsonb", schema="pg_catalog", encoder=json.dumps, decoder=json.loads, format="text"
+    )
@@ -4,7 +4,7 @@ FastAPI Application Entry Point
 This is the main file that creates and configures the FastAPI app.
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 import os
@@ -17,6 +17,14 @@ load_dotenv(dotenv_path=env_path)
 
 from app.api.routes import search, docs, upload, notion, handovers, employees
 from app.db.client import init_db_pool, close_db_pool
+from app.services.cohere_client import init_cohere_client, close_cohere_client
+from app.services.llm import init_llm_client, close_llm_client
+from app.services.embedding_cache import query_cache
+from app.services.answer_cache import answer_cache
+from app.services import ingest_jobs, offload
+from app.core import tracing, metrics
+from app.core.body_limit import BodyLimitMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 
 # Create FastAPI app with security scheme for Swagger UI
@@ -36,6 +44,12 @@ app = FastAPI(
 security = HTTPBearer()
 
 
+# Reject oversized uploads (413) before they are spooled to disk. Added
+# before CORS so CORS wraps it: the browser can only read the 413 if it
+# carries the CORS headers
+app.add_middleware(BodyLimitMiddleware, paths=["/api/upload"], max_bytes=ingest_jobs.MAX_UPLOAD_BYTES)
+
+
 # Configure CORS (Cross-Origin Resource Sharing)
 # Allows frontend (http://localhost:3000) to call backend (http://localhost:8000)
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
@@ -46,9 +60,50 @@ app.add_middleware(
     allow_credentials=True,       # Allow cookies/auth headers
     allow_methods=["*"],          # Allow all HTTP methods (GET, POST, etc.)
     allow_headers=["*"],          # Allow all headers
+    expose_headers=["Server-Timing"],  # Let the frontend read per-stage timings
 )
 
 
+# Request tracing: spans → Server-Timing header + sampled JSONL export
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Traces every request (see app/core/tracing.py).
+
+    What This Does:
+        - Starts a trace; spans recorded by services attach to it
+        - Adds a Server-Timing header with per-stage totals once the response
+          starts (for streaming responses: the stages before the first byte)
+        - Exports the trace when the body has been fully sent
+    """
+    trace = tracing.start_trace(f"{request.method} {request.url.path}")
+    try:
+        response = await call_next(request)
+    except Exception:
+        await tracing.finish_trace(trace)
+        raise
+
+    response.headers["Server-Timing"] = trace.server_timing()
+    trace.root.attrs["status"] = response.status_code
+    route = metrics.route_label(request)
+
+    body = response.body_iterator
+
+    async def traced_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            await tracing.finish_trace(trace)
+            metrics.HTTP_REQUEST_DURATION.labels(request.method, route, response.status_code).observe(
+                trace.root.end - trace.root.start
+            )
+            metrics.observe_trace(trace)
+
+    response.body_iterator = traced_body()
+    return response
+
+
 # Startup event: Initialize database connection pool
 @app.on_event("startup")
 async def startup():
@@ -58,6 +113,9 @@ async def startup():
     What This Does:
         - Initializes the database connection pool
         - Pool is reused across all requests (efficient!)
+        - Creates the shared async Cohere client (pooled keep-alive connections)
+        - Creates the shared async Groq client
+        - Starts the background ingestion workers (INGEST_WORKERS)
 
     Why We Need This:
         - Database connections are slow to create (~50-100ms)
@@ -70,6 +128,9 @@ async def startup():
     """
     print("Starting RAG Knowledge Hub API...")
     await init_db_pool()
+    await init_cohere_client()
+    await init_llm_client()
+    ingest_jobs.start_workers()
 
 
 # Shutdown event: Close database connection pool
@@ -79,7 +140,10 @@ async def shutdown():
     Runs when the application shuts down.
 
     What This Does:
+        - Stops the ingestion workers (an interrupted job is re-claimed later)
+          and the extraction process pool
         - Closes all connections in the pool
+        - Closes the shared Cohere and Groq clients
         - Frees up database resources
 
     Why We Need This:
@@ -92,6 +156,10 @@ async def shutdown():
         ✅ Database connection pool closed
     """
     print("Shutting down RAG Knowledge Hub API...")
+    await ingest_jobs.stop_workers()
+    offload.close_process_pool()
+    await close_llm_client()
+    await close_cohere_client()
     await close_db_pool()
 
 
@@ -111,18 +179,44 @@ async def health_check():
     Health check endpoint for monitoring and load balancers.
 
     Returns:
-        {"status": "healthy"}
+        {"status": "healthy", "caches": {...}}
 
     Why We Need This:
         - Load balancers need to check if service is alive
         - Monitoring systems ping this endpoint
         - Helps with rolling deployments (wait until healthy)
+        - Shows this worker's cache hit rates and the latency they saved
 
     Example Usage:
         curl http://localhost:8000/health
-        {"status": "healthy"}
+        {"status": "healthy", "caches": {"query_embeddings": {"hit_rate": 0.41, ...},
+                                          "answers": {"hit_rate": 0.12, "saved_ms": 84000.0, ...}}}
+    """
+    return {
+        "status": "healthy",
+        "caches": {
+            "query_embeddings": query_cache.stats(),
+            "answers": answer_cache.stats(),
+        },
+    }
+
+
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint (text exposition format).
+
+    See app/core/metrics.py for the list of metrics. Values are per worker
+    process.
+
+    Example Usage:
+        curl http://localhost:8000/metrics
+        rag_stage_duration_seconds_bucket{stage="embed",le="0.1"} 42.0
+        rag_db_pool_idle 3.0
+        ...
     """
-    return {"status": "healthy"}
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 # Root endpoint (welcome message)
@@ -147,8 +241,12 @@ async def root():
         "docs": "http://localhost:8000/docs",
         "endpoints": {
             "search": "POST /api/search",
+            "search_stream": "POST /api/search/stream",
             "get_doc": "GET /api/docs/:doc_id",
-            "health": "GET /health"
+            "upload": "POST /api/upload",
+            "upload_job": "GET /api/upload/jobs/:job_id",
+            "health": "GET /health",
+            "metrics": "GET /metrics"
         }
     }
 
@@ -0,0 +1,277 @@
+"""
+Semantic Answer Cache
+
+In-process cache of generated answers, looked up by query embedding
+similarity instead of exact text, so paraphrased questions ("how do I
+deploy atlas" / "steps to deploy the Atlas service") skip vector search,
+rerank and the LLM.
+
+What This Does:
+    1. Scopes every entry by an ACL fingerprint, so an answer is only reused
+       for users who can see exactly the same sources
+    2. Finds the most similar cached query in that scope (cosine similarity
+       >= ANSWER_CACHE_SIMILARITY)
+    3. Re-checks the cited documents/handovers against the database before
+       serving; if any changed or was deleted, the entry is dropped
+
+Scope Fingerprint:
+    - sha256 of the sorted project set (+ top_k)
+    - If the answer cites a handover, the user id is added too: handovers are
+      visible per person, not per project
+
+Known Limits:
+    - A document added after an answer was cached is not seen until the
+      entry expires (ANSWER_CACHE_TTL_SECONDS)
+    - One cache per worker process
+"""
+
+import hashlib
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from app.services import db
+from app.core.tracing import traced
+from app.core.constants import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_SIMILARITY,
+)
+
+
+def scope_fingerprint(user_projects: List[str], top_k: int, user_id: Optional[str] = None) -> str:
+    """
+    Hashes everything that decides which sources a search can return.
+
+    Example:
+        >>> scope_fingerprint(["Phoenix", "Atlas"], 12) == scope_fingerprint(["Atlas", "Phoenix"], 12)
+        True
+    """
+    parts = ["projects=" + ",".join(sorted(set(user_projects))), f"top_k={top_k}"]
+    if user_id is not None:
+        parts.append(f"user={user_id}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def cited_sources(chunks: List[Dict[str, Any]]) -> Tuple[List[int], List[int]]:
+    """Returns the distinct (doc_ids, handover_ids) cited by reranked chunks."""
+    doc_ids = sorted({c["doc_id"] for c in chunks if c.get("doc_id") is not None})
+    handover_ids = sorted({c["handover_id"] for c in chunks if c.get("handover_id") is not None})
+    return doc_ids, handover_ids
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    unit = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(unit)) or 1.0
+    return unit / norm
+
+
+class SemanticAnswerCache:
+    """
+    Bounded LRU cache of answers with a time-to-live and similarity lookup.
+
+    Entries are indexed by scope fingerprint, so a lookup only compares the
+    query against answers produced for the same access scope.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        similarity: float = ANSWER_CACHE_SIMILARITY
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._scopes: Dict[str, Set[int]] = {}
+        self._ids = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.saved_ms = 0.0
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        ids = self._scopes.get(entry["scope"])
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._scopes[entry["scope"]]
+
+    def get(self, scopes: List[str], query_vector: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the most similar live entry in any of the scopes, or None.
+
+        Does not count a hit: the caller validates the entry first and then
+        calls record_hit() or invalidate().
+        """
+        now = time.monotonic()
+        live = []
+        for scope in scopes:
+            for entry_id in list(self._scopes.get(scope, ())):
+                entry = self._entries[entry_id]
+                if now - entry["stored_at"] > self.ttl_seconds:
+                    self._remove(entry_id)
+                    continue
+                live.append(entry)
+
+        best = None
+        if live:
+            # Cosine similarity to every live entry: one matrix-vector product
+            scores = np.stack([entry["vector"] for entry in live]) @ _unit(query_vector)
+            index = int(np.argmax(scores))
+            best_score = float(scores[index])
+            if best_score >= self.similarity:
+                best = live[index]
+
+        if best is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(best["id"])
+        return dict(best, similarity=best_score)
+
+    def put(
+        self,
+        scope: str,
+        query_vector: List[float],
+        answer: str,
+        chunks: List[Dict[str, Any]],
+        used_doc_ids: List[int],
+        versions: Dict[Tuple[str, int], str],
+        cost_ms: float
+    ) -> None:
+        """
+        Stores an answer.
+
+        Args:
+            scope: scope_fingerprint() of the search
+            query_vector: Query embedding
+            answer: Generated answer
+            chunks: Formatted citations returned with the answer
+            used_doc_ids: Doc ids returned with the answer
+            versions: db.fetch_source_versions() for the cited sources
+            cost_ms: Time the cache saves on a hit (search + rerank + LLM)
+        """
+        entry_id = next(self._ids)
+        self._entries[entry_id] = {
+            "id": entry_id,
+            "scope": scope,
+            "vector": _unit(query_vector),
+            "answer": answer,
+            "chunks": chunks,
+            "used_doc_ids": used_doc_ids,
+            "versions": versions,
+            "cost_ms": cost_ms,
+            "stored_at": time.monotonic(),
+        }
+        self._scopes.setdefault(scope, set()).add(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def record_hit(self, entry: Dict[str, Any], lookup_ms: float) -> None:
+        """Counts a served hit and the latency it saved."""
+        self.hits += 1
+        self.saved_ms += max(0.0, entry["cost_ms"] - lookup_ms)
+
+    def invalidate(self, entry: Dict[str, Any]) -> None:
+        """Drops an entry whose cited sources changed."""
+        self._remove(entry["id"])
+        self.invalidations += 1
+        self.misses += 1
+
+    def clear(self) -> None:
+        """Drops all entries (counters are kept)."""
+        self._entries.clear()
+        self._scopes.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns cache counters.
+
+        Example:
+            {"size": 40, "hits": 120, "misses": 380, "invalidations": 3,
+             "hit_rate": 0.24, "saved_ms": 310000.0, "avg_saved_ms": 2583.3}
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_ms": self.saved_ms,
+            "avg_saved_ms": self.saved_ms / self.hits if self.hits else 0.0,
+        }
+
+
+# Process-wide cache used by the search routes
+answer_cache = SemanticAnswerCache()
+
+
+@traced("answer_cache")
+async def lookup_answer(
+    user_id: str,
+    user_projects: List[str],
+    top_k: int,
+    query_vector: List[float]
+) -> Optional[Dict[str, Any]]:
+    """
+    Returns a still-valid cached answer for this user's scope, or None.
+
+    Checks both the project-only scope and the user-specific scope (answers
+    citing handovers), then confirms the cited sources are unchanged.
+    """
+    started = time.perf_counter()
+    scopes = [
+        scope_fingerprint(user_projects, top_k),
+        scope_fingerprint(user_projects, top_k, user_id),
+    ]
+
+    entry = answer_cache.get(scopes, query_vector)
+    if entry is None:
+        return None
+
+    doc_ids = [source_id for source_type, source_id in entry["versions"] if source_type == "document"]
+    handover_ids = [source_id for source_type, source_id in entry["versions"] if source_type == "handover"]
+    current = await db.fetch_source_versions(doc_ids, handover_ids)
+
+    if current != entry["versions"]:
+        answer_cache.invalidate(entry)
+        return None
+
+    answer_cache.record_hit(entry, (time.perf_counter() - started) * 1000)
+    return entry
+
+
+def store_answer(
+    user_id: str,
+    user_projects: List[str],
+    top_k: int,
+    query_vector: List[float],
+    answer: str,
+    chunks: List[Dict[str, Any]],
+    citations: List[Dict[str, Any]],
+    used_doc_ids: List[int],
+    versions: Dict[Tuple[str, int], str],
+    cost_ms: float
+) -> None:
+    """
+    Caches a generated answer under the narrowest scope it needs.
+
+    Answers that cite a handover are scoped to the user; all others are
+    shared by every user with the same project set.
+    """
+    _, handover_ids = cited_sources(chunks)
+    scope = scope_fingerprint(user_projects, top_k, user_id if handover_ids else None)
+    answer_cache.put(scope, query_vector, answer, citations, used_doc_ids, versions, cost_ms)
@@ -14,12 +14,14 @@ import os
 import jwt
 from fastapi import HTTPException
 from app.db.client import fetch_all, fetch_one
+from app.core.tracing import traced
 
 
 JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "change-me")
 JWT_ALG = "HS256"
 
 
+@traced("auth.verify_jwt")
 def verify_jwt(token: str) -> str:
 
     """
@@ -105,6 +107,7 @@ def verify_jwt(token: str) -> str:
     
     
 
+@traced("auth.projects")
 async def get_user_projects(user_id: str) -> List[str]:
     """
     Retrieves all project IDs for a user.
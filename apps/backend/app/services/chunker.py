@@ -2,91 +2,481 @@
 Text Chunker
 
 Splits long documents into smaller chunks for embedding and retrieval.
+
+Also used by the Notion workers (workers/ingest_notion.py imports it from
+the repository checkout), so it must not import other app modules; the
+public names are listed in __all__.
+
+How It Works (linear in document size):
+    1. Encode the whole document ONCE (the tiktoken encoding is loaded once
+       per process)
+    2. Map every token to the byte offset where it starts (cumulative sum of
+       token byte lengths, looked up in a per-encoding table)
+    3. Slide a window of chunk_size tokens; the chunk's text is a slice of
+       the UTF-8 document between two offsets (no token decoding), ending
+       at a natural boundary (paragraph, line, sentence) found in a small
+       lookahead
+    4. Token counts come from the offsets (no re-encoding)
+    5. heading_path comes from a bisect over the sections' start offsets
+
+A "sections" mode (iter_section_chunks) packs whole sections instead of
+sliding across them; a "content" mode (iter_content_chunks) places
+boundaries by content, so edits only change the chunks next to them.
 """
 
-from typing import List, Dict, Any
+import bisect
+import hashlib
+import itertools
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import tiktoken
 
+__all__ = [
+    "CHUNK_MODES",
+    "ENCODING_NAME",
+    "chunk_markdown",
+    "get_encoding",
+    "iter_chunks",
+    "iter_content_chunks",
+    "iter_section_chunks",
+]
 
-def chunk_markdown(
+ENCODING_NAME = "cl100k_base"
+SOFT_SEPS = [b"\n\n", b"\n", b". ", b"! ", b"? "]  # Preferred split points, best first
+LOOKAHEAD_TOKENS = 80  # Tokens past chunk_size searched for a split point
+LOOKBACK_CHARS = 150  # Split points are only taken this close to the window end (bytes)
+SECTION_SNIPPET_CHARS = 100  # Prefix of each section's text located in the markdown
+CHUNK_MODES = ("window", "sections", "content")
+CDC_MIN_FRACTION = 0.5  # Content mode: no content-defined boundary before this share of chunk_size
+PARAGRAPH_BREAK = re.compile(rb"\n[ \t]*\n\s*")  # Content mode units: paragraphs...
+SENTENCE_BREAK = re.compile(rb"(?<=[.!?])\s+")  # ...or sentences of over-long paragraphs
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = ENCODING_NAME) -> tiktoken.Encoding:
+    """Loads a tiktoken encoding once per process."""
+    return tiktoken.get_encoding(name)
+
+
+@lru_cache(maxsize=None)
+def _token_lengths(encoding: tiktoken.Encoding) -> List[int]:
+    """Byte length of every token id of an encoding (built once per process)."""
+    lengths = []
+    for token in range(encoding.n_vocab):
+        try:
+            lengths.append(len(encoding.decode_single_token_bytes(token)))
+        except KeyError:
+            lengths.append(0)  # Unused id
+    return lengths
+
+
+def _byte_offsets(encoding: tiktoken.Encoding, tokens: List[int]) -> List[int]:
+    """Returns the byte offset where each token starts, plus the total length."""
+    return list(itertools.accumulate(map(_token_lengths(encoding).__getitem__, tokens), initial=0))
+
+
+def _char_boundary(data: bytes, offset: int) -> int:
+    """Moves an offset forward past UTF-8 continuation bytes (a token may end mid-character)."""
+    while offset < len(data) and 0x80 <= data[offset] < 0xC0:
+        offset += 1
+    return offset
+
+
+def _section_starts(data: bytes, sections: Optional[List[Dict[str, Any]]]) -> Tuple[List[int], List[List[str]]]:
+    """
+    Locates each section in the document (UTF-8 bytes), in document order.
+
+    A section starts at its heading line when one directly precedes its text.
+    Sections whose text cannot be found are skipped (the previous section
+    then covers their span).
+
+    Returns:
+        (start byte offsets, heading paths), both sorted by offset
+    """
+    starts: List[int] = []
+    paths: List[List[str]] = []
+    cursor = 0
+
+    for section in sections or []:
+        snippet = section.get("text", "").strip()[:SECTION_SNIPPET_CHARS].encode("utf-8")
+        if not snippet:
+            continue
+        found = data.find(snippet, cursor)
+        if found == -1:
+            continue
+
+        # Include the heading line(s) between the previous section and this text
+        heading = data.rfind(b"\n#", cursor, found)
+        if heading != -1:
+            start = heading + 1
+        elif data.startswith(b"#", cursor):
+            start = cursor
+        else:
+            start = found
+
+        starts.append(start)
+        paths.append(section["heading_path"])
+        cursor = found + len(snippet)
+
+    return starts, paths
+
+
+def iter_chunks(
     markdown: str,
-    sections: List[Dict[str, Any]] = None,
+    sections: Optional[List[Dict[str, Any]]] = None,
     chunk_size: int = 500,
-    chunk_overlap: int = 50
-) -> List[Dict[str, Any]]:
+    chunk_overlap: int = 50,
+    encoding: Optional[tiktoken.Encoding] = None
+) -> Iterator[Dict[str, Any]]:
     """
-    Splits Markdown text into overlapping chunks of approximately chunk_size tokens.
+    Yields overlapping chunks of approximately chunk_size tokens, in order.
+
+    Use directly for very large documents to process chunks as they are
+    produced; chunk_markdown() collects them into a list.
+
+    Args:
+        markdown: The Markdown text to chunk
+        sections: Sections with heading_path (from extraction / the normalizer)
+        chunk_size: Target chunk size in tokens
+        chunk_overlap: Tokens shared between consecutive chunks
+        encoding: tiktoken encoding (default: cl100k_base, cached)
+
+    Yields:
+        {"text", "heading_path", "token_count", "order"}
+        token_count counts the tokens that start inside the chunk's text.
     """
-    # Load tiktoken encoding
-    encoding = tiktoken.get_encoding("cl100k_base")
+    encoding = encoding or get_encoding()
 
-    # Encode the full markdown text
+    # --------- Step 1: Encode once, map tokens to byte offsets ---------
     tokens = encoding.encode(markdown)
     total_tokens = len(tokens)
+    if total_tokens == 0:
+        return
 
     # If the document is shorter than chunk_size, return a single chunk
     if total_tokens <= chunk_size:
-        return [{
+        yield {
             "text": markdown,
-            "heading_path": sections[0]["heading_path"] if sections and len(sections) > 0 else [],
+            "heading_path": sections[0]["heading_path"] if sections else [],
             "token_count": total_tokens,
             "order": 0
-        }]
+        }
+        return
+
+    data = markdown.encode("utf-8")
+    offsets = _byte_offsets(encoding, tokens)
+    section_starts, section_paths = _section_starts(data, sections)
 
-    # Split into chunks with overlap
-    chunks = []
+    # --------- Step 2: Slide the window ---------
     order = 0
     position = 0
 
     while position < total_tokens:
-        # Determine the end position for this chunk
         end_position = min(position + chunk_size, total_tokens)
+        start_byte = _char_boundary(data, offsets[position])
+        end_byte = offsets[end_position]
 
-        # Extract chunk tokens and decode to text
-        chunk_tokens = tokens[position:end_position]
-        chunk_text = encoding.decode(chunk_tokens)
-
-        # Try to find a natural sentence or paragraph boundary
-        SOFT_SEPS = ["\n\n", "\n", ". ", "! ", "? "]
-        extra_tokens = 80
-        window_end = min(end_position + extra_tokens, total_tokens)
-        window_text = encoding.decode(tokens[position:window_end])
-
-        look_back_from = max(0, len(window_text) - 150)
-        split_idx = None
-        for sep in SOFT_SEPS:
-            i = window_text.rfind(sep, look_back_from)
-            if i != -1:
-                split_idx = i + (0 if sep.startswith("\n") else len(sep))
-                break
-
-        if split_idx is not None:
-            chunk_text = window_text[:split_idx]
-
-        # Determine heading_path for this chunk
-        heading_path = []
-        if sections:
-            chunk_start_text = chunk_text[:100].strip().lower()
-            for section in sections:
-                section_text_snippet = section["text"][:100].strip().lower()
-                if section_text_snippet in chunk_text.lower() or chunk_start_text in section["text"].lower():
-                    heading_path = section["heading_path"]
+        # Prefer a natural boundary near the end of a slightly larger window
+        if end_position < total_tokens:
+            window_end = offsets[min(end_position + LOOKAHEAD_TOKENS, total_tokens)]
+            look_back_from = max(start_byte + 1, window_end - LOOKBACK_CHARS)
+            for sep in SOFT_SEPS:
+                i = data.rfind(sep, look_back_from, window_end)
+                if i != -1:
+                    end_byte = i + (0 if sep.startswith(b"\n") else len(sep))
                     break
+        end_byte = _char_boundary(data, end_byte)
+
+        # Tokens starting before end_byte belong to this chunk; a split point
+        # inside a token (". " + "Next") leaves that token to the next chunk too
+        chunk_end = bisect.bisect_left(offsets, end_byte, position + 1, total_tokens)
+        complete_end = chunk_end if offsets[chunk_end] == end_byte else chunk_end - 1
+        token_count = chunk_end - position
+        chunk_text = data[start_byte:end_byte].decode("utf-8")
 
-        # Calculate the accurate token count for this chunk
-        token_count = len(encoding.encode(chunk_text))
+        # --------- Step 3: Heading of the section the chunk starts in ---------
+        heading_path: List[str] = []
+        if section_paths:
+            index = bisect.bisect_right(section_starts, start_byte) - 1
+            heading_path = section_paths[max(index, 0)]
 
-        # Create chunk metadata (only if it has content)
         if chunk_text.strip():
-            chunks.append({
+            yield {
                 "text": chunk_text,
                 "heading_path": heading_path,
                 "token_count": token_count,
                 "order": order
-            })
+            }
+            order += 1
+
+        if end_byte >= len(data):
+            break
 
         # Move position forward (with overlap)
-        position += max(1, token_count - chunk_overlap)
+        position += max(1, complete_end - position - chunk_overlap)
+
+
+def _common_path(a: List[str], b: List[str]) -> List[str]:
+    common: List[str] = []
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        common.append(x)
+    return common
+
+
+def _packable(group_path: List[str], path: List[str]) -> bool:
+    """A section may join a group if it is a sibling or child of the group's topic."""
+    common = _common_path(group_path, path)
+    return bool(common) and len(common) >= len(path) - 1
+
+
+def iter_section_chunks(
+    markdown: str,
+    sections: Optional[List[Dict[str, Any]]] = None,
+    chunk_size: int = 500,
+    chunk_overlap: int = 50,
+    encoding: Optional[tiktoken.Encoding] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields chunks that follow the document's sections (structure-aware mode).
+
+    What This Does:
+        1. Cuts the markdown at section boundaries (each piece keeps its heading line)
+        2. Packs consecutive small sections into one chunk while they fit in
+           chunk_size (+ LOOKAHEAD_TOKENS, as window chunks) and stay under
+           the same topic (siblings, or a section
+           followed by its subsections)
+        3. Splits only sections larger than that, with the sliding
+           window (iter_chunks) and chunk_overlap; the last piece is packed
+           with the following subsections like a small section
+        4. heading_path is exact: the section's path, or the path shared by
+           all packed sections (e.g. ["Deployment"] for "Steps" + "Rollback")
+
+    Packed chunks do not overlap: they end at a section boundary.
+    Without sections, falls back to iter_chunks().
+
+    Yields:
+        {"text", "heading_path", "token_count", "order"}
+    """
+    encoding = encoding or get_encoding()
+    data = markdown.encode("utf-8")
+    starts, paths = _section_starts(data, sections)
+    if not starts:
+        yield from iter_chunks(markdown, sections, chunk_size, chunk_overlap, encoding)
+        return
+
+    # Text before the first section (title, preamble) stays with it
+    starts[0] = 0
+    ends = starts[1:] + [len(data)]
+
+    # Like window chunks, packed chunks may run LOOKAHEAD_TOKENS past chunk_size
+    # to end at a natural boundary (here: a section boundary)
+    limit = chunk_size + LOOKAHEAD_TOKENS
+    order = 0
+    group: List[str] = []
+    group_path: List[str] = []
+    group_tokens = 0
+
+    def make_chunk(text: str, heading_path: List[str], token_count: int) -> Dict[str, Any]:
+        nonlocal order
         order += 1
+        return {"text": text, "heading_path": heading_path, "token_count": token_count, "order": order - 1}
 
-    return chunks
\ No newline at end of file
+    for start, end, path in zip(starts, ends, paths):
+        text = data[start:end].decode("utf-8")
+        token_count = len(encoding.encode(text))
+
+        # --------- Close the current group if this section cannot join it ---------
+        if group and (group_tokens + token_count > limit or not _packable(group_path, path)):
+            yield make_chunk("".join(group), group_path, group_tokens)
+            group, group_tokens = [], 0
+
+        # --------- Oversized section: split it; its tail may be packed ---------
+        if token_count > limit:
+            body = text.rstrip()
+            pieces = list(iter_chunks(body, None, chunk_size, chunk_overlap, encoding))
+            for piece in pieces[:-1]:
+                yield make_chunk(piece["text"], path, piece["token_count"])
+            text = pieces[-1]["text"] + text[len(body):]
+            token_count = pieces[-1]["token_count"]
+
+        if not text.strip():
+            continue
+        group_path = _common_path(group_path, path) if group else path
+        group.append(text)
+        group_tokens += token_count
+
+    if group:
+        yield make_chunk("".join(group), group_path, group_tokens)
+
+
+def _split_after(data: bytes, pattern: "re.Pattern[bytes]", start: int, end: int) -> List[Tuple[int, int]]:
+    """Cuts data[start:end] after every match of pattern (the separator stays with the left piece)."""
+    spans: List[Tuple[int, int]] = []
+    cursor = start
+    for match in pattern.finditer(data, start, end):
+        if match.end() > cursor:
+            spans.append((cursor, match.end()))
+            cursor = match.end()
+    if cursor < end:
+        spans.append((cursor, end))
+    return spans
+
+
+def _units(data: bytes, encoding: tiktoken.Encoding, max_tokens: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    Splits the document into units: paragraphs, or the sentences of a
+    paragraph longer than max_tokens, or max_tokens token runs of an
+    over-long sentence.
+
+    Each unit is tokenized on its own, so its token count depends only on
+    its own text.
+
+    Yields:
+        (start byte, end byte, token count); the units cover the whole document
+    """
+    for start, end in _split_after(data, PARAGRAPH_BREAK, 0, len(data)):
+        tokens = len(encoding.encode(data[start:end].decode("utf-8")))
+        if tokens <= max_tokens:
+            yield start, end, tokens
+            continue
+
+        for sentence_start, sentence_end in _split_after(data, SENTENCE_BREAK, start, end):
+            sentence = data[sentence_start:sentence_end]
+            sentence_tokens = encoding.encode(sentence.decode("utf-8"))
+            if len(sentence_tokens) <= max_tokens:
+                yield sentence_start, sentence_end, len(sentence_tokens)
+                continue
+
+            offsets = _byte_offsets(encoding, sentence_tokens)
+            cut = 0
+            for position in range(max_tokens, len(sentence_tokens), max_tokens):
+                next_cut = _char_boundary(sentence, offsets[position])
+                yield sentence_start + cut, sentence_start + next_cut, max_tokens
+                cut = next_cut
+            yield sentence_start + cut, sentence_end, len(sentence_tokens) % max_tokens or max_tokens
+
+
+def _is_cut_point(unit: bytes, tokens: int, spread: int) -> bool:
+    """
+    True if a chunk may end after this unit, decided by the unit's content alone.
+
+    A unit of n tokens is a cut point with probability ~n / spread, so chunks
+    grow about `spread` tokens past the minimum, whatever the unit sizes.
+    """
+    digest = int.from_bytes(hashlib.blake2b(unit.strip(), digest_size=4).digest(), "big")
+    return digest * spread < tokens << 32
+
+
+def iter_content_chunks(
+    markdown: str,
+    sections: Optional[List[Dict[str, Any]]] = None,
+    chunk_size: int = 500,
+    chunk_overlap: int = 0,
+    encoding: Optional[tiktoken.Encoding] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields chunks with content-defined boundaries (maximal reuse on edits).
+
+    The window chunker places boundaries every chunk_size tokens, so one
+    paragraph inserted near the top shifts every later boundary and every
+    later chunk must be re-embedded. Here a boundary depends only on the
+    text next to it, so an edit changes the chunk(s) around it and the
+    boundaries resynchronise right after.
+
+    What This Does:
+        1. Splits the document into units (paragraphs; sentences or token
+           runs for over-long paragraphs)
+        2. Adds units to the current chunk; once it has CDC_MIN_FRACTION of
+           chunk_size tokens, it ends after a unit whose content hash hits
+           the cut condition (_is_cut_point)
+        3. A chunk never exceeds chunk_size + LOOKAHEAD_TOKENS (as window
+           chunks): it ends before the unit that would overflow it
+        4. heading_path comes from the section the chunk starts in
+
+    Chunks do not overlap (chunk_overlap is ignored): an overlap would tie
+    each chunk's text to its neighbour's boundary.
+
+    Yields:
+        {"text", "heading_path", "token_count", "order"}
+    """
+    encoding = encoding or get_encoding()
+    data = markdown.encode("utf-8")
+    section_starts, section_paths = _section_starts(data, sections)
+
+    min_tokens = int(chunk_size * CDC_MIN_FRACTION)
+    max_tokens = chunk_size + LOOKAHEAD_TOKENS
+    spread = max(1, chunk_size - min_tokens)
+
+    order = 0
+    chunk_start: Optional[int] = None
+    chunk_end = 0
+    chunk_tokens = 0
+
+    def make_chunk() -> Optional[Dict[str, Any]]:
+        nonlocal order
+        text = data[chunk_start:chunk_end].decode("utf-8")
+        if not text.strip():
+            return None
+        heading_path: List[str] = []
+        if section_paths:
+            index = bisect.bisect_right(section_starts, chunk_start) - 1
+            heading_path = section_paths[max(index, 0)]
+        order += 1
+        return {"text": text, "heading_path": heading_path, "token_count": chunk_tokens, "order": order - 1}
+
+    for start, end, tokens in _units(data, encoding, max_tokens):
+        # --------- End the chunk before a unit that would overflow it ---------
+        if chunk_start is not None and chunk_tokens + tokens > max_tokens:
+            chunk = make_chunk()
+            if chunk:
+                yield chunk
+            chunk_start = None
+
+        if chunk_start is None:
+            chunk_start, chunk_tokens = start, 0
+        chunk_end = end
+        chunk_tokens += tokens
+
+        # --------- Content-defined boundary after this unit ---------
+        if chunk_tokens >= min_tokens and _is_cut_point(data[start:end], tokens, spread):
+            chunk = make_chunk()
+            if chunk:
+                yield chunk
+            chunk_start = None
+
+    if chunk_start is not None:
+        chunk = make_chunk()
+        if chunk:
+            yield chunk
+
+
+def chunk_markdown(
+    markdown: str,
+    sections: Optional[List[Dict[str, Any]]] = None,
+    chunk_size: int = 500,
+    chunk_overlap: int = 50,
+    mode: str = "window",
+    encoding: Optional[tiktoken.Encoding] = None
+) -> List[Dict[str, Any]]:
+    """
+    Splits Markdown text into chunks of approximately chunk_size tokens.
+
+    Modes:
+        "window": overlapping token windows across the whole document (iter_chunks)
+        "sections": whole sections packed per topic, oversized ones split
+                    (iter_section_chunks); fewer chunks for the same text
+        "content": content-defined boundaries (iter_content_chunks); after an
+                   edit, only the chunks around it change and need re-embedding
+
+    Example:
+        >>> chunks = chunk_markdown("# Deploy\n\nTo deploy: ...", sections, chunk_size=500, chunk_overlap=50)
+        >>> chunks[0]
+        {"text": "# Deploy\n\nTo deploy: ...", "heading_path": ["Deploy"], "token_count": 412, "order": 0}
+    """
+    if mode not in CHUNK_MODES:
+        raise ValueError(f"Unknown chunk mode {mode!r}; expected one of {CHUNK_MODES}")
+    chunker = {"window": iter_chunks, "sections": iter_section_chunks, "content": iter_content_chunks}[mode]
+    return list(chunker(markdown, sections, chunk_size, chunk_overlap, encoding))
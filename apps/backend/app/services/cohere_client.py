@@ -0,0 +1,153 @@
+"""
+Cohere Client
+
+This module owns the single async Cohere client shared by the whole process.
+All embed and rerank calls go through it.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, List, Optional
+import cohere
+from app.core.tracing import record, span
+from app.core.metrics import track_call
+from app.core.constants import (
+    COHERE_MAX_CONCURRENCY,
+    COHERE_EMBED_TIMEOUT,
+    COHERE_RERANK_TIMEOUT,
+    COHERE_MAX_RETRIES,
+)
+
+
+# Global client (initialized on startup)
+client: Optional[cohere.AsyncClient] = None
+
+# Limits how many Cohere requests this process has in flight at once
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+async def init_cohere_client():
+    """
+    Initializes the shared async Cohere client.
+
+    What This Does:
+        1. Gets COHERE_API_KEY from environment
+        2. Creates one cohere.AsyncClient for the process
+        3. Creates the semaphore that caps concurrent Cohere requests
+
+    Why One Client:
+        - The client keeps a single aiohttp session, so HTTPS connections are
+          pooled and kept alive instead of re-handshaking on every call
+        - Calls are awaited, so a slow embedding no longer blocks the event loop
+
+    When This Runs:
+        - Called once during app startup (in main.py), next to init_db_pool()
+
+    Raises:
+        ValueError: If COHERE_API_KEY is not set
+    """
+    global client, _semaphore
+
+    api_key = os.getenv("COHERE_API_KEY")
+    if not api_key:
+        raise ValueError("Cohere API key not found in environment variables.")
+
+    client = cohere.AsyncClient(
+        api_key,
+        num_workers=COHERE_MAX_CONCURRENCY,
+        max_retries=COHERE_MAX_RETRIES,
+        timeout=max(COHERE_EMBED_TIMEOUT, COHERE_RERANK_TIMEOUT),
+        check_api_key=False,
+    )
+    _semaphore = asyncio.Semaphore(COHERE_MAX_CONCURRENCY)
+
+    print(f"Cohere client initialized (max_concurrency={COHERE_MAX_CONCURRENCY})")
+
+
+async def close_cohere_client():
+    """
+    Closes the shared Cohere client and its HTTP connections.
+
+    When This Runs:
+        - Called during app shutdown (in main.py)
+    """
+    global client
+
+    if client:
+        await client.close()
+        client = None
+        print("Cohere client closed")
+
+
+def get_cohere_client() -> cohere.AsyncClient:
+    """
+    Returns the shared Cohere client.
+
+    Raises:
+        Exception: If client is not initialized
+    """
+    if client is None:
+        raise Exception("Cohere client not initialized. Call init_cohere_client() first.")
+    return client
+
+
+async def embed(texts: List[str], model: str, input_type: str) -> List[List[float]]:
+    """
+    Embeds texts with the shared client.
+
+    Args:
+        texts: Texts to embed (at most 96 per call)
+        model: Cohere embedding model
+        input_type: "search_query" or "search_document"
+
+    Returns:
+        One embedding per input text, in input order
+
+    Raises:
+        asyncio.TimeoutError: If the call takes longer than COHERE_EMBED_TIMEOUT
+        Exception: If the Cohere API call fails
+    """
+    co = get_cohere_client()
+
+    queued = time.perf_counter()
+    async with _semaphore:
+        record("cohere.queue", queued)
+        with span("cohere.embed", texts=len(texts)), track_call("cohere", "embed"):
+            response = await asyncio.wait_for(
+                co.embed(texts=texts, model=model, input_type=input_type),
+                timeout=COHERE_EMBED_TIMEOUT
+            )
+
+    return response.embeddings
+
+
+async def rerank(query: str, documents: List[str], model: str, top_n: int) -> List[Any]:
+    """
+    Reranks documents against a query with the shared client.
+
+    Args:
+        query: The user's question
+        documents: Candidate texts
+        model: Cohere rerank model
+        top_n: How many results to return
+
+    Returns:
+        Rerank results (each has .index and .relevance_score), best first
+
+    Raises:
+        asyncio.TimeoutError: If the call takes longer than COHERE_RERANK_TIMEOUT
+        Exception: If the Cohere API call fails
+    """
+    co = get_cohere_client()
+
+    queued = time.perf_counter()
+    async with _semaphore:
+        record("cohere.queue", queued)
+        with span("cohere.rerank", documents=len(documents)), track_call("cohere", "rerank"):
+            response = await asyncio.wait_for(
+                co.rerank(query=query, documents=documents, model=model, top_n=top_n),
+                timeout=COHERE_RERANK_TIMEOUT
+            )
+
+    return response.results
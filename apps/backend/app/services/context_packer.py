@@ -0,0 +1,192 @@
+"""
+Context Packer
+
+Turns reranked chunks into the context blocks sent to the LLM, fitted to a
+token budget.
+
+What This Does:
+    1. Groups chunks by source (document or handover)
+    2. Merges chunks that are adjacent in the source (order_in_doc n, n+1, ...)
+       into one block and drops the text they share (the chunker overlaps
+       consecutive chunks by CHUNK_OVERLAP tokens)
+    3. Adds blocks in rerank order until CONTEXT_TOKEN_BUDGET is reached; a
+       merged block that does not fit is split back into its chunks, each
+       competing at its own rank (so the top chunk is never dropped because
+       lower-ranked neighbours were merged into its block)
+
+Why:
+    - Overlapping text was sent to the LLM twice for every adjacent pair
+    - Sending all reranked chunks regardless of size wastes prompt tokens
+      (latency and cost) on low-ranked context
+
+Token counts come from chunks.token_count (stored at ingest), so no
+tokenizer runs at query time. Rows ingested before that column existed
+fall back to an estimate of ~4 characters per token.
+"""
+
+from typing import Any, Dict, List, Optional
+from app.core.constants import CHUNK_OVERLAP, CONTEXT_TOKEN_BUDGET
+from app.core.tracing import traced
+
+
+# Shortest shared text treated as chunker overlap (avoids stripping coincidental matches)
+MIN_OVERLAP_CHARS = 16
+
+# How far back in the previous chunk to look for the overlap (~8 chars per token is generous)
+MAX_OVERLAP_CHARS = CHUNK_OVERLAP * 8
+
+
+def estimate_tokens(chunk: Dict[str, Any]) -> int:
+    """Returns the stored token count, or an estimate if the chunk predates it."""
+    token_count = chunk.get("token_count")
+    if token_count:
+        return token_count
+    return max(1, (len(chunk["text"]) + 3) // 4)
+
+
+def overlap_length(previous: str, following: str) -> int:
+    """
+    Returns how many characters at the start of `following` repeat the end of `previous`.
+
+    Example:
+        >>> overlap_length("Build the image. Then deploy it.", "Then deploy it. Check the pods.")
+        16
+    """
+    probe = following[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+
+    # Earliest match in the tail = longest overlap
+    position = previous.find(probe, max(0, len(previous) - MAX_OVERLAP_CHARS))
+    while position != -1:
+        if following.startswith(previous[position:]):
+            return len(previous) - position
+        position = previous.find(probe, position + 1)
+
+    return 0
+
+
+def _source_key(chunk: Dict[str, Any]) -> Optional[tuple]:
+    if chunk.get("doc_id") is not None:
+        return ("document", chunk["doc_id"])
+    if chunk.get("handover_id") is not None:
+        return ("handover", chunk["handover_id"])
+    return None
+
+
+def merge_adjacent(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merges chunks that are consecutive in the same source into blocks.
+
+    Args:
+        chunks: Reranked chunks (best first) with text, doc_id/handover_id,
+            order_in_doc and token_count
+
+    Returns:
+        Blocks ordered by their best-ranked chunk:
+            {"text": str, "tokens": int, "rank": int, "chunk_ids": [...],
+             "members": [(rank, chunk), ...]}
+    """
+    groups: Dict[Any, List[tuple]] = {}
+    blocks: List[Dict[str, Any]] = []
+
+    for rank, chunk in enumerate(chunks):
+        key = _source_key(chunk)
+        if key is None or chunk.get("order_in_doc") is None:
+            # Nothing to merge with
+            blocks.append(_single_block(rank, chunk))
+            continue
+        groups.setdefault(key, []).append((rank, chunk))
+
+    for members in groups.values():
+        members.sort(key=lambda item: item[1]["order_in_doc"])
+
+        block = None
+        previous = None
+        for rank, chunk in members:
+            tokens = estimate_tokens(chunk)
+
+            if block is not None and chunk["order_in_doc"] == previous["order_in_doc"] + 1:
+                shared = overlap_length(previous["text"], chunk["text"])
+                remainder = chunk["text"][shared:]
+                if shared == 0:
+                    block["text"] += "\n"
+                block["text"] += remainder
+                # Scale the stored count by the share of text that was kept
+                block["tokens"] += round(tokens * len(remainder) / max(1, len(chunk["text"])))
+                block["rank"] = min(block["rank"], rank)
+                block["chunk_ids"].append(chunk.get("chunk_id"))
+                block["members"].append((rank, chunk))
+            else:
+                if block is not None:
+                    blocks.append(block)
+                block = _single_block(rank, chunk)
+            previous = chunk
+
+        blocks.append(block)
+
+    blocks.sort(key=lambda b: b["rank"])
+    return blocks
+
+
+def _single_block(rank: int, chunk: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "text": chunk["text"],
+        "tokens": estimate_tokens(chunk),
+        "rank": rank,
+        "chunk_ids": [chunk.get("chunk_id")],
+        "members": [(rank, chunk)],
+    }
+
+
+@traced("context_pack")
+def pack_context(
+    chunks: List[Dict[str, Any]],
+    token_budget: int = CONTEXT_TOKEN_BUDGET
+) -> List[str]:
+    """
+    Builds the LLM context from reranked chunks within a token budget.
+
+    Blocks are added best-ranked first. A merged block that does not fit is
+    split back into its chunks, which compete at their own ranks; a single
+    chunk that does not fit is skipped so smaller, lower-ranked blocks can
+    still use the remaining budget. The chosen chunks are merged again at the
+    end. If nothing fits at all, the best block is cut to fit.
+
+    Args:
+        chunks: Reranked chunks (best first)
+        token_budget: Max context tokens
+
+    Returns:
+        Context texts for llm.call_llm() / llm.stream_llm(), best first
+
+    Example:
+        >>> pack_context([
+        ...     {"doc_id": 1, "order_in_doc": 0, "text": "A ... shared tail", "token_count": 500},
+        ...     {"doc_id": 1, "order_in_doc": 1, "text": "shared tail ... B", "token_count": 500},
+        ... ])
+        ["A ... shared tail ... B"]
+    """
+    blocks = merge_adjacent(chunks)
+
+    queue = list(blocks)
+    chosen: List[tuple] = []
+    used = 0
+    while queue:
+        block = queue.pop(0)
+        if used + block["tokens"] <= token_budget:
+            chosen.extend(block["members"])
+            used += block["tokens"]
+        elif len(block["members"]) > 1:
+            # Over budget: its chunks compete at their own ranks instead
+            singles = [_single_block(rank, chunk) for rank, chunk in block["members"]]
+            queue = sorted(queue + singles, key=lambda b: b["rank"])
+
+    if not chosen and blocks:
+        best = blocks[0]
+        keep_chars = len(best["text"]) * token_budget // max(1, best["tokens"])
+        return [best["text"][:keep_chars]]
+
+    # Re-merge (merging never adds tokens, so the budget still holds)
+    chosen.sort(key=lambda member: member[0])
+    return [block["text"] for block in merge_adjacent([chunk for _, chunk in chosen])]
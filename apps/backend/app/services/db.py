@@ -10,8 +10,21 @@ it's good practice:
 Wrapper functions for common database operations.
 """
 
-from typing import Optional, Dict, Any, List
-from app.db.client import fetch_one, get_db_pool
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Tuple, Union, AsyncIterator
+import asyncpg
+import numpy as np
+from app.db.client import fetch_one, acquire
+
+
+@asynccontextmanager
+async def _connection(conn: Optional[asyncpg.Connection]) -> AsyncIterator[asyncpg.Connection]:
+    """Uses the caller's connection (inside a transaction) or borrows one from the pool."""
+    if conn is not None:
+        yield conn
+        return
+    async with acquire() as borrowed:
+        yield borrowed
 
 
 async def fetch_document(doc_id: int) -> Optional[Dict[str, Any]]:
@@ -49,8 +62,11 @@ async def insert_document(
     project_id: Optional[str],
     visibility: str,
     uri: str,
-    language: str = "en"
-) -> int:
+    language: str = "en",
+    source_external_id: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    conn: Optional[asyncpg.Connection] = None
+) -> Optional[int]:
     """
     Inserts a new document into the database.
 
@@ -60,9 +76,13 @@ async def insert_document(
         visibility: "Public" or "Private"
         uri: Document URI (for uploads: "upload://uuid/filename")
         language: Document language (default: "en")
+        source_external_id: Unique source key (uploads: "upload:<project>:<sha256 of file>")
+        content_hash: Hash of the source content
+        conn: Connection of an open transaction (default: borrow one from the pool)
 
     Returns:
-        doc_id: The ID of the newly created document
+        doc_id: The ID of the newly created document, or None if a document
+        with the same source_external_id already exists (concurrent upload)
 
     Example:
         >>> doc_id = await insert_document(
@@ -74,24 +94,62 @@ async def insert_document(
         >>> print(doc_id)
         456
     """
-    pool = get_db_pool()
 
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            INSERT INTO documents (title, project_id, visibility, uri, language)
-            VALUES ($1, $2, $3, $4, $5)
+    async with _connection(conn) as c:
+        row = await c.fetchrow("""
+            INSERT INTO documents (title, project_id, visibility, uri, language,
+                                   source_external_id, content_hash, updated_at)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, now())
+            ON CONFLICT (source_external_id) WHERE source_external_id IS NOT NULL DO NOTHING
             RETURNING doc_id
-        """, title, project_id, visibility, uri, language)
+        """, title, project_id, visibility, uri, language, source_external_id, content_hash)
+
+    return row["doc_id"] if row else None
+
+
+async def find_document_by_source(source_external_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Looks up a document (including soft-deleted ones) by its source key.
+
+    Returns:
+        {"doc_id", "title", "visibility", "deleted_at", "chunk_count"} or None
+
+    Example:
+        >>> await find_document_by_source("upload:Atlas:9f86d0...")
+        {"doc_id": 42, "title": "runbook.pdf", "visibility": "Private", "deleted_at": None, "chunk_count": 18}
+    """
+    return await fetch_one("""
+        SELECT d.doc_id, d.title, d.visibility, d.deleted_at,
+               (SELECT count(*) FROM chunks c WHERE c.doc_id = d.doc_id) AS chunk_count
+        FROM documents d
+        WHERE d.source_external_id = $1
+    """, source_external_id)
+
 
-    return row["doc_id"]
+async def reuse_document(doc_id: int, visibility: str) -> None:
+    """
+    Makes an existing document current again for a repeated upload.
+
+    Restores it if it was soft-deleted and applies the requested visibility.
+    updated_at only changes when something did, so cached answers citing
+    the document stay valid for a plain re-upload.
+    """
+    async with acquire() as conn:
+        await conn.execute("""
+            UPDATE documents
+            SET deleted_at = NULL, visibility = $2, updated_at = now()
+            WHERE doc_id = $1
+              AND (deleted_at IS NOT NULL OR visibility IS DISTINCT FROM $2)
+        """, doc_id, visibility)
 
 
 async def insert_chunk(
     doc_id: int,
     text: str,
     heading_path: List[str],
-    embedding: List[float],
-    order_in_doc: int
+    embedding: Union[List[float], np.ndarray],
+    order_in_doc: int,
+    token_count: Optional[int] = None
 ) -> int:
     """
     Inserts a chunk into the database.
@@ -102,6 +160,7 @@ async def insert_chunk(
         heading_path: List of heading hierarchy (e.g., ["Deployment", "Steps"])
         embedding: 1024-dimensional embedding vector
         order_in_doc: Order of this chunk in the document (0-based index)
+        token_count: Tokens in the chunk text (from the chunker), used for context packing
 
     Returns:
         chunk_id: The ID of the newly created chunk
@@ -115,21 +174,296 @@ async def insert_chunk(
         ...     order_in_doc=0
         ... )
     """
-    pool = get_db_pool()
-
-    # Convert embedding list to PostgreSQL vector format
-    embedding_str = "[" + ",".join(str(x) for x in embedding) + "]"
-
-    async with pool.acquire() as conn:
+    # The vector codec (app/db/codecs.py) sends the embedding in binary
+    async with acquire() as conn:
         row = await conn.fetchrow("""
-            INSERT INTO chunks (doc_id, text, heading_path, embedding, order_in_doc)
-            VALUES ($1, $2, $3, $4::vector, $5)
+            INSERT INTO chunks (doc_id, text, heading_path, embedding, order_in_doc, token_count, partition_key)
+            VALUES ($1, $2, $3, $4::vector, $5, $6, chunk_partition_key_for($1, NULL))
             RETURNING chunk_id
-        """, doc_id, text, heading_path, embedding_str, order_in_doc)
+        """, doc_id, text, heading_path, embedding, order_in_doc, token_count)
 
     return row["chunk_id"]
 
 
+async def insert_chunks_bulk(
+    doc_id: int,
+    chunks: List[Dict[str, Any]],
+    embeddings: List[Optional[Union[List[float], np.ndarray]]],
+    conn: Optional[asyncpg.Connection] = None
+) -> int:
+    """
+    Inserts all chunks of a document in one round trip (binary COPY).
+
+    What This Does:
+        - Streams every row to Postgres with COPY ... FROM STDIN (BINARY)
+          instead of one INSERT per chunk
+        - Embeddings go through the binary vector codec (app/db/codecs.py)
+        - Chunks whose embedding is None (embedding failed) are skipped;
+          order_in_doc keeps the chunk's original index
+        - COPY cannot compute partition_key per row, so the document's
+          partition (chunk_partition_key_for) is looked up once and sent with
+          every row
+
+    Why:
+        - One INSERT per chunk held a pool connection for the whole ingest
+          (hundreds of round trips), starving search with max_size=5
+        - Pass `conn` from client.transaction() to write the document row and
+          its chunks atomically
+
+    Args:
+        doc_id: Document ID the chunks belong to
+        chunks: Chunker output (text, heading_path, token_count)
+        embeddings: embeddings[i] is the vector for chunks[i], or None to skip it
+        conn: Connection of an open transaction (default: borrow one from the pool)
+
+    Returns:
+        Number of chunks inserted
+
+    Example:
+        >>> async with transaction() as conn:
+        ...     doc_id = await insert_document(..., conn=conn)
+        ...     inserted = await insert_chunks_bulk(doc_id, chunks, embeddings, conn=conn)
+    """
+    records = [
+        (doc_id, chunk["text"], chunk["heading_path"], embeddings[idx], idx, chunk.get("token_count"))
+        for idx, chunk in enumerate(chunks)
+        if embeddings[idx] is not None
+    ]
+    if not records:
+        return 0
+
+    async with _connection(conn) as c:
+        partition_key = await c.fetchval("SELECT chunk_partition_key_for($1, NULL)", doc_id)
+        await c.copy_records_to_table(
+            "chunks",
+            records=[record + (partition_key,) for record in records],
+            columns=["doc_id", "text", "heading_path", "embedding", "order_in_doc", "token_count", "partition_key"],
+        )
+
+    return len(records)
+
+
+# ============================================================================
+# Ingestion Job Operations
+# ============================================================================
+
+async def create_ingest_job(
+    filename: str,
+    project_id: Optional[str],
+    visibility: str,
+    uploaded_by: str,
+    source_external_id: str,
+    content_hash: str,
+    file_path: str
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Queues an upload for background ingestion.
+
+    If the same file is already queued or running for this project, no new
+    job is created and the active one is returned.
+
+    Returns:
+        (job, created): the job row, and False if an active job was reused
+    """
+    async with acquire() as conn:
+        row = await conn.fetchrow("""
+            INSERT INTO ingest_jobs (filename, project_id, visibility, uploaded_by,
+                                     source_external_id, content_hash, file_path)
+            VALUES ($1, $2, $3, $4, $5, $6, $7)
+            ON CONFLICT (source_external_id) WHERE status IN ('queued', 'running') DO NOTHING
+            RETURNING *
+        """, filename, project_id, visibility, uploaded_by, source_external_id, content_hash, file_path)
+        if row:
+            return dict(row), True
+
+        row = await conn.fetchrow("""
+            SELECT * FROM ingest_jobs
+            WHERE source_external_id = $1 AND status IN ('queued', 'running')
+        """, source_external_id)
+
+    if row is None:
+        # The active job finished between the two statements; queue a new one
+        return await create_ingest_job(
+            filename, project_id, visibility, uploaded_by, source_external_id, content_hash, file_path
+        )
+    return dict(row), False
+
+
+async def claim_ingest_job(lease_seconds: float) -> Optional[Dict[str, Any]]:
+    """
+    Claims the oldest queued job (or a running job whose worker stopped
+    sending heartbeats) for this worker.
+
+    FOR UPDATE SKIP LOCKED lets any number of workers poll the same table
+    without claiming the same job or waiting on each other.
+
+    Returns:
+        The claimed job (status 'running', attempts incremented), or None
+    """
+    async with acquire() as conn:
+        row = await conn.fetchrow("""
+            UPDATE ingest_jobs
+            SET status = 'running',
+                stage = 'extracting',
+                attempts = attempts + 1,
+                started_at = now(),
+                heartbeat_at = now()
+            WHERE job_id = (
+                SELECT job_id FROM ingest_jobs
+                WHERE status = 'queued'
+                   OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => $1))
+                ORDER BY job_id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING *
+        """, float(lease_seconds))
+
+    return dict(row) if row else None
+
+
+async def update_ingest_job_progress(
+    job_id: int,
+    stage: str,
+    chunks_done: Optional[int] = None,
+    chunks_total: Optional[int] = None
+) -> None:
+    """Records the job's current stage and chunk counts (and renews its lease)."""
+    async with acquire() as conn:
+        await conn.execute("""
+            UPDATE ingest_jobs
+            SET stage = $2,
+                chunks_done = COALESCE($3, chunks_done),
+                chunks_total = COALESCE($4, chunks_total),
+                heartbeat_at = now()
+            WHERE job_id = $1
+        """, job_id, stage, chunks_done, chunks_total)
+
+
+async def finish_ingest_job(
+    job_id: int,
+    status: str,
+    doc_id: Optional[int] = None,
+    errors: Optional[List[str]] = None
+) -> None:
+    """
+    Marks a job 'succeeded' or 'failed'.
+
+    Args:
+        job_id: Job to finish
+        status: "succeeded" or "failed"
+        doc_id: Document created (or reused) by the job
+        errors: Per-chunk errors (succeeded) or the failure reason (failed)
+    """
+    async with acquire() as conn:
+        await conn.execute("""
+            UPDATE ingest_jobs
+            SET status = $2,
+                stage = CASE WHEN $2 = 'succeeded' THEN 'done' ELSE stage END,
+                doc_id = COALESCE($3, doc_id),
+                errors = errors || $4::text[],
+                file_path = NULL,
+                finished_at = now()
+            WHERE job_id = $1
+        """, job_id, status, doc_id, errors or [])
+
+
+async def fetch_ingest_job(job_id: int) -> Optional[Dict[str, Any]]:
+    """Returns a job row by id, or None."""
+    return await fetch_one("SELECT * FROM ingest_jobs WHERE job_id = $1", job_id)
+
+
+# ============================================================================
+# Embedding Cache Operations
+# ============================================================================
+
+async def fetch_cached_embeddings(content_hashes: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Looks up stored embeddings by content hash in a single query.
+
+    Args:
+        content_hashes: Keys from embeddings.embedding_cache_key()
+
+    Returns:
+        {content_hash: embedding (float32 array)} for the hashes that were found
+    """
+    if not content_hashes:
+        return {}
+
+    async with acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT content_hash, embedding
+            FROM embedding_cache
+            WHERE content_hash = ANY($1)
+        """, content_hashes)
+
+    return {row["content_hash"]: row["embedding"] for row in rows}
+
+
+async def store_cached_embeddings(
+    entries: List[Tuple[str, Union[List[float], np.ndarray]]],
+    model: str,
+    input_type: str
+) -> None:
+    """
+    Saves freshly computed embeddings so identical text is never re-embedded.
+
+    Args:
+        entries: [(content_hash, embedding), ...]
+        model: Embedding model used
+        input_type: Cohere input_type used
+    """
+    if not entries:
+        return
+
+    async with acquire() as conn:
+        await conn.executemany("""
+            INSERT INTO embedding_cache (content_hash, model, input_type, embedding)
+            VALUES ($1, $2, $3, $4::vector)
+            ON CONFLICT (content_hash) DO NOTHING
+        """, [
+            (content_hash, model, input_type, embedding)
+            for content_hash, embedding in entries
+        ])
+
+
+# ============================================================================
+# Answer Cache Operations
+# ============================================================================
+
+async def fetch_source_versions(
+    doc_ids: List[int],
+    handover_ids: List[int]
+) -> Dict[Tuple[str, int], str]:
+    """
+    Returns a version string for each cited document and handover.
+
+    A document's version changes when updated_at, content_hash or deleted_at
+    changes. Handovers have no updated_at, so the whole row is hashed (any
+    status or content edit changes it). Sources that no longer exist are
+    missing from the result.
+
+    Returns:
+        {("document", doc_id): version, ("handover", handover_id): version}
+    """
+    if not doc_ids and not handover_ids:
+        return {}
+
+    async with acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT 'document' AS source_type, doc_id AS source_id,
+                   md5(row(updated_at, content_hash, deleted_at)::text) AS version
+            FROM documents
+            WHERE doc_id = ANY($1::bigint[])
+            UNION ALL
+            SELECT 'handover', handover_id, md5(row_to_json(h)::text)
+            FROM handovers h
+            WHERE handover_id = ANY($2::bigint[])
+        """, doc_ids, handover_ids)
+
+    return {(row["source_type"], row["source_id"]): row["version"] for row in rows}
+
+
 # ============================================================================
 # Handover Database Operations
 # ============================================================================
@@ -166,30 +500,49 @@ async def create_handover(
     Returns:
         handover_id: The ID of the newly created handover
     """
-    import json
-    pool = get_db_pool()
-
-    async with pool.acquire() as conn:
+    # JSONB parameters are encoded by the driver (app/db/codecs.py)
+    async with acquire() as conn:
         row = await conn.fetchrow("""
             INSERT INTO handovers (
                 from_employee_id, to_employee_id, title, project_id,
                 context, current_status, next_steps, resources, contacts,
                 additional_notes, cc_employee_ids, status
             )
-            VALUES ($1, $2, $3, $4, $5, $6, $7::jsonb, $8::jsonb, $9::jsonb, $10, $11, 'pending')
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, 'pending')
             RETURNING handover_id
         """,
             from_employee_id, to_employee_id, title, project_id,
             context, current_status,
-            json.dumps(next_steps) if next_steps else None,
-            json.dumps(resources) if resources else None,
-            json.dumps(contacts) if contacts else None,
+            next_steps or None,
+            resources or None,
+            contacts or None,
             additional_notes, cc_employee_ids
         )
 
     return row["handover_id"]
 
 
+async def fetch_visible_handover_ids(user_id: str) -> List[int]:
+    """
+    Returns the ids of handovers the user can see in search results
+    (sender, recipient or CC'd), sorted.
+
+    Same visibility rule as the handover branch of retrieval.run_vector_search().
+    """
+
+    async with acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT handover_id
+            FROM handovers
+            WHERE from_employee_id = $1
+               OR to_employee_id = $1
+               OR $1 = ANY(cc_employee_ids)
+            ORDER BY handover_id
+        """, user_id)
+
+    return [row["handover_id"] for row in rows]
+
+
 async def get_user_handovers(user_id: str) -> Dict[str, List[Dict[str, Any]]]:
     """
     Gets all handovers for a user (received + sent).
@@ -203,9 +556,8 @@ async def get_user_handovers(user_id: str) -> Dict[str, List[Dict[str, Any]]]:
             "sent": [...]
         }
     """
-    pool = get_db_pool()
 
-    async with pool.acquire() as conn:
+    async with acquire() as conn:
         # Received handovers (where user is recipient or CC'd)
         received_rows = await conn.fetch("""
             SELECT
@@ -262,20 +614,10 @@ async def get_user_handovers(user_id: str) -> Dict[str, List[Dict[str, Any]]]:
             ORDER BY h.created_at DESC
         """, user_id)
 
-    import json
-
-    def parse_handover_row(row):
-        """Parse JSONB fields from database row"""
-        d = dict(row)
-        # Parse JSONB fields if they're strings
-        for field in ['next_steps', 'resources', 'contacts']:
-            if d.get(field) and isinstance(d[field], str):
-                d[field] = json.loads(d[field])
-        return d
-
+    # JSONB fields are already decoded by the driver (app/db/codecs.py)
     return {
-        "received": [parse_handover_row(row) for row in received_rows],
-        "sent": [parse_handover_row(row) for row in sent_rows]
+        "received": [dict(row) for row in received_rows],
+        "sent": [dict(row) for row in sent_rows]
     }
 
 
@@ -290,9 +632,8 @@ async def get_handover_by_id(handover_id: int, user_id: str) -> Optional[Dict[st
     Returns:
         Handover dict or None if not found or user doesn't have access
     """
-    pool = get_db_pool()
 
-    async with pool.acquire() as conn:
+    async with acquire() as conn:
         row = await conn.fetchrow("""
             SELECT
                 h.handover_id,
@@ -331,15 +672,8 @@ async def get_handover_by_id(handover_id: int, user_id: str) -> Optional[Dict[st
     if not row:
         return None
 
-    import json
-    d = dict(row)
-
-    # Parse JSONB fields if they're strings
-    for field in ['next_steps', 'resources', 'contacts']:
-        if d.get(field) and isinstance(d[field], str):
-            d[field] = json.loads(d[field])
-
-    return d
+    # JSONB fields are already decoded by the driver (app/db/codecs.py)
+    return dict(row)
 
 
 async def update_handover_status(
@@ -358,9 +692,8 @@ async def update_handover_status(
     Returns:
         True if updated, False if not found or unauthorized
     """
-    pool = get_db_pool()
 
-    async with pool.acquire() as conn:
+    async with acquire() as conn:
         # Only recipient can acknowledge/complete
         if status == "acknowledged":
             result = await conn.execute("""
@@ -391,9 +724,8 @@ async def delete_handover(handover_id: int, user_id: str) -> bool:
     Returns:
         True if deleted, False if not found or unauthorized
     """
-    pool = get_db_pool()
 
-    async with pool.acquire() as conn:
+    async with acquire() as conn:
         result = await conn.execute("""
             DELETE FROM handovers
             WHERE handover_id = $1 AND from_employee_id = $2
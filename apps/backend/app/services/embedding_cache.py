@@ -0,0 +1,112 @@
+"""
+Query Embedding Cache
+
+In-process LRU + TTL cache for query embeddings, so repeated questions
+skip the Cohere round trip.
+"""
+
+import re
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.core.constants import QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Canonicalizes a query so trivial variations share one cache entry.
+
+    Folds case, drops punctuation and collapses whitespace.
+
+    Example:
+        >>> normalize_query("  How do I deploy   Atlas?? ")
+        "how do i deploy atlas"
+    """
+    text = _PUNCTUATION.sub(" ", text.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of embeddings with a time-to-live.
+
+    Keys are (model, input_type, normalized query). Vectors are stored as
+    float32 arrays (4 KB per 1024-dim vector instead of ~32 KB as a list of
+    Python floats); pgvector stores float32 anyway, so no precision that
+    reaches the database is lost.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, array]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _key(self, model: str, input_type: str, text: str) -> Tuple[str, str, str]:
+        return (model, input_type, normalize_query(text))
+
+    def get(self, model: str, input_type: str, text: str) -> Optional[List[float]]:
+        """Returns the cached vector, or None on a miss or expired entry."""
+        key = self._key(model, input_type, text)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, vector = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        # Mark as most recently used
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector.tolist()
+
+    def put(self, model: str, input_type: str, text: str, vector: List[float]) -> None:
+        """Stores a vector, evicting the least recently used entries if full."""
+        key = self._key(model, input_type, text)
+        self._entries[key] = (time.monotonic(), array("f", vector))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drops all entries (counters are kept)."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns cache counters.
+
+        Example:
+            {"size": 120, "hits": 900, "misses": 300, "evictions": 0,
+             "expirations": 12, "hit_rate": 0.75}
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Process-wide cache used by embeddings.embed_query()
+query_cache = QueryEmbeddingCache()
@@ -6,57 +6,74 @@ This module handles converting text into vector embeddings using Cohere.
 Embeddings are numerical representations of text that capture semantic meaning.
 """
 
-from typing import List
-import os
-import cohere
-from app.core.constants import EMBEDDING_MODEL, EMBEDDING_DIM
+from typing import List, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+from app.services import cohere_client, db
+from app.services.embedding_cache import query_cache
+from app.core.tracing import traced
+from app.core.constants import (
+    EMBEDDING_MODEL,
+    EMBEDDING_DIM,
+    EMBED_BATCH_SIZE,
+    EMBED_MAX_CONCURRENT_BATCHES,
+    EMBED_MAX_RETRIES,
+)
 
 #from dotenv import load_dotenv  #for load env. variables
 #load_dotenv()
 
 
-def embed_query(text: str) -> List[float]:
+def embedding_cache_key(model: str, input_type: str, text: str) -> str:
+    """
+    Content address of an embedding in the embedding_cache table.
+
+    Must match workers/lib/embeddings.embedding_cache_key().
+    """
+    return hashlib.sha256(f"{model}\n{input_type}\n{text}".encode("utf-8")).hexdigest()
+
+
+@traced("embed")
+async def embed_query(text: str) -> List[float]:
     
      # 1. Validates the input text is not empty
     if not text or not text.strip():
         raise ValueError("Query text cannot be empty or None.")
-    
-    
-    # 2. Gets the Cohere API key from environment variables
-    api_key = os.getenv("COHERE_API_KEY")
-    if not api_key:
-        raise ValueError("Cohere API key not found in environment variables.")
+
+    # 2. Repeated questions are served from the in-process cache (no network)
+    cached = query_cache.get(EMBEDDING_MODEL, "search_query", text)
+    if cached is not None:
+        return cached
  
  
-    """ 3. Calls Cohere's embed API with:
+    """ 3. Calls Cohere's embed API (shared async client) with:
             - model: "embed-english-v3.0" (1024 dimensions)
             - input_type: "search_query" (optimized for queries, not documents)
             - texts: [text] (API accepts a list, we send one item)
     """
-    # 3. Calls Cohere client
-    client = cohere.Client(api_key)
-    
     try:
         # 3.1. Call Cohere Embeddings API
-        response = client.embed(
+        vectors = await cohere_client.embed(
             texts=[text],
             model=EMBEDDING_MODEL,
             input_type="search_query"
         )
         # 4. Extracts the embedding vector from the response
-        embedding = response.embeddings[0]
+        embedding = vectors[0]
 
         # 5. Ensure embedding has correct dimensions
         if len(embedding) != EMBEDDING_DIM:
             raise ValueError(f"Unexpected embedding size: {len(embedding)}, expected {EMBEDDING_DIM}")
 
+        query_cache.put(EMBEDDING_MODEL, "search_query", text, embedding)
         return embedding
 
     except Exception as e:
         raise Exception(f"Failed to get embedding from Cohere API: {e}")
 
 
-def embed_document(text: str) -> List[float]:
+async def embed_document(text: str) -> List[float]:
     """
     Converts document text into a 1024-dimensional vector embedding.
 
@@ -76,32 +93,117 @@ def embed_document(text: str) -> List[float]:
     if not text or not text.strip():
         raise ValueError("Document text cannot be empty or None.")
 
-    # 2. Get API key
-    api_key = os.getenv("COHERE_API_KEY")
-    if not api_key:
-        raise ValueError("Cohere API key not found in environment variables.")
+    # 2. Go through the batched path so the embedding store is consulted too
+    vectors, errors = await embed_documents([text])
+    if errors:
+        raise Exception(errors[0])
 
-    # 3. Call Cohere client
-    client = cohere.Client(api_key)
+    return vectors[0]
 
-    try:
-        # Note: input_type="search_document" for indexing (different from queries)
-        response = client.embed(
-            texts=[text],
-            model=EMBEDDING_MODEL,
-            input_type="search_document"
-        )
 
-        embedding = response.embeddings[0]
+async def embed_documents(texts: List[str]) -> Tuple[List[Optional[List[float]]], Dict[int, str]]:
+    """
+    Embeds many document chunks using batched, concurrent Cohere requests.
 
-        # 4. Validate dimensions
-        if len(embedding) != EMBEDDING_DIM:
-            raise ValueError(f"Unexpected embedding size: {len(embedding)}, expected {EMBEDDING_DIM}")
+    Texts are sent EMBED_BATCH_SIZE at a time, with at most
+    EMBED_MAX_CONCURRENT_BATCHES requests in flight. Each batch first looks up
+    the embedding_cache table (one `= ANY` query) and only sends the misses to
+    Cohere. A failed batch is retried with backoff; if it still fails, only
+    the chunks in that batch are reported.
 
-        return embedding
+    Args:
+        texts (List[str]): Document chunk texts, in document order
 
-    except Exception as e:
-        raise Exception(f"Failed to embed document: {e}")
+    Returns:
+        (embeddings, errors):
+            embeddings[i] is the 1024-dim vector for texts[i], or None if it failed
+            errors maps a failed chunk index to its error message
+
+    Example:
+        >>> vectors, errors = await embed_documents(["chunk one", "chunk two"])
+        >>> len(vectors)
+        2
+        >>> errors
+        {}
+    """
+    embeddings: List[Optional[List[float]]] = [None] * len(texts)
+    errors: Dict[int, str] = {}
+
+    # 1. Skip empty texts up front (Cohere rejects them and would fail the whole batch)
+    indices = []
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            errors[i] = "Document text cannot be empty or None."
+        else:
+            indices.append(i)
+
+    if not indices:
+        return embeddings, errors
+
+    semaphore = asyncio.Semaphore(EMBED_MAX_CONCURRENT_BATCHES)
+
+    async def embed_batch(batch: List[int]) -> None:
+        hashes = {i: embedding_cache_key(EMBEDDING_MODEL, "search_document", texts[i]) for i in batch}
+
+        async with semaphore:
+            # Reuse vectors for text that was embedded before (best effort)
+            try:
+                stored = await db.fetch_cached_embeddings(list(set(hashes.values())))
+            except Exception as e:
+                logging.warning(f"Embedding cache lookup failed: {e}")
+                stored = {}
+
+            misses = []
+            for i in batch:
+                if hashes[i] in stored:
+                    embeddings[i] = stored[hashes[i]]
+                else:
+                    misses.append(i)
+
+            if not misses:
+                return
+
+            miss_texts = [texts[i] for i in misses]
+            last_error = None
+
+            for attempt in range(EMBED_MAX_RETRIES):
+                try:
+                    vectors = await cohere_client.embed(
+                        texts=miss_texts,
+                        model=EMBEDDING_MODEL,
+                        input_type="search_document"
+                    )
+
+                    if len(vectors) != len(misses):
+                        raise ValueError(f"Expected {len(misses)} embeddings, got {len(vectors)}")
+
+                    fresh = []
+                    for i, vector in zip(misses, vectors):
+                        if len(vector) != EMBEDDING_DIM:
+                            errors[i] = f"Unexpected embedding size: {len(vector)}, expected {EMBEDDING_DIM}"
+                        else:
+                            embeddings[i] = vector
+                            fresh.append((hashes[i], vector))
+
+                    try:
+                        await db.store_cached_embeddings(fresh, EMBEDDING_MODEL, "search_document")
+                    except Exception as e:
+                        logging.warning(f"Embedding cache write failed: {e}")
+                    return
+
+                except Exception as e:
+                    last_error = e
+                    if attempt < EMBED_MAX_RETRIES - 1:
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+
+        for i in misses:
+            errors[i] = f"Failed to embed document: {last_error}"
+
+    # 2. Split into batches and run them concurrently (results land by index, so order is kept)
+    batches = [indices[i:i + EMBED_BATCH_SIZE] for i in range(0, len(indices), EMBED_BATCH_SIZE)]
+    await asyncio.gather(*(embed_batch(batch) for batch in batches))
+
+    return embeddings, errors
 
 
 #just for check after
@@ -178,7 +280,7 @@ def embed_document(text: str) -> List[float]:
           → API accepts multiple texts, we only send one
 
     Dependencies:
-        - cohere Python library: pip install cohere
+        - Shared async client from app.services.cohere_client
         - Environment variable: COHERE_API_KEY
 
     API Documentation:
@@ -5,59 +5,109 @@ Extracts text from PDF and DOCX files and converts to Markdown format.
 """
 
 import io
-from typing import Tuple, List, Dict, Any
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Tuple, List, Dict, Any, Iterator, Optional, Union
 
 
-def extract_pdf_to_markdown(file_bytes: bytes) -> Tuple[str, List[Dict[str, Any]]]:
+def _pdf_reader(source: Union[bytes, str]):
+    try:
+        import PyPDF2
+    except ImportError:
+        raise ImportError("PyPDF2 not installed. Run: pip install PyPDF2")
+
+    if isinstance(source, str):
+        # Memory-map the file: pages are paged in by the OS as PyPDF2 reads them
+        # (PyPDF2 given a path would read the whole file into a BytesIO)
+        with open(source, "rb") as f:
+            return PyPDF2.PdfReader(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    return PyPDF2.PdfReader(io.BytesIO(source))
+
+
+def count_pdf_pages(source: Union[bytes, str]) -> int:
+    """Returns the number of pages in a PDF (bytes or file path)."""
+    return len(_pdf_reader(source).pages)
+
+
+def extract_pdf_pages(
+    source: Union[bytes, str],
+    first: int = 1,
+    last: Optional[int] = None
+) -> List[Tuple[int, str]]:
     """
-    Extracts text from PDF and converts to Markdown.
+    Extracts the text of pages first..last (1-based, inclusive; last=None: to the end).
 
-    Args:
-        file_bytes: PDF file content as bytes
+    Used by app/services/offload.py to extract page batches of one PDF in
+    parallel worker processes.
 
     Returns:
-        (markdown_text, sections) where sections contain heading_path
+        [(page_num, text), ...] for the pages that contain text
+    """
+    reader = _pdf_reader(source)
+    pages = []
+    last = len(reader.pages) if last is None else min(last, len(reader.pages))
+    for page_num in range(first, last + 1):
+        text = reader.pages[page_num - 1].extract_text() or ""
+        if text.strip():
+            pages.append((page_num, text.strip()))
+    return pages
 
-    For MVP: Simple text extraction, no advanced layout parsing
+
+def pdf_pages_to_markdown(pages: List[Tuple[int, str]]) -> Tuple[str, List[Dict[str, Any]]]:
     """
-    try:
-        import PyPDF2
-    except ImportError:
-        raise ImportError("PyPDF2 not installed. Run: pip install PyPDF2")
+    Builds Markdown with one "## Page N" section per page.
 
-    # Read PDF
-    pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+    Args:
+        pages: [(page_num, text), ...] in page order
 
+    Returns:
+        (markdown_text, sections)
+    """
     markdown_lines = []
     sections = []
 
-    # Extract text from each page
-    for page_num, page in enumerate(pdf_reader.pages, start=1):
-        text = page.extract_text()
-        if text.strip():
-            # Add page heading
-            page_heading = f"Page {page_num}"
-            markdown_lines.append(f"## {page_heading}")
-            markdown_lines.append("")
-            markdown_lines.append(text.strip())
-            markdown_lines.append("")
+    for page_num, text in pages:
+        # Add page heading
+        page_heading = f"Page {page_num}"
+        markdown_lines.append(f"## {page_heading}")
+        markdown_lines.append("")
+        markdown_lines.append(text)
+        markdown_lines.append("")
 
-            # Add to sections
-            sections.append({
-                "heading_path": [page_heading],
-                "text": text.strip()
-            })
+        # Add to sections
+        sections.append({
+            "heading_path": [page_heading],
+            "text": text
+        })
 
     markdown_text = "\n".join(markdown_lines).strip()
     return markdown_text, sections
 
 
-def extract_docx_to_markdown(file_bytes: bytes) -> Tuple[str, List[Dict[str, Any]]]:
+def extract_pdf_to_markdown(file_bytes: bytes) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Extracts text from PDF and converts to Markdown.
+
+    Args:
+        file_bytes: PDF file content as bytes
+
+    Returns:
+        (markdown_text, sections) where sections contain heading_path
+
+    For MVP: Simple text extraction, no advanced layout parsing
+    (For large files, offload.extract_document() extracts page batches in parallel)
+    """
+    return pdf_pages_to_markdown(extract_pdf_pages(file_bytes))
+
+
+def extract_docx_to_markdown(file_bytes: Union[bytes, str]) -> Tuple[str, List[Dict[str, Any]]]:
     """
     Extracts text from DOCX and converts to Markdown.
 
     Args:
-        file_bytes: DOCX file content as bytes
+        file_bytes: DOCX file content as bytes, or a file path (the archive is
+            then read member by member from disk)
 
     Returns:
         (markdown_text, sections) where sections contain heading_path
@@ -70,7 +120,7 @@ def extract_docx_to_markdown(file_bytes: bytes) -> Tuple[str, List[Dict[str, Any
         raise ImportError("python-docx not installed. Run: pip install python-docx")
 
     # Read DOCX
-    doc = Document(io.BytesIO(file_bytes))
+    doc = Document(file_bytes if isinstance(file_bytes, str) else io.BytesIO(file_bytes))
 
     markdown_lines = []
     sections = []
@@ -168,4 +218,41 @@ def extract_text_from_file(file_bytes: bytes, filename: str) -> Tuple[str, List[
         }]
         return text, sections
     else:
-        raise ValueError(f"Unsupported file type: {filename}. Supported: PDF, DOCX, TXT, MD")
\ No newline at end of file
+        raise ValueError(f"Unsupported file type: {filename}. Supported: PDF, DOCX, TXT, MD")
+
+
+@contextmanager
+def _mapped(path: str) -> Iterator[Union[mmap.mmap, bytes]]:
+    """Read-only memory map of a file (empty files cannot be mapped)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def extract_file(path: str, filename: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Same as extract_text_from_file(), reading the file from disk.
+
+    Used by worker processes (app/services/offload.py). The file is never
+    loaded into memory as a whole: PDFs are memory-mapped, DOCX archives are
+    read member by member, and text files are decoded straight from the map.
+    """
+    filename_lower = filename.lower()
+
+    if filename_lower.endswith('.pdf'):
+        return pdf_pages_to_markdown(extract_pdf_pages(path))
+    elif filename_lower.endswith('.docx'):
+        return extract_docx_to_markdown(path)
+    elif filename_lower.endswith('.txt') or filename_lower.endswith('.md'):
+        with _mapped(path) as data:
+            text = str(memoryview(data), 'utf-8', errors='ignore').strip()
+        sections = [{
+            "heading_path": ["Document"],
+            "text": text
+        }]
+        return text, sections
+    else:
+        raise ValueError(f"Unsupported file type: {filename}. Supported: PDF, DOCX, TXT, MD")
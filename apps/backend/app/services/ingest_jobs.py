@@ -0,0 +1,354 @@
+"""
+Background Ingestion Jobs
+
+Runs uploads outside the HTTP request. POST /api/upload stages the file on
+disk and queues a row in `ingest_jobs`; worker tasks claim jobs and run the
+ingest pipeline, reporting progress that GET /api/upload/jobs/{id} returns.
+
+What This Does:
+    1. stage_upload() streams the upload to UPLOAD_STAGING_DIR (bounded
+       memory, size cap, sha256 computed on the way)
+    2. enqueue_upload() inserts the job (or joins an active job for the same
+       file + project) and wakes the in-process workers
+    3. Workers claim jobs with FOR UPDATE SKIP LOCKED (db.claim_ingest_job),
+       so several workers, in this process or others, never take the same job
+    4. run_job() extracts and chunks in worker processes (app/services/offload.py),
+       embeds (progress after every window of chunks), uploads to storage and
+       writes the document + chunks in one transaction
+
+Workers:
+    - INGEST_WORKERS tasks start with the API (main.py startup)
+    - Or run them separately on the same host:
+          python -m app.services.ingest_jobs
+      and set INGEST_WORKERS=0 for the API processes
+
+Failure Handling:
+    - A failing job is marked 'failed' with the error; the staged file is deleted
+    - If a worker dies mid-job, the job's heartbeat stops and another worker
+      re-claims it after INGEST_JOB_LEASE_SECONDS (up to INGEST_JOB_MAX_ATTEMPTS)
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from app.db.client import transaction
+from app.services import db, offload
+from app.services.chunker import chunk_markdown
+from app.services.embeddings import embed_documents
+from app.services.storage import upload_path_to_storage
+from app.core.metrics import INGESTED_CHUNKS, INGESTED_DOCUMENTS
+from app.core.constants import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_MODE,
+    OFFLOAD_TIME_LIMIT_SECONDS,
+    OFFLOAD_MEMORY_LIMIT_MB,
+    UPLOAD_MAX_BYTES,
+    UPLOAD_COPY_CHUNK_BYTES,
+    INGEST_WORKERS,
+    INGEST_POLL_SECONDS,
+    INGEST_JOB_LEASE_SECONDS,
+    INGEST_JOB_MAX_ATTEMPTS,
+    INGEST_EMBED_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR") or os.path.join(tempfile.gettempdir(), "rag-uploads")
+WORKERS = int(os.getenv("INGEST_WORKERS", INGEST_WORKERS))
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", UPLOAD_MAX_BYTES))
+CHUNKING_MODE = os.getenv("CHUNK_MODE", CHUNK_MODE)
+
+_wake = asyncio.Event()
+_stop = asyncio.Event()
+_workers: List[asyncio.Task] = []
+
+
+class IngestError(Exception):
+    """A job failed for a reason worth showing to the uploader."""
+
+
+# ============================================================================
+# Queueing
+# ============================================================================
+
+class UploadTooLarge(Exception):
+    """The upload exceeded MAX_UPLOAD_BYTES."""
+
+
+def _stage_stream(source: BinaryIO, max_bytes: int) -> Tuple[str, str, int]:
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    path = os.path.join(STAGING_DIR, f"{uuid.uuid4().hex}.upload")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        source.seek(0)
+        with open(path, "wb") as out:
+            while True:
+                block = source.read(UPLOAD_COPY_CHUNK_BYTES)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+                digest.update(block)
+                out.write(block)
+    except BaseException:
+        _discard(path)
+        raise
+
+    return path, digest.hexdigest(), size
+
+
+async def stage_upload(source: BinaryIO, max_bytes: Optional[int] = None) -> Tuple[str, str, int]:
+    """
+    Streams an upload into the staging directory, hashing it on the way.
+
+    The file is copied UPLOAD_COPY_CHUNK_BYTES at a time (in a thread), so
+    memory use does not depend on the file size.
+
+    Args:
+        source: Readable binary file (UploadFile.file: Starlette's spooled temp file)
+        max_bytes: Size cap (default: MAX_UPLOAD_BYTES)
+
+    Returns:
+        (path, sha256 hex, size in bytes)
+
+    Raises:
+        UploadTooLarge: The file is bigger than max_bytes (nothing is left on disk)
+    """
+    return await asyncio.to_thread(_stage_stream, source, max_bytes or MAX_UPLOAD_BYTES)
+
+
+async def discard_staged(path: str) -> None:
+    """Deletes a staged file that will not be ingested."""
+    await asyncio.to_thread(_discard, path)
+
+
+def _discard(path: Optional[str]) -> None:
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def enqueue_upload(
+    file_path: str,
+    filename: str,
+    project_id: Optional[str],
+    visibility: str,
+    uploaded_by: str,
+    source_external_id: str,
+    content_hash: str
+) -> Dict[str, Any]:
+    """
+    Queues a staged upload and wakes the in-process workers.
+
+    If the same file is already being ingested for this project, the active
+    job is returned and the newly staged copy is deleted.
+    """
+    job, created = await db.create_ingest_job(
+        filename, project_id, visibility, uploaded_by, source_external_id, content_hash, file_path
+    )
+    if created:
+        _wake.set()
+    else:
+        await discard_staged(file_path)
+    return job
+
+
+# ============================================================================
+# Pipeline
+# ============================================================================
+
+async def run_job(job: Dict[str, Any]) -> int:
+    """
+    Runs the ingest pipeline for a claimed job.
+
+    Returns:
+        doc_id of the created (or already existing) document
+
+    Raises:
+        IngestError: Unusable file, nothing extracted, or every chunk failed
+    """
+    job_id = job["job_id"]
+    filename = job["filename"]
+
+    # --------- Step 1: Extract Text (worker processes) ---------
+    path = job["file_path"]
+    if not path or not os.path.exists(path):
+        raise IngestError("Staged file is missing")
+
+    try:
+        markdown, sections = await offload.extract_document(path, filename)
+    except ValueError as e:
+        raise IngestError(str(e))
+    except offload.OffloadTimeout:
+        raise IngestError(f"Extraction took longer than {OFFLOAD_TIME_LIMIT_SECONDS}s")
+    except MemoryError:
+        raise IngestError(f"Extraction needed more than {OFFLOAD_MEMORY_LIMIT_MB} MB of memory")
+    except Exception as e:
+        raise IngestError(f"Failed to extract text: {e}")
+
+    if not markdown.strip():
+        raise IngestError("Extracted document is empty")
+
+    # --------- Step 2: Chunk Markdown (worker process) ---------
+    await db.update_ingest_job_progress(job_id, "chunking")
+    try:
+        chunks = await offload.run_cpu(chunk_markdown, markdown, sections, CHUNK_SIZE, CHUNK_OVERLAP, CHUNKING_MODE)
+    except Exception as e:
+        raise IngestError(f"Failed to chunk document: {e}")
+
+    if not chunks:
+        raise IngestError("No chunks created from document")
+
+    # --------- Step 3: Embed Chunks (progress after each window) ---------
+    await db.update_ingest_job_progress(job_id, "embedding", chunks_done=0, chunks_total=len(chunks))
+
+    embeddings: List[Optional[List[float]]] = []
+    errors: List[str] = []
+    for start in range(0, len(chunks), INGEST_EMBED_WINDOW):
+        window = chunks[start:start + INGEST_EMBED_WINDOW]
+        vectors, window_errors = await embed_documents([chunk["text"] for chunk in window])
+        embeddings.extend(vectors)
+        errors.extend(f"Chunk {start + idx + 1}: {message}" for idx, message in sorted(window_errors.items()))
+        await db.update_ingest_job_progress(job_id, "embedding", chunks_done=start + len(window))
+
+    if len(errors) == len(chunks):
+        INGESTED_CHUNKS.labels("upload", "failed").inc(len(errors))
+        raise IngestError(f"Failed to create any chunks. Errors: {errors[:5]}")
+
+    # --------- Step 4: Upload File to Storage ---------
+    await db.update_ingest_job_progress(job_id, "uploading")
+    try:
+        # Streamed from the staged file, never loaded into memory
+        file_url = await asyncio.to_thread(
+            upload_path_to_storage,
+            file_path=path,
+            filename=filename,
+            project_id=job["project_id"]
+        )
+    except Exception as e:
+        raise IngestError(f"Failed to upload file to storage: {e}")
+
+    # --------- Step 5: Write Document and Chunks (one transaction) ---------
+    await db.update_ingest_job_progress(job_id, "writing")
+    chunks_created = 0
+    async with transaction() as conn:
+        doc_id = await db.insert_document(
+            title=filename,
+            project_id=job["project_id"],
+            visibility=job["visibility"],
+            uri=file_url,
+            language="en",
+            source_external_id=job["source_external_id"],
+            content_hash=job["content_hash"],
+            conn=conn
+        )
+        if doc_id is not None:
+            chunks_created = await db.insert_chunks_bulk(doc_id, chunks, embeddings, conn=conn)
+
+    if doc_id is None:
+        # The same file was ingested meanwhile (e.g. an earlier attempt of this job)
+        existing = await db.find_document_by_source(job["source_external_id"])
+        await db.reuse_document(existing["doc_id"], job["visibility"])
+        doc_id = existing["doc_id"]
+    else:
+        INGESTED_DOCUMENTS.labels("upload").inc()
+        INGESTED_CHUNKS.labels("upload", "ok").inc(chunks_created)
+        if errors:
+            INGESTED_CHUNKS.labels("upload", "failed").inc(len(errors))
+
+    await db.finish_ingest_job(job_id, "succeeded", doc_id=doc_id, errors=errors)
+    return doc_id
+
+
+async def process_job(job: Dict[str, Any]) -> None:
+    """Runs a claimed job and records its outcome; never raises (except cancellation)."""
+    job_id = job["job_id"]
+    try:
+        if job["attempts"] > INGEST_JOB_MAX_ATTEMPTS:
+            raise IngestError(f"Gave up after {INGEST_JOB_MAX_ATTEMPTS} attempts")
+        await run_job(job)
+    except Exception as e:
+        logger.warning(f"Ingest job {job_id} failed: {e}")
+        reason = str(e) if isinstance(e, IngestError) else f"{type(e).__name__}: {e}"
+        try:
+            await db.finish_ingest_job(job_id, "failed", errors=[reason])
+        except Exception as finish_error:
+            # Lease expiry will hand the job to another worker
+            logger.error(f"Could not mark ingest job {job_id} failed: {finish_error}")
+            return
+    await asyncio.to_thread(_discard, job.get("file_path"))
+
+
+# ============================================================================
+# Workers
+# ============================================================================
+
+async def worker_loop() -> None:
+    """Claims and processes jobs until stop_workers() is called."""
+    while not _stop.is_set():
+        try:
+            job = await db.claim_ingest_job(INGEST_JOB_LEASE_SECONDS)
+        except Exception as e:
+            logger.warning(f"Claiming ingest job failed: {e}")
+            job = None
+
+        if job is not None:
+            await process_job(job)
+            continue
+
+        # Idle: sleep until a job is queued in this process or the poll interval passes
+        _wake.clear()
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=INGEST_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_workers(count: int = WORKERS) -> None:
+    """Starts `count` worker tasks on the running event loop (called at app startup)."""
+    _stop.clear()
+    for _ in range(count):
+        _workers.append(asyncio.create_task(worker_loop()))
+    if count:
+        print(f"Ingestion workers started ({count})")
+
+
+async def stop_workers() -> None:
+    """Cancels the worker tasks; an interrupted job is re-claimed after its lease expires."""
+    _stop.set()
+    _wake.set()
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def main() -> None:
+    """Standalone worker process: python -m app.services.ingest_jobs"""
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from app.db.client import init_db_pool, close_db_pool
+    from app.services.cohere_client import init_cohere_client, close_cohere_client
+
+    load_dotenv(dotenv_path=Path(__file__).parent.parent.parent / ".env")
+    await init_db_pool()
+    await init_cohere_client()
+    try:
+        await asyncio.gather(*(worker_loop() for _ in range(max(WORKERS, 1))))
+    finally:
+        await close_cohere_client()
+        await close_db_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
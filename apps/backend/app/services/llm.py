@@ -7,16 +7,105 @@ This module handles generating answers using Groq's LLM inference API.
 We use Groq because it's fast and cost-effective for open-source models.
 """
 
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
 import os
+import time
 import groq
+from app.core.tracing import record
+from app.core.metrics import track_call
+from app.core.constants import LLM_MAX_CONCURRENCY, LLM_TIMEOUT, LLM_MAX_RETRIES, LLM_COMPACT_PROMPT
 
 
-def call_llm(query: str, context_chunks: List[str]) -> str:
-    """Generates an answer using Groq LLM based on context chunks."""
+LLM_MODEL = "openai/gpt-oss-20b"  # Better instruction-following for RAG
 
-    # Initialize Groq client
-    client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Global client (initialized on startup)
+client: Optional[groq.AsyncGroq] = None
+
+# Caps concurrent generations per worker; extra requests wait here (queue time)
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+async def init_llm_client():
+    """
+    Initializes the shared async Groq client.
+
+    What This Does:
+        1. Creates one groq.AsyncGroq client (pooled httpx connections)
+        2. Creates the semaphore that caps concurrent generations
+
+    When This Runs:
+        - Called once during app startup (in main.py)
+
+    Raises:
+        ValueError: If GROQ_API_KEY is not set
+    """
+    global client, _semaphore
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY not found in environment variables.")
+
+    client = groq.AsyncGroq(api_key=api_key, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+    _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+    print(f"LLM client initialized (max_concurrency={LLM_MAX_CONCURRENCY})")
+
+
+async def close_llm_client():
+    """
+    Closes the shared Groq client.
+
+    When This Runs:
+        - Called during app shutdown (in main.py)
+    """
+    global client
+
+    if client:
+        await client.close()
+        client = None
+        print("LLM client closed")
+
+
+def get_llm_client() -> groq.AsyncGroq:
+    """
+    Returns the shared Groq client.
+
+    Raises:
+        Exception: If client is not initialized
+    """
+    if client is None:
+        raise Exception("LLM client not initialized. Call init_llm_client() first.")
+    return client
+
+
+# Same rules as the full prompt in build_messages(), without the worked example
+# (~150 tokens instead of ~600 on every request)
+COMPACT_SYSTEM_PROMPT = """You answer questions from a company knowledge base using ONLY the provided context. Never fabricate. If the context has no answer, reply: "I don't have information about that in the knowledge base."
+
+Format: start with a 1-2 sentence answer, then a blank line, then details under **bold headings** (blank lines around each). Use numbered lists for steps, bullets (-) otherwise, and backticks for commands, paths and technical terms. Explain, don't just list."""
+
+
+def build_messages(
+    query: str,
+    context_chunks: List[str],
+    compact: bool = LLM_COMPACT_PROMPT
+) -> List[Dict[str, str]]:
+    """
+    Builds the system + user chat messages for a RAG answer.
+
+    compact=True uses COMPACT_SYSTEM_PROMPT and drops the repeated formatting
+    checklist from the user message, which saves prompt tokens on every search.
+    """
+
+    # Combine context chunks into a single string
+    context_text = "\n---\n".join(context_chunks)
+
+    if compact:
+        return [
+            {"role": "system", "content": COMPACT_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Context:\n---\n{context_text}\n---\n\nQuestion: {query}\n\nAnswer:"},
+        ]
 
     # Build system + user prompts
     system_prompt = """You are a helpful AI assistant for our company's internal knowledge base. Provide clear, detailed answers using ONLY the provided context.
@@ -78,9 +167,6 @@ Remember:
 - Use bold headings to organize information
 - Include explanations from the context"""
 
-    # Combine context chunks into a single string
-    context_text = "\n---\n".join(context_chunks)
-
     user_prompt = f"""Context:
 ---
 {context_text}
@@ -98,16 +184,116 @@ Provide a detailed, well-formatted answer following this structure:
 
 Answer:"""
 
-    # Call Groq API to generate answer
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-20b",  # Better instruction-following for RAG
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.3,  # Increased for more natural, detailed responses
-        max_tokens=2048,  # Increased to allow longer, more complete answers
-    )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+async def call_llm(
+    query: str,
+    context_chunks: List[str],
+    timings: Optional[Dict[str, float]] = None
+) -> str:
+    """
+    Generates an answer using Groq LLM based on context chunks.
+
+    Waits for a free slot (at most LLM_MAX_CONCURRENCY generations per worker),
+    then generates with a LLM_TIMEOUT deadline. Cancelling the awaiting task
+    (e.g. the HTTP client disconnected) aborts the Groq request.
+
+    Args:
+        query: The user's question
+        context_chunks: Reranked chunk texts
+        timings: Optional dict; llm_queue_ms and llm_generation_ms are written into it
+
+    Raises:
+        asyncio.TimeoutError: If generation takes longer than LLM_TIMEOUT
+    """
+    groq_client = get_llm_client()
+
+    queued = time.perf_counter()
+    async with _semaphore:
+        started = time.perf_counter()
+        record("llm.queue", queued)
+        if timings is not None:
+            timings["llm_queue_ms"] = (started - queued) * 1000
+
+        try:
+            # Call Groq API to generate answer
+            with track_call("groq", "chat"):
+                response = await asyncio.wait_for(
+                    groq_client.chat.completions.create(
+                        model=LLM_MODEL,
+                        messages=build_messages(query, context_chunks),
+                        temperature=0.3,  # Increased for more natural, detailed responses
+                        max_tokens=2048,  # Increased to allow longer, more complete answers
+                    ),
+                    timeout=LLM_TIMEOUT
+                )
+        finally:
+            record("llm.generate", started)
+            if timings is not None:
+                timings["llm_generation_ms"] = (time.perf_counter() - started) * 1000
 
     # Return generated answer
-    return response.choices[0].message.content
\ No newline at end of file
+    return response.choices[0].message.content
+
+
+async def stream_llm(
+    query: str,
+    context_chunks: List[str],
+    timings: Optional[Dict[str, float]] = None
+) -> AsyncIterator[str]:
+    """
+    Generates an answer like call_llm(), but yields it token by token.
+
+    Used by POST /api/search/stream so the first words reach the user
+    while the rest of the answer is still being generated. Holds one
+    concurrency slot for the whole stream. LLM_TIMEOUT bounds each wait on
+    Groq (opening the stream, then every next token), not the time the
+    consumer spends on what was yielded. Closing the generator (client
+    disconnected) closes the Groq stream, which aborts generation.
+
+    Example:
+        >>> async for token in stream_llm("How do I deploy?", chunks):
+        ...     print(token, end="")
+    """
+    groq_client = get_llm_client()
+
+    queued = time.perf_counter()
+    async with _semaphore:
+        started = time.perf_counter()
+        record("llm.queue", queued)
+        if timings is not None:
+            timings["llm_queue_ms"] = (started - queued) * 1000
+
+        try:
+            with track_call("groq", "chat_stream"):
+                async with asyncio.timeout(LLM_TIMEOUT):
+                    stream = await groq_client.chat.completions.create(
+                        model=LLM_MODEL,
+                        messages=build_messages(query, context_chunks),
+                        temperature=0.3,
+                        max_tokens=2048,
+                        stream=True,
+                    )
+
+                try:
+                    chunks = aiter(stream)
+                    while True:
+                        # Only the wait for Groq is timed, never a yield
+                        async with asyncio.timeout(LLM_TIMEOUT):
+                            try:
+                                chunk = await anext(chunks)
+                            except StopAsyncIteration:
+                                break
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                finally:
+                    # Releases the HTTP connection early if the consumer stops (client disconnected)
+                    await stream.close()
+        finally:
+            record("llm.generate", started)
+            if timings is not None:
+                timings["llm_generation_ms"] = (time.perf_counter() - started) * 1000
@@ -0,0 +1,208 @@
+"""
+CPU Offload Pool
+
+Runs CPU-heavy ingestion work (PDF/DOCX extraction, chunking) in a pool of
+worker processes, so a 400-page PDF never blocks the event loop that serves
+searches.
+
+What This Does:
+    1. One ProcessPoolExecutor per API process (created lazily, closed at shutdown)
+    2. run_cpu() submits a picklable function and awaits its result without
+       blocking the loop
+    3. extract_document() splits a PDF into page batches and extracts them in
+       parallel across the pool, then reassembles them in page order
+
+Limits (per job):
+    - Time: each task arms SIGALRM in its worker process, so a runaway parse
+      is interrupted there (TimeoutError), not merely abandoned
+    - Memory: every worker process runs under RLIMIT_AS, so a pathological
+      file raises MemoryError in the worker instead of OOM-killing the API
+    - Workers are recycled after OFFLOAD_MAX_TASKS_PER_CHILD tasks to return
+      fragmented memory to the OS
+
+Why Processes (not threads):
+    PyPDF2 and python-docx are pure Python; in a thread they still hold the
+    GIL and stall the event loop.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services import extraction
+from app.core.tracing import span
+from app.core.constants import (
+    OFFLOAD_WORKERS,
+    OFFLOAD_TIME_LIMIT_SECONDS,
+    OFFLOAD_MEMORY_LIMIT_MB,
+    OFFLOAD_MAX_TASKS_PER_CHILD,
+    PDF_PAGES_PER_BATCH,
+)
+
+WORKERS = int(os.getenv("OFFLOAD_WORKERS", OFFLOAD_WORKERS))
+
+# Global process pool (created on first use)
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class OffloadTimeout(TimeoutError):
+    """A task exceeded its time limit."""
+
+
+# ============================================================================
+# Worker process side
+# ============================================================================
+
+def _init_worker(memory_limit_mb: int) -> None:
+    """Runs once in every worker process: caps its address space."""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        # Not available on this platform; the time limit still applies
+        pass
+
+
+def _on_alarm(signum, frame):
+    raise OffloadTimeout("Time limit exceeded")
+
+
+def _run_limited(time_limit: float, func: Callable, args: Tuple) -> Any:
+    """Runs func(*args) in the worker, interrupted after time_limit seconds."""
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        return func(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# ============================================================================
+# Pool lifecycle
+# ============================================================================
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Returns the process pool, creating it on first use.
+
+    Uses the "spawn" start method: forking a process that runs an event loop
+    and client threads is unsafe.
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(OFFLOAD_MEMORY_LIMIT_MB,),
+            max_tasks_per_child=OFFLOAD_MAX_TASKS_PER_CHILD,
+        )
+    return _pool
+
+
+def close_process_pool() -> None:
+    """Shuts the pool down (called at app shutdown); queued tasks are cancelled."""
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def run_cpu(func: Callable, *args: Any, time_limit: float = OFFLOAD_TIME_LIMIT_SECONDS) -> Any:
+    """
+    Runs func(*args) in a worker process and awaits the result.
+
+    Args:
+        func: Module-level (picklable) function
+        *args: Picklable arguments (prefer file paths over large byte strings)
+        time_limit: Seconds before the worker interrupts the task
+
+    Raises:
+        OffloadTimeout: The task ran longer than time_limit
+        MemoryError: The task exceeded the worker memory limit
+        Exception: Whatever func raised
+
+    Example:
+        >>> chunks = await run_cpu(chunk_markdown, markdown, sections)
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        future = loop.run_in_executor(get_process_pool(), _run_limited, time_limit, func, args)
+        # Backstop in case the worker cannot be interrupted (e.g. stuck in C code)
+        return await asyncio.wait_for(future, timeout=time_limit + 5)
+    except asyncio.TimeoutError:
+        raise OffloadTimeout(f"Time limit of {time_limit:.0f}s exceeded")
+    except BrokenProcessPool:
+        # A worker died (e.g. killed by the OS); start a fresh pool for the next task
+        close_process_pool()
+        raise
+
+
+# ============================================================================
+# Extraction
+# ============================================================================
+
+def page_batches(page_count: int, batch_size: int = PDF_PAGES_PER_BATCH) -> List[Tuple[int, int]]:
+    """
+    Splits pages 1..page_count into (first, last) batches.
+
+    Example:
+        >>> page_batches(60, 25)
+        [(1, 25), (26, 50), (51, 60)]
+    """
+    return [
+        (first, min(first + batch_size - 1, page_count))
+        for first in range(1, page_count + 1, batch_size)
+    ]
+
+
+async def extract_document(
+    path: str,
+    filename: str,
+    time_limit: float = OFFLOAD_TIME_LIMIT_SECONDS
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Extracts a staged file to Markdown in worker processes.
+
+    PDFs are extracted as page batches in parallel (each worker opens the
+    file itself, so no bytes are copied between processes); the batches
+    are joined in page order. Other types run as a single task.
+
+    Args:
+        path: Path of the file on disk
+        filename: Original filename (used to detect file type)
+        time_limit: Budget for the whole extraction
+
+    Returns:
+        (markdown_text, sections), same as extraction.extract_text_from_file()
+    """
+    deadline = time.monotonic() + time_limit
+
+    def remaining() -> float:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise OffloadTimeout(f"Time limit of {time_limit:.0f}s exceeded")
+        return left
+
+    with span("extract", filename=filename):
+        if not filename.lower().endswith(".pdf"):
+            return await run_cpu(extraction.extract_file, path, filename, time_limit=remaining())
+
+        page_count = await run_cpu(extraction.count_pdf_pages, path, time_limit=remaining())
+        batch_limit = remaining()
+        batches = await asyncio.gather(*(
+            run_cpu(extraction.extract_pdf_pages, path, first, last, time_limit=batch_limit)
+            for first, last in page_batches(page_count)
+        ))
+
+    # gather() keeps submission order, so pages stay in document order
+    return extraction.pdf_pages_to_markdown([page for batch in batches for page in batch])
@@ -5,19 +5,222 @@ Retrieval Service
 
 This module handles:
 - Vector similarity search using pgvector
+- Full-text search, fused with vector search (reciprocal rank fusion)
 - Access control filtering (ACL)
-- Reranking results using Cohere
+- Reranking results using Cohere, with an adaptive candidate budget
 """
 
-from typing import List, Dict, Any
-import os
-import cohere
-from app.db.client import fetch_all
+import asyncio
+import logging
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from app.db.client import acquire, transaction
+from app.services import cohere_client
+from app.core.constants import (
+    RERANK_MODEL,
+    MAX_INITIAL_CANDIDATES,
+    FULLTEXT_CANDIDATES,
+    RRF_K,
+    RERANK_CANDIDATES,
+    RERANK_MIN_CANDIDATES,
+    RERANK_ELBOW_MIN_DEPTH,
+    RERANK_DOC_TOKENS,
+    RERANK_CHARS_PER_TOKEN,
+    HNSW_ITERATIVE_SCAN,
+    HNSW_MIN_EF_SEARCH,
+    HNSW_MAX_EF_SEARCH,
+    HNSW_MAX_SCAN_TUPLES,
+)
+from app.core.tracing import traced, span
+
+logger = logging.getLogger(__name__)
 
 #from dotenv import load_dotenv #for load env. variables
 #load_dotenv()
 
 
+# Each branch orders by the indexed distance expression and LIMITs, so the
+# planner can walk HNSW indexes instead of scanning and sorting every chunk.
+# chunks is LIST-partitioned by partition_key ('public', 'handover',
+# 'project:<id>'), each partition with its own HNSW index: filtering on
+# partition_key prunes the search to the user's partitions (Public plus their
+# projects, or the handovers partition), so a private-project search never
+# walks other projects' vectors. The rest of the ACL is checked on the chunk
+# row itself (is_deleted, principals: kept in sync by triggers), so the index
+# walk joins nothing; titles and URIs are joined for the k results only.
+# Iterative scans (set_config below) keep the walk going until k rows pass
+# the filter.
+
+PUBLIC_PARTITION_KEY = "public"
+
+# $1 = query vector, $2 = partition keys (document_partition_keys), $3 = k
+DOCUMENT_BRANCH_SQL = """
+    SELECT
+        c.chunk_id,
+        c.doc_id,
+        NULL::bigint AS handover_id,
+        d.title,
+        c.text,
+        d.uri,
+        c.heading_path,
+        c.order_in_doc,
+        c.token_count,
+        'document' AS source_type,
+        c.distance
+    FROM (
+        SELECT chunk_id, doc_id, text, heading_path, order_in_doc, token_count,
+               embedding <=> $1::vector AS distance
+        FROM chunks
+        WHERE partition_key = ANY($2::text[])
+          AND NOT is_deleted
+        ORDER BY embedding <=> $1::vector
+        LIMIT $3
+    ) c
+    JOIN documents d ON d.doc_id = c.doc_id
+"""
+
+# $1 = query vector, $2 = user id, $3 = k
+# (user must be sender, recipient, or CC'd: chunks.principals)
+HANDOVER_BRANCH_SQL = """
+    SELECT
+        c.chunk_id,
+        NULL::bigint AS doc_id,
+        c.handover_id,
+        h.title,
+        c.text,
+        'handover://' || h.handover_id AS uri,
+        c.heading_path,
+        c.order_in_doc,
+        c.token_count,
+        'handover' AS source_type,
+        c.distance
+    FROM (
+        SELECT chunk_id, handover_id, text, heading_path, order_in_doc, token_count,
+               embedding <=> $1::vector AS distance
+        FROM chunks
+        WHERE partition_key = 'handover'
+          AND principals @> ARRAY[$2::uuid]
+        ORDER BY embedding <=> $1::vector
+        LIMIT $3
+    ) c
+    JOIN handovers h ON h.handover_id = c.handover_id
+"""
+
+# Full-text search: both branches (same partitions and ACL as the vector
+# branches) in one statement, matched against chunks.text_search (generated
+# tsvector, chunks_text_search_gin) and ranked by ts_rank_cd. The query is
+# websearch_to_tsquery($1) AND websearch_to_tsquery($2): $1 carries the
+# terms, $2 extra exclusions ('-term') for the OR fallback (empty otherwise,
+# see fulltext_fallback_terms). Identifiers the parser splits
+# (ERR_4032 -> 'err' <-> '4032') stay phrases.
+# $1 = query text, $2 = exclusions, $3 = partition keys (document_partition_keys), $4 = user id, $5 = k
+FULLTEXT_SQL = """
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', $1) && websearch_to_tsquery('english', $2) AS query
+    )
+    (
+        SELECT
+            c.chunk_id,
+            c.doc_id,
+            NULL::bigint AS handover_id,
+            d.title,
+            c.text,
+            d.uri,
+            c.heading_path,
+            c.order_in_doc,
+            c.token_count,
+            'document' AS source_type,
+            c.rank
+        FROM (
+            SELECT chunk_id, doc_id, text, heading_path, order_in_doc, token_count,
+                   ts_rank_cd(text_search, q.query) AS rank
+            FROM chunks, q
+            WHERE partition_key = ANY($3::text[])
+              AND NOT is_deleted
+              AND text_search @@ q.query
+            ORDER BY rank DESC
+            LIMIT $5
+        ) c
+        JOIN documents d ON d.doc_id = c.doc_id
+    )
+    UNION ALL
+    (
+        SELECT
+            c.chunk_id,
+            NULL::bigint AS doc_id,
+            c.handover_id,
+            h.title,
+            c.text,
+            'handover://' || h.handover_id AS uri,
+            c.heading_path,
+            c.order_in_doc,
+            c.token_count,
+            'handover' AS source_type,
+            c.rank
+        FROM (
+            SELECT chunk_id, handover_id, text, heading_path, order_in_doc, token_count,
+                   ts_rank_cd(text_search, q.query) AS rank
+            FROM chunks, q
+            WHERE partition_key = 'handover'
+              AND principals @> ARRAY[$4::uuid]
+              AND text_search @@ q.query
+            ORDER BY rank DESC
+            LIMIT $5
+        ) c
+        JOIN handovers h ON h.handover_id = c.handover_id
+    )
+    ORDER BY rank DESC
+    LIMIT $5
+"""
+
+# Terms of a websearch_to_tsquery query: quoted phrases (optionally negated) or words
+WEBSEARCH_TERM = re.compile(r'-?"[^"]*"?|\S+')
+
+# Transaction-local HNSW settings: $1 = iterative scan mode, $2 = ef_search, $3 = max scan tuples
+HNSW_SETTINGS_SQL = """
+    SELECT
+        set_config('hnsw.iterative_scan', $1, true),
+        set_config('hnsw.ef_search', $2, true),
+        set_config('hnsw.max_scan_tuples', $3, true)
+"""
+
+
+def document_partition_keys(user_projects: List[str]) -> List[str]:
+    """
+    chunks partitions a user's document search may read: Public plus one per
+    project (the same keys as chunk_partition_key() in the database).
+    """
+    return [PUBLIC_PARTITION_KEY] + [f"project:{project_id}" for project_id in user_projects]
+
+
+def ef_search_for(top_k: int) -> int:
+    """HNSW candidate list size for k results (pgvector caps ef_search at 1000)."""
+    return max(HNSW_MIN_EF_SEARCH, min(top_k, HNSW_MAX_EF_SEARCH))
+
+
+async def _search_branches(
+    query_vector: List[float],
+    user_projects: List[str],
+    user_id: str,
+    top_k: int
+) -> List[Dict[str, Any]]:
+    """
+    Runs both index-ordered branches on one connection: the HNSW settings are
+    set once for the transaction, then documents and handovers are queried
+    one after the other (each is a short index walk, so one pool connection
+    per search is enough).
+    """
+    async with transaction() as conn:
+        await conn.execute(
+            HNSW_SETTINGS_SQL,
+            HNSW_ITERATIVE_SCAN, str(ef_search_for(top_k)), str(HNSW_MAX_SCAN_TUPLES)
+        )
+        document_rows = await conn.fetch(DOCUMENT_BRANCH_SQL, query_vector, document_partition_keys(user_projects), top_k)
+        handover_rows = await conn.fetch(HANDOVER_BRANCH_SQL, query_vector, user_id, top_k)
+    return [dict(row) for row in document_rows] + [dict(row) for row in handover_rows]
+
+
+@traced("vector_search")
 async def run_vector_search(
     query_vector: List[float],
     user_projects: List[str],
@@ -28,90 +231,174 @@ async def run_vector_search(
     """
     Searches the database for similar chunks using vector similarity + ACL filtering.
     Includes both documents AND handovers that the user has access to.
-    Uses the connection pool for efficient database access.
+
+    Documents and handovers are searched as two queries (one after the other,
+    on one connection), each walking the HNSW indexes of its partitions in
+    distance order (documents: Public plus the user's projects; handovers:
+    the handovers partition); the two result lists are merged here by distance.
     """
 
     # 1. Validate vector dimensions
     if len(query_vector) != 1024:
         raise ValueError(f"Query vector must have 1024 dimensions, got {len(query_vector)}")
 
-    # 2. Run pgvector similarity search with ACL filter
-    # UNION results from both documents and handovers
+    # 2. Run both index-ordered branches (the query vector is sent in
+    # pgvector's binary format, see app/db/codecs.py)
     try:
-        sql = """
-        (
-            -- Search chunks from documents
-            SELECT
-                c.chunk_id,
-                c.doc_id,
-                NULL::bigint as handover_id,
-                d.title,
-                c.text,
-                d.uri,
-                c.heading_path,
-                'document' as source_type,
-                1 - (c.embedding <=> $1::vector) AS score
-            FROM chunks c
-            JOIN documents d ON d.doc_id = c.doc_id
-            WHERE d.deleted_at IS NULL
-              AND c.doc_id IS NOT NULL
-              AND (
-                d.visibility = 'Public'
-                OR d.project_id = ANY($2)
-              )
-        )
-        UNION ALL
-        (
-            -- Search chunks from handovers (user must be sender, recipient, or CC'd)
-            SELECT
-                c.chunk_id,
-                NULL::bigint as doc_id,
-                c.handover_id,
-                h.title,
-                c.text,
-                'handover://' || h.handover_id as uri,
-                c.heading_path,
-                'handover' as source_type,
-                1 - (c.embedding <=> $1::vector) AS score
-            FROM chunks c
-            JOIN handovers h ON h.handover_id = c.handover_id
-            WHERE c.handover_id IS NOT NULL
-              AND (
-                h.from_employee_id = $4
-                OR h.to_employee_id = $4
-                OR $4 = ANY(h.cc_employee_ids)
-              )
-        )
-        ORDER BY score DESC
-        LIMIT $3
-        """
-
-        # Convert Python list to PostgreSQL array format
-        # [0.1, 0.2, ...] → '[0.1,0.2,...]'
-        vector_str = '[' + ','.join(map(str, query_vector)) + ']'
-
-        rows = await fetch_all(sql, vector_str, user_projects, top_k, user_id)
-
-        # 3. Format results
-        results = []
-        for row in rows:
-            results.append({
-                "chunk_id": row["chunk_id"],
-                "doc_id": row["doc_id"],
-                "handover_id": row["handover_id"],
-                "title": row["title"],
-                "text": row["text"],
-                "uri": row["uri"],
-                "heading_path": row["heading_path"],
-                "source_type": row["source_type"],
-                "score": float(row["score"]),
-            })
-
-        return results
-
+        rows = await _search_branches(query_vector, user_projects, user_id, top_k)
     except Exception as e:
         raise Exception(f"Database query failed: {e}")
 
+    # 3. Merge by distance (relaxed_order scans may return rows slightly out of order)
+    rows = sorted(rows, key=lambda row: row["distance"])[:top_k]
+
+    # 4. Format results
+    results = []
+    for row in rows:
+        results.append({
+            "chunk_id": row["chunk_id"],
+            "doc_id": row["doc_id"],
+            "handover_id": row["handover_id"],
+            "title": row["title"],
+            "text": row["text"],
+            "uri": row["uri"],
+            "heading_path": row["heading_path"],
+            "order_in_doc": row["order_in_doc"],
+            "token_count": row["token_count"],
+            "source_type": row["source_type"],
+            "score": 1 - float(row["distance"]),
+        })
+
+    return results
+
+
+def fulltext_fallback_terms(query: str) -> Tuple[str, str]:
+    """
+    OR form of a full-text query, for when the AND query finds too little.
+
+    Returns (terms, exclusions) for FULLTEXT_SQL: the positive terms (words
+    and quoted phrases) joined with "or", and the negated terms ("-word",
+    '-"phrase"') unchanged, so they are still ANDed onto the disjunction
+    rather than becoming alternatives themselves. terms is empty when the
+    query has fewer than two positive terms (OR would match nothing new).
+    """
+    positive, negated = [], []
+    for term in WEBSEARCH_TERM.findall(query):
+        if term.startswith("-"):
+            negated.append(term)
+        elif term.lower() != "or":
+            positive.append(term)
+
+    if len(positive) < 2:
+        return "", ""
+    return " or ".join(positive), " ".join(negated)
+
+
+@traced("fulltext_search")
+async def run_fulltext_search(
+    query: str,
+    user_projects: List[str],
+    user_id: str,
+    top_k: int = FULLTEXT_CANDIDATES
+) -> List[Dict[str, Any]]:
+    """
+    Full-text search over the chunks the user may see (same ACL as
+    run_vector_search), best matches first.
+
+    Catches what embeddings miss: exact identifiers such as error codes,
+    service names and ticket keys. Results carry "text_rank" (ts_rank_cd)
+    instead of a similarity score.
+
+    Every term must match (websearch_to_tsquery semantics). If that finds
+    fewer than top_k chunks, any-term matches (fulltext_fallback_terms) fill
+    the remaining places, after all the all-term matches. Both queries run
+    on one connection.
+    """
+    partition_keys = document_partition_keys(user_projects)
+    try:
+        async with acquire() as conn:
+            rows = await conn.fetch(FULLTEXT_SQL, query, "", partition_keys, user_id, top_k)
+
+            terms, exclusions = fulltext_fallback_terms(query)
+            if len(rows) < top_k and terms:
+                found = {row["chunk_id"] for row in rows}
+                fallback_rows = await conn.fetch(FULLTEXT_SQL, terms, exclusions, partition_keys, user_id, top_k)
+                rows = rows + [row for row in fallback_rows if row["chunk_id"] not in found]
+    except Exception as e:
+        raise Exception(f"Full-text query failed: {e}")
+
+    results = []
+    for row in rows[:top_k]:
+        result = {key: value for key, value in row.items() if key != "rank"}
+        result["text_rank"] = float(row["rank"])
+        results.append(result)
+
+    return results
+
+
+def reciprocal_rank_fusion(*ranked_lists: List[Dict[str, Any]], k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Fuses ranked candidate lists into one, best first.
+
+    Each chunk scores sum(1 / (k + rank)) over the lists it appears in (rank
+    from 1), so only positions matter: cosine similarities and ts_rank_cd
+    values never have to be comparable. A chunk found by both searches beats
+    one ranked similarly by only one of them.
+
+    The copy of a chunk from the earliest list is kept (vector results keep
+    their "score"); "rrf_score" is added.
+    """
+    fused: Dict[int, Dict[str, Any]] = {}
+    for ranked in ranked_lists:
+        for rank, chunk in enumerate(ranked, start=1):
+            entry = fused.get(chunk["chunk_id"])
+            if entry is None:
+                entry = fused[chunk["chunk_id"]] = dict(chunk, rrf_score=0.0)
+            entry["rrf_score"] += 1 / (k + rank)
+
+    return sorted(fused.values(), key=lambda chunk: chunk["rrf_score"], reverse=True)
+
+
+@traced("hybrid_search")
+async def run_hybrid_search(
+    query: str,
+    query_vector: List[float],
+    user_projects: List[str],
+    user_id: str,
+    top_k: int = RERANK_CANDIDATES
+) -> List[Dict[str, Any]]:
+    """
+    Vector and full-text search run concurrently, fused with reciprocal rank
+    fusion; returns the top_k fused candidates for rerank.
+
+    Fusion puts chunks both searches agree on first and adds exact-term
+    matches the embedding missed, so fewer candidates need reranking than
+    with vector search alone.
+
+    Full-text search is best effort: if it fails, the vector candidates are
+    used on their own.
+
+    A search holds two pool connections at once (one per search, neither
+    waiting on the other), see init_db_pool.
+    """
+    vector_chunks, fulltext_chunks = await asyncio.gather(
+        run_vector_search(
+            query_vector=query_vector,
+            user_projects=user_projects,
+            user_id=user_id,
+            top_k=MAX_INITIAL_CANDIDATES
+        ),
+        run_fulltext_search(query, user_projects, user_id),
+        return_exceptions=True,
+    )
+    if isinstance(vector_chunks, BaseException):
+        raise vector_chunks
+    if isinstance(fulltext_chunks, BaseException):
+        logger.warning(f"Full-text search failed, using vector search only: {fulltext_chunks}")
+        fulltext_chunks = []
+
+    return reciprocal_rank_fusion(vector_chunks, fulltext_chunks)[:top_k]
+
 
 #ــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــ
 #ــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــ
@@ -253,36 +540,116 @@ async def run_vector_search(
 #ــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــ
 #ــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــــ
 
+def score_elbow(scores: List[float]) -> Optional[int]:
+    """
+    Index where a descending score curve bends, or None if it is close to a
+    straight line.
+
+    The elbow is the point farthest from the line joining the first and last
+    score: after a few strong matches (sharp drop, then flat tail) it is
+    where the tail starts; after a plateau of similar matches (flat, then
+    falling) it is where the plateau ends.
+    """
+    if len(scores) < 3:
+        return None
+    first, last = scores[0], scores[-1]
+    drop = first - last
+    if drop <= 0:
+        return None
+
+    depth, elbow = 0.0, None
+    for i, score in enumerate(scores):
+        distance = abs(first - drop * i / (len(scores) - 1) - score)
+        if distance > depth:
+            depth, elbow = distance, i
+
+    return elbow if depth >= RERANK_ELBOW_MIN_DEPTH * drop else None
+
+
+def choose_rerank_budget(chunks: List[Dict[str, Any]], top_k: int) -> int:
+    """
+    How many of the (best-first) candidates to send to rerank.
+
+    What This Does:
+        - Sorts the candidates' vector similarity scores and finds their
+          elbow (score_elbow): candidates below it look like the rest of the
+          tail, so reranking them rarely changes the top results
+        - Keeps every candidate down to the elbow: the budget ends just
+          after the last of them in the fused order (fusion may have moved
+          a strong vector match well down the list)
+        - Without a clear elbow (scores fall evenly) the ceiling is used
+        - Clamped to [max(RERANK_MIN_CANDIDATES, top_k), RERANK_CANDIDATES]
+
+    Full-text-only candidates have no vector score; they are kept when they
+    come before the budget's end, like any other candidate.
+    """
+    ceiling = min(len(chunks), RERANK_CANDIDATES)
+    floor = min(ceiling, max(RERANK_MIN_CANDIDATES, top_k))
+    window = chunks[:ceiling]
+
+    # Fused positions of the vector-scored candidates, best score first
+    by_score = sorted(
+        (position for position, c in enumerate(window) if c.get("score") is not None),
+        key=lambda position: window[position]["score"],
+        reverse=True
+    )
+    elbow = score_elbow([window[position]["score"] for position in by_score])
+    budget = ceiling if elbow is None else 1 + max(by_score[:elbow + 1])
+
+    return max(floor, min(budget, ceiling))
+
+
+def truncate_for_rerank(chunk: Dict[str, Any], max_tokens: int = RERANK_DOC_TOKENS) -> str:
+    """
+    Chunk text cut to about the reranker's effective window (max_tokens).
+
+    Cut by characters (RERANK_CHARS_PER_TOKEN per token) rather than tokens:
+    Cohere's tokenizer is not ours, so a token count here would be an
+    estimate anyway, and this keeps tokenizing off the event loop. Chunks
+    whose stored token_count fits are sent whole.
+    """
+    text = chunk["text"]
+    token_count = chunk.get("token_count")
+    if token_count is not None and token_count <= max_tokens:
+        return text
+    return text[:max_tokens * RERANK_CHARS_PER_TOKEN]
+
+
+@traced("rerank")
 async def rerank(chunks: List[Dict[str, Any]], query: str, top_k: int = 12) -> List[Dict[str, Any]]:
     """
     Reranks chunks using Cohere's reranker model for better relevance.
+
+    Only the first choose_rerank_budget() candidates are sent, each cut to
+    about RERANK_DOC_TOKENS tokens; the chosen budget is logged (and traced) so it
+    can be tuned against recall.
     """
     if not chunks:
         return []
 
-    api_key = os.getenv("COHERE_API_KEY")
-    if not api_key:
-        raise ValueError("Cohere API key not found in environment variables.")
-
-    client = cohere.AsyncClient(api_key)
+    # 1. Pick how many candidates are worth reranking
+    budget = choose_rerank_budget(chunks, top_k)
+    candidates = chunks[:budget]
+    logger.info(f"Rerank budget: {budget} of {len(chunks)} candidates (top_k={top_k})")
 
     try:
-        # 1. Takes the 200 candidates from vector search
-        documents = [c["text"] for c in chunks]
-
-        # 2. Calls Cohere's rerank
-        response = await client.rerank(
-            query=query,
-            documents=documents,
-            model="rerank-english-v3.0",
-            top_n=top_k
-        )
-
-        # point 3 and 4 
+        # 2. Cut each candidate to the reranker's window
+        documents = [truncate_for_rerank(c) for c in candidates]
+
+        # 3. Calls Cohere's rerank (shared async client)
+        with span("rerank.budget", candidates=len(chunks), budget=budget, top_k=top_k):
+            results = await cohere_client.rerank(
+                query=query,
+                documents=documents,
+                model=RERANK_MODEL,
+                top_n=min(top_k, budget)
+            )
+
+        # 4. Attach scores to the full (untruncated) chunks, best first
         reranked = []
-        for r in response.results:
+        for r in results:
             idx = r.index
-            chunk = chunks[idx].copy()
+            chunk = candidates[idx].copy()
             chunk["rerank_score"] = r.relevance_score
             reranked.append(chunk)
 
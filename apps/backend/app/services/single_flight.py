@@ -0,0 +1,91 @@
+"""
+Single-Flight Request Coalescing
+
+Lets concurrent callers with the same key share one execution of an async
+function. When dozens of people ask the same question within seconds (an
+incident), only the first request embeds, searches, reranks and calls the
+LLM; the others wait for its result.
+
+Cancellation:
+    - Each caller waits on asyncio.shield(task), so a caller that is
+      cancelled (client disconnected) stops waiting without aborting the
+      shared work for everyone else
+    - When the LAST caller goes away, the shared work is cancelled, so an
+      LLM call nobody will read still stops (see llm.call_llm)
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent executions by key.
+
+    Example:
+        >>> flights = SingleFlight()
+        >>> results = await asyncio.gather(
+        ...     flights.do("q", slow_search),
+        ...     flights.do("q", slow_search),
+        ... )
+        >>> # slow_search ran once; both callers got its result
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Dict[str, Any]] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def _forget(self, key: Hashable, call: Dict[str, Any]) -> None:
+        # Only remove our own call (a newer one may already use the key)
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs work() for key, or joins the execution already in flight.
+
+        Args:
+            key: Callers with equal keys share one execution
+            work: Zero-argument coroutine function (only called by the first caller)
+
+        Returns:
+            The shared result (exceptions are raised to every caller)
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = {"task": asyncio.ensure_future(work()), "waiters": 0}
+            self._calls[key] = call
+            call["task"].add_done_callback(lambda _: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        call["waiters"] += 1
+        try:
+            return await asyncio.shield(call["task"])
+        finally:
+            call["waiters"] -= 1
+            if call["waiters"] == 0 and not call["task"].done():
+                # Nobody is waiting any more; new callers start a fresh execution
+                self._forget(key, call)
+                call["task"].cancel()
+
+    def in_flight(self) -> int:
+        """Number of keys currently executing."""
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns coalescing counters.
+
+        Example:
+            {"in_flight": 1, "executions": 40, "coalesced": 25}
+        """
+        return {
+            "in_flight": self.in_flight(),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
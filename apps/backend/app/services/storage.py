@@ -5,7 +5,7 @@ Handles file uploads to Supabase Storage bucket.
 """
 
 import os
-from typing import Optional
+from typing import Callable, Optional
 try:
     from supabase import create_client, Client
 except ImportError:
@@ -72,22 +72,61 @@ def upload_file_to_storage(
         url = upload_file_to_storage(file_bytes, "report.pdf", "atlas-api")
         # Returns: "https://brczyipagixshsnqhfhq.supabase.co/storage/v1/object/public/documents/atlas-api/report.pdf"
     """
-    # Generate storage path
+    def send(method) -> None:
+        method(path=_storage_path(filename, project_id), file=file_bytes, file_options={"content-type": _get_content_type(filename)})
+
+    return _upload(send, filename, project_id)
+
+
+def upload_path_to_storage(
+    file_path: str,
+    filename: str,
+    project_id: Optional[str] = None
+) -> str:
+    """
+    Upload a file on disk to Supabase Storage and return the public URL.
+
+    The open file is streamed by the HTTP client in small blocks, so large
+    uploads never sit in memory.
+
+    Args:
+        file_path: Local file to upload (e.g. a staged upload)
+        filename: Original filename (storage name and content type)
+        project_id: Optional project ID to organize files
+
+    Returns:
+        Public URL of the uploaded file
+
+    Example:
+        url = upload_path_to_storage("/tmp/uploads/ab12", "report.pdf", "atlas-api")
+    """
+    def send(method) -> None:
+        with open(file_path, "rb") as f:
+            method(path=_storage_path(filename, project_id), file=f, file_options={"content-type": _get_content_type(filename)})
+
+    return _upload(send, filename, project_id)
+
+
+def _storage_path(filename: str, project_id: Optional[str]) -> str:
+    """Bucket path of a file: <project_id>/<filename>, or public/<filename>."""
     if project_id:
-        storage_path = f"{project_id}/{filename}"
-    else:
-        storage_path = f"public/{filename}"
+        return f"{project_id}/{filename}"
+    return f"public/{filename}"
+
+
+def _upload(send: Callable[[Callable], None], filename: str, project_id: Optional[str]) -> str:
+    """
+    Runs send() with the bucket's upload method (update if the file already
+    exists) and returns the file's public URL.
+    """
+    storage_path = _storage_path(filename, project_id)
 
     # Get Supabase client
     supabase = _get_supabase_client()
 
     # Upload to Supabase Storage
     try:
-        result = supabase.storage.from_(BUCKET_NAME).upload(
-            path=storage_path,
-            file=file_bytes,
-            file_options={"content-type": _get_content_type(filename)}
-        )
+        send(supabase.storage.from_(BUCKET_NAME).upload)
 
         # Get public URL
         public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(storage_path)
@@ -97,11 +136,7 @@ def upload_file_to_storage(
         # If file already exists, try to update it
         if "duplicate" in str(e).lower() or "already exists" in str(e).lower():
             # Update existing file
-            supabase.storage.from_(BUCKET_NAME).update(
-                path=storage_path,
-                file=file_bytes,
-                file_options={"content-type": _get_content_type(filename)}
-            )
+            send(supabase.storage.from_(BUCKET_NAME).update)
             public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(storage_path)
             return public_url
         else:
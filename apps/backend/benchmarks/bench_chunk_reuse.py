@@ -0,0 +1,166 @@
+"""
+Benchmark: chunk reuse across edits, per chunking mode
+
+Ingestion re-embeds only chunks whose text changed (unchanged text is served
+from the embedding cache). This measures, for realistic edit sequences on a
+Notion-style page, the fraction of chunks of the edited version whose text
+already existed in the previous version, and the tokens that had to be
+re-embedded.
+
+Edit sequences:
+    - insert a paragraph near the top
+    - fix a word in one sentence in the middle
+    - delete a paragraph in the middle
+    - append a section at the end
+    - 25 random edits of the kinds above, applied one after another
+
+Uses cl100k_base when tiktoken can load it (chunk_size 500); offline, falls
+back to a byte-level encoding and scales chunk_size to 2000 so chunks hold
+about as much text.
+
+Run with (from apps/backend):
+    python -m benchmarks.bench_chunk_reuse
+"""
+
+import random
+from app.services.chunker import chunk_markdown, CHUNK_MODES
+from benchmarks.bench_chunker import WORDS, load_encoding
+
+
+def make_page(rng: random.Random, section_count: int = 24):
+    """A page model: [(heading_path, [paragraph, ...]), ...]"""
+    page = []
+    for n in range(1, section_count + 1):
+        path = ["Runbook", f"Topic {n}"] if n % 4 else ["Runbook"]
+        page.append((path, [make_paragraph(rng) for _ in range(rng.randint(2, 6))]))
+    return page
+
+
+def make_paragraph(rng: random.Random) -> str:
+    sentences = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+        for _ in range(rng.randint(2, 6))
+    ]
+    return " ".join(sentences)
+
+
+def render(page):
+    """Markdown and sections, as the normalizer produces them."""
+    lines, sections = [], []
+    for path, paragraphs in page:
+        lines += ["#" * len(path) + " " + path[-1], ""]
+        for paragraph in paragraphs:
+            lines += [paragraph, ""]
+        sections.append({"heading_path": path, "text": "\n".join(paragraphs)})
+    return "\n".join(lines).strip(), sections
+
+
+# ============================================================================
+# Edits (each returns a new page)
+# ============================================================================
+
+def insert_near_top(page, rng):
+    page = [(path, list(paragraphs)) for path, paragraphs in page]
+    page[0][1].insert(1, make_paragraph(rng))
+    return page
+
+
+def fix_word(page, rng, index=None):
+    page = [(path, list(paragraphs)) for path, paragraphs in page]
+    section = page[len(page) // 2 if index is None else index][1]
+    k = rng.randrange(len(section))
+    words = section[k].split(" ")
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    section[k] = " ".join(words)
+    return page
+
+
+def delete_paragraph(page, rng, index=None):
+    page = [(path, list(paragraphs)) for path, paragraphs in page]
+    section = page[len(page) // 2 if index is None else index][1]
+    if len(section) > 1:
+        section.pop(rng.randrange(len(section)))
+    return page
+
+
+def append_section(page, rng):
+    return page + [(["Runbook", f"Topic {len(page) + 1}"], [make_paragraph(rng) for _ in range(3)])]
+
+
+def random_edit(page, rng):
+    index = rng.randrange(len(page))
+    kind = rng.choice(("insert", "fix", "delete"))
+    if kind == "fix":
+        return fix_word(page, rng, index)
+    if kind == "delete":
+        return delete_paragraph(page, rng, index)
+    page = [(path, list(paragraphs)) for path, paragraphs in page]
+    page[index][1].insert(rng.randrange(len(page[index][1]) + 1), make_paragraph(rng))
+    return page
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+def reuse(before, after, mode, chunk_size, overlap, encoding):
+    """(reused chunk fraction, re-embedded tokens, chunk count) for one edit."""
+    old = {chunk["text"] for chunk in chunk_markdown(*render(before), chunk_size, overlap, mode=mode, encoding=encoding)}
+    new = chunk_markdown(*render(after), chunk_size, overlap, mode=mode, encoding=encoding)
+    changed = [chunk for chunk in new if chunk["text"] not in old]
+    return 1 - len(changed) / len(new), sum(chunk["token_count"] for chunk in changed), len(new)
+
+
+def main():
+    encoding, encoding_label = load_encoding()
+    chunk_size = 500 if encoding_label == "cl100k_base" else 2000
+    overlap = chunk_size // 10
+    print(f"Encoding: {encoding_label}, chunk_size {chunk_size}, window overlap {overlap}\n")
+
+    scenarios = [
+        ("insert paragraph near top", insert_near_top),
+        ("fix a word mid-page", fix_word),
+        ("delete paragraph mid-page", delete_paragraph),
+        ("append section", append_section),
+    ]
+    print(f"{'edit':<28}" + "".join(f"{mode:>24}" for mode in CHUNK_MODES))
+    print(f"{'':<28}" + "".join(f"{'reused  tokens':>24}" for _ in CHUNK_MODES))
+
+    for label, edit in scenarios:
+        cells = []
+        for mode in CHUNK_MODES:
+            fractions, tokens = [], 0
+            for seed in range(10):
+                rng = random.Random(seed)
+                page = make_page(rng)
+                fraction, embedded, _ = reuse(page, edit(page, rng), mode, chunk_size, overlap, encoding)
+                fractions.append(fraction)
+                tokens += embedded
+            cells.append(f"{sum(fractions) / len(fractions):>14.1%} {tokens // 10:>9,}")
+        print(f"{label:<28}" + "".join(cells))
+
+    # Cumulative sequence: every edit is measured against the version before it
+    cells = []
+    for mode in CHUNK_MODES:
+        rng = random.Random(42)
+        page = make_page(rng)
+        fractions, tokens = [], 0
+        for _ in range(25):
+            edited = random_edit(page, rng)
+            fraction, embedded, _ = reuse(page, edited, mode, chunk_size, overlap, encoding)
+            fractions.append(fraction)
+            tokens += embedded
+            page = edited
+        cells.append(f"{sum(fractions) / len(fractions):>14.1%} {tokens // 25:>9,}")
+    print(f"{'25 random edits (avg)':<28}" + "".join(cells))
+
+    markdown, sections = render(make_page(random.Random(0)))
+    counts = [
+        len(chunk_markdown(markdown, sections, chunk_size, overlap, mode=mode, encoding=encoding))
+        for mode in CHUNK_MODES
+    ]
+    print(f"\n{'chunks per page':<28}" + "".join(f"{count:>24}" for count in counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark: chunk_markdown on 1 MB and 10 MB Markdown documents
+
+Compares the previous chunker (decode every window twice, re-encode every
+chunk, heading lookup by substring scans over all sections) with the
+offset-based chunker in app.services.chunker, and reports chunk and token
+counts for the "sections" mode (tokens = what gets embedded).
+
+The previous implementation is quadratic (chunks × sections), so it only
+runs on the 1 MB input unless --legacy-all is given.
+
+Uses cl100k_base when tiktoken can load it; offline, falls back to a
+byte-level encoding (one token per byte: ~4x more tokens than cl100k, so
+absolute times are pessimistic but the comparison still holds).
+
+Run with (from apps/backend):
+    python -m benchmarks.bench_chunker [--legacy-all]
+"""
+
+import random
+import sys
+import time
+import tiktoken
+from app.services.chunker import chunk_markdown, get_encoding
+
+WORDS = (
+    "deploy service cluster config token request latency cache index vector "
+    "query document section handover project access rollout incident metric "
+    "the a to of and in for with on is are be by this that it from as"
+).split()
+
+
+def make_document(target_bytes: int, seed: int = 7):
+    """Synthetic Markdown with headings and paragraphs, plus matching sections."""
+    rng = random.Random(seed)
+    parts, sections, size, n = [], [], 0, 0
+    while size < target_bytes:
+        n += 1
+        heading = f"Section {n}"
+        paragraphs = []
+        for _ in range(rng.randint(1, 4)):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+                for _ in range(rng.randint(2, 6))
+            ]
+            paragraphs.append(" ".join(sentences))
+        text = "\n\n".join(paragraphs)
+        block = f"## {heading}\n\n{text}\n\n"
+        parts.append(block)
+        sections.append({"heading_path": ["Guide", heading], "text": text})
+        size += len(block)
+    return "".join(parts).strip(), sections
+
+
+def load_encoding():
+    try:
+        return get_encoding(), "cl100k_base"
+    except Exception:
+        ranks = {bytes([i]): i for i in range(256)}
+        pattern = r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+        return tiktoken.Encoding("bytes", pat_str=pattern, mergeable_ranks=ranks, special_tokens={}), \
+            "byte-level fallback (cl100k_base unavailable offline)"
+
+
+def legacy_chunk_markdown(markdown, sections=None, chunk_size=500, chunk_overlap=50, encoding=None):
+    """The previous implementation, unchanged except for the injected encoding."""
+    tokens = encoding.encode(markdown)
+    total_tokens = len(tokens)
+    if total_tokens <= chunk_size:
+        return [{"text": markdown, "heading_path": sections[0]["heading_path"] if sections else [],
+                 "token_count": total_tokens, "order": 0}]
+
+    chunks, order, position = [], 0, 0
+    while position < total_tokens:
+        end_position = min(position + chunk_size, total_tokens)
+        chunk_text = encoding.decode(tokens[position:end_position])
+        SOFT_SEPS = ["\n\n", "\n", ". ", "! ", "? "]
+        window_end = min(end_position + 80, total_tokens)
+        window_text = encoding.decode(tokens[position:window_end])
+        look_back_from = max(0, len(window_text) - 150)
+        split_idx = None
+        for sep in SOFT_SEPS:
+            i = window_text.rfind(sep, look_back_from)
+            if i != -1:
+                split_idx = i + (0 if sep.startswith("\n") else len(sep))
+                break
+        if split_idx is not None:
+            chunk_text = window_text[:split_idx]
+        heading_path = []
+        if sections:
+            chunk_start_text = chunk_text[:100].strip().lower()
+            for section in sections:
+                section_text_snippet = section["text"][:100].strip().lower()
+                if section_text_snippet in chunk_text.lower() or chunk_start_text in section["text"].lower():
+                    heading_path = section["heading_path"]
+                    break
+        token_count = len(encoding.encode(chunk_text))
+        if chunk_text.strip():
+            chunks.append({"text": chunk_text, "heading_path": heading_path,
+                           "token_count": token_count, "order": order})
+        position += max(1, token_count - chunk_overlap)
+        order += 1
+    return chunks
+
+
+def tokens(chunks):
+    return sum(chunk["token_count"] for chunk in chunks)
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    legacy_all = "--legacy-all" in sys.argv
+    encoding, encoding_label = load_encoding()
+    print(f"Encoding: {encoding_label}\n")
+
+    for label, size in (("1 MB", 1_000_000), ("10 MB", 10_000_000)):
+        markdown, sections = make_document(size)
+        print(f"{label}: {len(markdown):,} chars, {len(sections):,} sections")
+
+        new_seconds, chunks = timed(lambda: chunk_markdown(markdown, sections, 500, 50, encoding=encoding))
+        print(f"  offset-based   {new_seconds:8.2f} s   {len(chunks):,} chunks   {tokens(chunks):,} tokens")
+
+        packed_seconds, packed = timed(
+            lambda: chunk_markdown(markdown, sections, 500, 50, mode="sections", encoding=encoding)
+        )
+        print(f"  sections mode  {packed_seconds:8.2f} s   {len(packed):,} chunks   {tokens(packed):,} tokens")
+
+        if size <= 1_000_000 or legacy_all:
+            old_seconds, old_chunks = timed(
+                lambda: legacy_chunk_markdown(markdown, sections, 500, 50, encoding=encoding)
+            )
+            print(f"  previous       {old_seconds:8.2f} s   {len(old_chunks):,} chunks")
+            print(f"  speedup        {old_seconds / new_seconds:8.1f}x")
+        else:
+            print("  previous       skipped (quadratic; use --legacy-all)")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Micro-benchmark: pgvector text vs binary encoding (per query)
+
+Compares the client-side cost of sending/receiving one 1024-dim embedding:
+
+    text   (before): '[' + ','.join(map(str, v)) + ']'  /  json.loads(text)
+    binary (now):    app.db.codecs.encode_vector / decode_vector
+
+Postgres also has to parse the text form on its side (float8in per element);
+that server cost disappears with the binary format but is not measured here.
+
+Run with (from apps/backend):
+    python -m benchmarks.bench_vector_codec
+"""
+
+import json
+import random
+import timeit
+import numpy as np
+from app.db.codecs import encode_vector, decode_vector
+
+DIM = 1024
+ROUNDS = 2000
+
+
+def bench(label: str, func) -> float:
+    seconds = min(timeit.repeat(func, number=ROUNDS, repeat=5)) / ROUNDS
+    print(f"  {label:<38} {seconds * 1e6:8.1f} µs")
+    return seconds
+
+
+def main():
+    vector = [random.uniform(-0.2, 0.2) for _ in range(DIM)]
+    array = np.asarray(vector, dtype=np.float32)
+
+    text = "[" + ",".join(map(str, vector)) + "]"
+    binary = encode_vector(vector)
+
+    print(f"Payload per vector: text {len(text)} bytes, binary {len(binary)} bytes\n")
+
+    print("Encode (query parameter):")
+    text_encode = bench("text: str() join", lambda: "[" + ",".join(map(str, vector)) + "]")
+    binary_encode = bench("binary: from list", lambda: encode_vector(vector))
+    bench("binary: from float32 array", lambda: encode_vector(array))
+
+    print("\nDecode (selected column):")
+    text_decode = bench("text: json.loads", lambda: json.loads(text))
+    binary_decode = bench("binary: frombuffer", lambda: decode_vector(binary))
+
+    print(f"\nSpeedup: encode {text_encode / binary_encode:.1f}x, decode {text_decode / binary_decode:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
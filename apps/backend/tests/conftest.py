@@ -44,14 +44,20 @@ async def initialize_db_pool():
     3. Closes the pool after all tests complete
     """
     from app.db.client import init_db_pool, close_db_pool
+    from app.services.cohere_client import init_cohere_client, close_cohere_client
+    from app.services.llm import init_llm_client, close_llm_client
 
-    # Setup: Initialize pool before tests
+    # Setup: Initialize pool and API clients before tests
     await init_db_pool()
+    await init_cohere_client()
+    await init_llm_client()
     print("\n✅ Test database pool initialized")
 
     # Run tests
     yield
 
-    # Teardown: Close pool after all tests
+    # Teardown: Close pool and API clients after all tests
+    await close_llm_client()
+    await close_cohere_client()
     await close_db_pool()
     print("\n✅ Test database pool closed")
\ No newline at end of file
@@ -31,7 +31,8 @@ ON CONFLICT (doc_id) DO NOTHING;
 
 -- 5. Create test chunks with embeddings
 -- Note: These are dummy 1024-dim vectors for testing
-INSERT INTO chunks (chunk_id, doc_id, heading_path, order_in_doc, text, embedding)
+-- partition_key must match the document: 'public', 'project:<id>' or 'handover'
+INSERT INTO chunks (chunk_id, doc_id, heading_path, order_in_doc, text, embedding, partition_key)
 VALUES
     (
         1,
@@ -40,7 +41,8 @@ VALUES
         1,
         'To deploy the Atlas API, first ensure all environment variables are set, then run make deploy.',
         -- Dummy embedding (1024 dimensions, all 0.1)
-        ARRAY(SELECT 0.1::real FROM generate_series(1, 1024))::vector
+        ARRAY(SELECT 0.1::real FROM generate_series(1, 1024))::vector,
+        'project:Atlas'
     ),
     (
         2,
@@ -49,9 +51,10 @@ VALUES
         1,
         'Welcome to the company! This handbook contains all the information you need to get started.',
         -- Different dummy embedding
-        ARRAY(SELECT 0.2::real FROM generate_series(1, 1024))::vector
+        ARRAY(SELECT 0.2::real FROM generate_series(1, 1024))::vector,
+        'public'
     )
-ON CONFLICT (chunk_id) DO NOTHING;
+ON CONFLICT (chunk_id, partition_key) DO NOTHING;
 
 -- 6. Create second test employee (for handover recipient)
 INSERT INTO employees (employee_id, email, display_name)
@@ -108,7 +111,7 @@ VALUES
 ON CONFLICT (handover_id) DO NOTHING;
 
 -- 8. Create test chunks for handovers (for search testing)
-INSERT INTO chunks (chunk_id, handover_id, heading_path, order_in_doc, text, embedding)
+INSERT INTO chunks (chunk_id, handover_id, heading_path, order_in_doc, text, embedding, partition_key)
 VALUES
     (
         3,
@@ -116,9 +119,10 @@ VALUES
         ARRAY['Handover', 'Atlas Project'],
         1,
         'Atlas Project Handover: Transferring Atlas project knowledge. Current status: API deployed, documentation updated. Next steps: Review deployment checklist.',
-        ARRAY(SELECT 0.15::real FROM generate_series(1, 1024))::vector
+        ARRAY(SELECT 0.15::real FROM generate_series(1, 1024))::vector,
+        'handover'
     )
-ON CONFLICT (chunk_id) DO NOTHING;
+ON CONFLICT (chunk_id, partition_key) DO NOTHING;
 
 -- Reset sequences to prevent ID conflicts
 SELECT setval('documents_doc_id_seq', (SELECT MAX(doc_id) FROM documents), true);
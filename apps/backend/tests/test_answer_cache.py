@@ -0,0 +1,131 @@
+"""
+Test semantic answer cache
+
+Run with: pytest apps/backend/tests/test_answer_cache.py -v
+"""
+
+import pytest
+from app.services import answer_cache
+from app.services.answer_cache import SemanticAnswerCache, scope_fingerprint, store_answer
+
+
+def vector(*head):
+    """1024-dim vector starting with the given values"""
+    return list(head) + [0.0] * (1024 - len(head))
+
+
+DOC_CHUNK = {"doc_id": 10, "handover_id": None}
+HANDOVER_CHUNK = {"doc_id": None, "handover_id": 7}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fresh = SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity=0.95)
+    monkeypatch.setattr(answer_cache, "answer_cache", fresh)
+    return fresh
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Current source versions returned by the (mocked) database"""
+    current = {("document", 10): "v1", ("handover", 7): "h1"}
+
+    async def fake_fetch(doc_ids, handover_ids):
+        keys = [("document", i) for i in doc_ids] + [("handover", i) for i in handover_ids]
+        return {key: current[key] for key in keys if key in current}
+
+    monkeypatch.setattr(answer_cache.db, "fetch_source_versions", fake_fetch)
+    return current
+
+
+def store(user_id, projects, query_vector, chunks, versions):
+    store_answer(
+        user_id, projects, 12, query_vector,
+        answer="Run make deploy.",
+        chunks=chunks,
+        citations=[{"doc_id": 10}],
+        used_doc_ids=[10],
+        versions=versions,
+        cost_ms=2500.0
+    )
+
+
+def test_scope_fingerprint_ignores_project_order():
+    """Same project set → same scope; adding the user narrows it"""
+    assert scope_fingerprint(["Phoenix", "Atlas"], 12) == scope_fingerprint(["Atlas", "Phoenix"], 12)
+    assert scope_fingerprint(["Atlas"], 12) != scope_fingerprint(["Atlas", "Phoenix"], 12)
+    assert scope_fingerprint(["Atlas"], 12) != scope_fingerprint(["Atlas"], 12, "user-1")
+
+
+@pytest.mark.asyncio
+async def test_paraphrase_hits_for_same_scope(cache, versions):
+    """A near-identical query embedding from another user with the same projects is a hit"""
+    # Given: An answer cached for user-1
+    store("user-1", ["Atlas"], vector(1.0, 0.1), [DOC_CHUNK], {("document", 10): "v1"})
+
+    # When: user-2 (same projects) asks a paraphrase
+    entry = await answer_cache.lookup_answer("user-2", ["Atlas"], 12, vector(1.0, 0.12))
+
+    # Then
+    assert entry is not None
+    assert entry["answer"] == "Run make deploy."
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["saved_ms"] > 0
+    print("✅ Paraphrase served from cache")
+
+
+@pytest.mark.asyncio
+async def test_dissimilar_query_or_other_scope_misses(cache, versions):
+    """Different question, or different project set, is a miss"""
+    store("user-1", ["Atlas"], vector(1.0, 0.0), [DOC_CHUNK], {("document", 10): "v1"})
+
+    assert await answer_cache.lookup_answer("user-1", ["Atlas"], 12, vector(0.0, 1.0)) is None
+    assert await answer_cache.lookup_answer("user-1", ["Atlas", "Phoenix"], 12, vector(1.0, 0.0)) is None
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_handover_answers_are_per_user(cache, versions):
+    """Answers citing a handover are not shared with other users"""
+    store("user-1", ["Atlas"], vector(1.0), [DOC_CHUNK, HANDOVER_CHUNK],
+          {("document", 10): "v1", ("handover", 7): "h1"})
+
+    assert await answer_cache.lookup_answer("user-2", ["Atlas"], 12, vector(1.0)) is None
+    assert await answer_cache.lookup_answer("user-1", ["Atlas"], 12, vector(1.0)) is not None
+
+
+@pytest.mark.asyncio
+async def test_changed_document_invalidates_entry(cache, versions):
+    """Editing or deleting a cited document drops the cached answer"""
+    store("user-1", ["Atlas"], vector(1.0), [DOC_CHUNK], {("document", 10): "v1"})
+
+    # When: The document is re-uploaded (new content_hash / updated_at)
+    versions[("document", 10)] = "v2"
+
+    # Then
+    assert await answer_cache.lookup_answer("user-1", ["Atlas"], 12, vector(1.0)) is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["size"] == 0
+
+    # Deleted rows disappear from the version lookup and invalidate too
+    store("user-1", ["Atlas"], vector(1.0), [DOC_CHUNK], {("document", 10): "v2"})
+    del versions[("document", 10)]
+    assert await answer_cache.lookup_answer("user-1", ["Atlas"], 12, vector(1.0)) is None
+
+
+def test_ttl_and_lru_bounds(monkeypatch):
+    """Expired entries are skipped and the cache never exceeds max_entries"""
+    now = [1000.0]
+    monkeypatch.setattr("app.services.answer_cache.time.monotonic", lambda: now[0])
+
+    cache = SemanticAnswerCache(max_entries=2, ttl_seconds=60, similarity=0.95)
+    for i in range(3):
+        cache.put("scope", vector(*([0.0] * i), 1.0), f"answer {i}", [], [], {}, 100.0)
+
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 1
+
+    now[0] += 61
+    assert cache.get(["scope"], vector(0.0, 0.0, 1.0)) is None
+    assert cache.stats()["size"] == 0
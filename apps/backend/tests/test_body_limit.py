@@ -0,0 +1,68 @@
+"""
+Test the upload body size limit middleware
+
+Run with: pytest apps/backend/tests/test_body_limit.py -v
+"""
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from app.core.body_limit import BodyLimitMiddleware
+from app.services import ingest_jobs
+
+
+def _client(max_bytes):
+    app = FastAPI()
+    app.add_middleware(BodyLimitMiddleware, paths=["/upload"], max_bytes=max_bytes)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+def test_declared_size_over_limit_is_rejected():
+    """Content-Length above the limit gets 413 without the route running"""
+    response = _client(1024).post("/upload", files={"file": ("a.txt", b"x" * 4096)})
+
+    assert response.status_code == 413
+    print("✅ Oversized upload rejected")
+
+
+def test_streamed_body_over_limit_is_rejected():
+    """Without Content-Length the body is counted while it streams"""
+    def body():
+        for _ in range(8):
+            yield b"x" * 1024
+
+    response = _client(2048).post(
+        "/upload", content=body(), headers={"content-type": "multipart/form-data; boundary=abc"}
+    )
+
+    assert response.status_code == 413
+
+
+def test_small_upload_and_other_paths_pass():
+    client = _client(1024)
+
+    assert client.post("/upload", files={"file": ("a.txt", b"x" * 100)}).json() == {"size": 100}
+    assert client.post("/other", files={"file": ("a.txt", b"x" * 4096)}).json() == {"size": 4096}
+
+
+def test_rejection_carries_cors_headers():
+    """The app's 413 passes through CORS, so the frontend can read it"""
+    from app.main import app
+
+    response = TestClient(app).post(
+        "/api/upload",
+        content=b"x",
+        headers={"origin": "http://localhost:3000", "content-length": str(ingest_jobs.MAX_UPLOAD_BYTES + 1)},
+    )
+
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    print("✅ 413 carries access-control-allow-origin")
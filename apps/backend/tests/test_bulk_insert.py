@@ -0,0 +1,85 @@
+"""
+Test bulk chunk insertion (binary COPY)
+
+Run with: pytest apps/backend/tests/test_bulk_insert.py -v
+"""
+
+import pytest
+from app.services.db import insert_chunks_bulk
+
+
+class FakeConnection:
+    """Records copy_records_to_table calls instead of talking to Postgres."""
+
+    def __init__(self):
+        self.copies = []
+        self.queries = []
+
+    async def fetchval(self, query, *args):
+        # chunk_partition_key_for(doc_id, NULL)
+        self.queries.append((query, args))
+        return "project:Atlas"
+
+    async def copy_records_to_table(self, table_name, records, columns):
+        self.copies.append((table_name, list(records), columns))
+        return f"COPY {len(records)}"
+
+
+def _chunks(n):
+    return [
+        {"text": f"chunk {i}", "heading_path": ["Guide", f"Step {i}"], "token_count": 10 + i}
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_uses_one_copy():
+    """All chunks are written with a single COPY on the given connection"""
+    # Given: Three chunks with embeddings
+    conn = FakeConnection()
+    embeddings = [[0.1] * 4, [0.2] * 4, [0.3] * 4]
+
+    # When: Inserting them in bulk
+    inserted = await insert_chunks_bulk(7, _chunks(3), embeddings, conn=conn)
+
+    # Then: One COPY into chunks with every row
+    assert inserted == 3
+    assert len(conn.copies) == 1
+    table, records, columns = conn.copies[0]
+    assert table == "chunks"
+    assert columns == ["doc_id", "text", "heading_path", "embedding", "order_in_doc", "token_count", "partition_key"]
+    assert records[1] == (7, "chunk 1", ["Guide", "Step 1"], [0.2] * 4, 1, 11, "project:Atlas")
+    print("✅ One COPY for all chunks")
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_looks_up_partition_once():
+    """COPY cannot call chunk_partition_key_for per row: it is looked up once per document"""
+    conn = FakeConnection()
+
+    await insert_chunks_bulk(7, _chunks(3), [[0.1] * 4] * 3, conn=conn)
+
+    assert len(conn.queries) == 1
+    assert "chunk_partition_key_for" in conn.queries[0][0]
+    assert conn.queries[0][1] == (7,)
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_skips_failed_embeddings():
+    """Chunks without an embedding are skipped and keep their original order_in_doc"""
+    conn = FakeConnection()
+
+    inserted = await insert_chunks_bulk(7, _chunks(3), [[0.1] * 4, None, [0.3] * 4], conn=conn)
+
+    assert inserted == 2
+    _, records, _ = conn.copies[0]
+    assert [record[4] for record in records] == [0, 2]
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_nothing_to_write():
+    conn = FakeConnection()
+
+    assert await insert_chunks_bulk(7, _chunks(2), [None, None], conn=conn) == 0
+    assert conn.copies == []
+    assert conn.queries == []
@@ -0,0 +1,190 @@
+"""
+Test the denormalized ACL columns on chunks (kept in sync by triggers)
+and the project partitions they route chunks to
+
+Runs against the test database; every test rolls its changes back.
+
+Run with: pytest apps/backend/tests/test_chunk_acl.py -v
+"""
+
+import asyncpg
+import pytest
+from app.db.client import acquire
+
+TEST_USER_ID = "550e8400-e29b-41d4-a716-446655440000"
+RECIPIENT_USER_ID = "660e8400-e29b-41d4-a716-446655440001"
+THIRD_USER_ID = "770e8400-e29b-41d4-a716-446655440002"
+VECTOR = [0.1] * 1024
+
+
+class Rollback(Exception):
+    pass
+
+
+async def in_rollback(test):
+    """Runs test(conn) in a transaction that is always rolled back."""
+    async with acquire() as conn:
+        try:
+            async with conn.transaction():
+                await test(conn)
+                raise Rollback()
+        except Rollback:
+            pass
+
+
+async def add_document(conn, visibility="Private", project_id="Atlas"):
+    doc_id = await conn.fetchval("""
+        INSERT INTO documents (title, project_id, visibility, uri, language)
+        VALUES ('ACL test', $1, $2, 'https://example.com/acl', 'en')
+        RETURNING doc_id
+    """, project_id, visibility)
+    chunk_id = await conn.fetchval("""
+        INSERT INTO chunks (doc_id, text, heading_path, embedding, order_in_doc, partition_key)
+        VALUES ($1, 'ACL test chunk', '{}', $2, 0, chunk_partition_key_for($1, NULL))
+        RETURNING chunk_id
+    """, doc_id, VECTOR)
+    return doc_id, chunk_id
+
+
+async def partition(conn, chunk_id):
+    return await conn.fetchval("SELECT tableoid::regclass::text FROM chunks WHERE chunk_id = $1", chunk_id)
+
+
+async def acl(conn, chunk_id):
+    return dict(await conn.fetchrow(
+        "SELECT visibility, project_id, is_deleted, principals FROM chunks WHERE chunk_id = $1", chunk_id
+    ))
+
+
+@pytest.mark.asyncio
+async def test_insert_copies_document_acl():
+    async def test(conn):
+        _, chunk_id = await add_document(conn, "Private", "Atlas")
+
+        row = await acl(conn, chunk_id)
+
+        assert row == {"visibility": "Private", "project_id": "Atlas", "is_deleted": False, "principals": None}
+
+    await in_rollback(test)
+    print("✅ Chunk insert copies the document's ACL")
+
+
+@pytest.mark.asyncio
+async def test_document_changes_propagate_to_chunks():
+    async def test(conn):
+        # Given
+        doc_id, chunk_id = await add_document(conn, "Private", "Atlas")
+
+        # When: made public, then soft-deleted, then restored
+        await conn.execute("UPDATE documents SET visibility = 'Public' WHERE doc_id = $1", doc_id)
+        assert (await acl(conn, chunk_id))["visibility"] == "Public"
+
+        await conn.execute("UPDATE documents SET deleted_at = now() WHERE doc_id = $1", doc_id)
+        assert (await acl(conn, chunk_id))["is_deleted"] is True
+
+        await conn.execute("UPDATE documents SET deleted_at = NULL, project_id = 'Phoenix' WHERE doc_id = $1", doc_id)
+        row = await acl(conn, chunk_id)
+
+        # Then
+        assert row["is_deleted"] is False
+        assert row["project_id"] == "Phoenix"
+
+    await in_rollback(test)
+
+
+@pytest.mark.asyncio
+async def test_handover_chunks_carry_principals():
+    async def test(conn):
+        # Given
+        handover_id = await conn.fetchval("""
+            INSERT INTO handovers (from_employee_id, to_employee_id, title)
+            VALUES ($1, $2, 'ACL test handover')
+            RETURNING handover_id
+        """, TEST_USER_ID, RECIPIENT_USER_ID)
+        chunk_id = await conn.fetchval("""
+            INSERT INTO chunks (handover_id, text, heading_path, embedding, order_in_doc, partition_key)
+            VALUES ($1, 'Handover chunk', '{}', $2, 0, chunk_partition_key_for(NULL, $1))
+            RETURNING chunk_id
+        """, handover_id, VECTOR)
+
+        row = await acl(conn, chunk_id)
+        assert sorted(str(p) for p in row["principals"]) == sorted([TEST_USER_ID, RECIPIENT_USER_ID])
+        assert row["visibility"] is None and row["project_id"] is None
+
+        # When: someone is CC'd
+        await conn.execute(
+            "UPDATE handovers SET cc_employee_ids = ARRAY[$2::uuid] WHERE handover_id = $1",
+            handover_id, THIRD_USER_ID
+        )
+
+        # Then
+        principals = [str(p) for p in (await acl(conn, chunk_id))["principals"]]
+        assert THIRD_USER_ID in principals
+
+    await in_rollback(test)
+    print("✅ Handover participants are copied to principals")
+
+
+# ============================================================================
+# Partitions
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_chunks_land_in_their_partition():
+    async def test(conn):
+        _, private_chunk = await add_document(conn, "Private", "Atlas")
+        _, public_chunk = await add_document(conn, "Public", "Atlas")
+
+        assert await partition(conn, private_chunk) == await conn.fetchval("SELECT chunk_partition_name('Atlas')")
+        assert await partition(conn, public_chunk) == "chunks_public"
+
+    await in_rollback(test)
+    print("✅ Private chunks in their project's partition, Public chunks in chunks_public")
+
+
+@pytest.mark.asyncio
+async def test_document_changes_move_chunks_between_partitions():
+    async def test(conn):
+        # Given
+        doc_id, chunk_id = await add_document(conn, "Private", "Atlas")
+
+        # When: moved to another project, then made public
+        await conn.execute("UPDATE documents SET project_id = 'Phoenix' WHERE doc_id = $1", doc_id)
+        moved = await partition(conn, chunk_id)
+        await conn.execute("UPDATE documents SET visibility = 'Public' WHERE doc_id = $1", doc_id)
+
+        # Then
+        assert moved == await conn.fetchval("SELECT chunk_partition_name('Phoenix')")
+        assert await partition(conn, chunk_id) == "chunks_public"
+
+    await in_rollback(test)
+
+
+@pytest.mark.asyncio
+async def test_wrong_partition_key_is_rejected():
+    """An insert routed to the wrong partition fails instead of leaking into another project's search"""
+    async def test(conn):
+        doc_id, _ = await add_document(conn, "Private", "Atlas")
+
+        with pytest.raises(asyncpg.CheckViolationError):
+            await conn.execute("""
+                INSERT INTO chunks (doc_id, text, heading_path, embedding, order_in_doc, partition_key)
+                VALUES ($1, 'Misrouted chunk', '{}', $2, 1, 'public')
+            """, doc_id, VECTOR)
+
+    await in_rollback(test)
+
+
+@pytest.mark.asyncio
+async def test_new_project_gets_partition_with_hnsw_index():
+    async def test(conn):
+        # When
+        await conn.execute("INSERT INTO projects (project_id, name) VALUES ('Orion', 'Orion')")
+
+        # Then
+        name = await conn.fetchval("SELECT chunk_partition_name('Orion')")
+        indexes = await conn.fetch("SELECT indexdef FROM pg_indexes WHERE tablename = $1", name)
+        assert any("USING hnsw" in row["indexdef"] for row in indexes)
+
+    await in_rollback(test)
+    print("✅ New project gets its own chunk partition and HNSW index")
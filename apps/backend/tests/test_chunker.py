@@ -0,0 +1,242 @@
+"""
+Test the offset-based chunker
+
+Uses a byte-level tiktoken encoding (one token per byte) so the tests run
+without downloading cl100k_base.
+
+Run with: pytest apps/backend/tests/test_chunker.py -v
+"""
+
+import pytest
+import tiktoken
+from app.services.chunker import chunk_markdown, iter_chunks, LOOKAHEAD_TOKENS
+
+
+@pytest.fixture(scope="module")
+def encoding():
+    ranks = {bytes([i]): i for i in range(256)}
+    pattern = r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+    return tiktoken.Encoding("bytes", pat_str=pattern, mergeable_ranks=ranks, special_tokens={})
+
+
+SECTIONS = [
+    {"heading_path": ["Deployment"], "text": "Deploy instructions here."},
+    {"heading_path": ["Deployment", "Steps"], "text": "Step one. Step two é😀."},
+]
+
+
+def make_markdown():
+    return (
+        "# Deployment\n\n" + "Deploy instructions here. " * 6
+        + "\n\n## Steps\n\n" + "Step one. Step two é😀. " * 40
+    )
+
+
+def test_short_doc_is_one_chunk(encoding):
+    markdown = "# Test\n\nThis is a short document."
+
+    chunks = chunk_markdown(markdown, chunk_size=500, chunk_overlap=50, encoding=encoding)
+
+    assert chunks == [{"text": markdown, "heading_path": [], "token_count": len(markdown), "order": 0}]
+
+
+def test_chunks_are_contiguous_slices(encoding):
+    """Without overlap, the chunks concatenate back to the document (multi-byte chars intact)"""
+    # Given
+    markdown = make_markdown()
+
+    # When
+    chunks = chunk_markdown(markdown, SECTIONS, chunk_size=200, chunk_overlap=0, encoding=encoding)
+
+    # Then
+    assert len(chunks) > 3
+    assert "".join(chunk["text"] for chunk in chunks) == markdown
+    assert [chunk["order"] for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks[:-1]:
+        assert chunk["token_count"] <= 200 + LOOKAHEAD_TOKENS
+        # Split at a natural boundary, not mid-sentence
+        assert chunk["text"].endswith((". ", "\n", "\n\n", "Steps"))
+    print(f"✅ {len(chunks)} contiguous chunks")
+
+
+def test_overlap_repeats_text(encoding):
+    chunks = chunk_markdown(make_markdown(), chunk_size=200, chunk_overlap=40, encoding=encoding)
+
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous["text"][-20:] in current["text"]
+
+
+def test_heading_path_from_section_start(encoding):
+    """Each chunk gets the heading of the section its first character belongs to"""
+    markdown = make_markdown()
+
+    chunks = chunk_markdown(markdown, SECTIONS, chunk_size=200, chunk_overlap=0, encoding=encoding)
+
+    steps_start = markdown.index("## Steps")
+    offset = 0
+    for chunk in chunks:
+        expected = ["Deployment", "Steps"] if offset >= steps_start else ["Deployment"]
+        assert chunk["heading_path"] == expected, chunk["text"][:40]
+        offset += len(chunk["text"])
+
+
+def test_iter_chunks_matches_chunk_markdown(encoding):
+    markdown = make_markdown()
+
+    iterator = iter_chunks(markdown, SECTIONS, 200, 50, encoding)
+
+    assert next(iterator)["order"] == 0
+    assert list(iter_chunks(markdown, SECTIONS, 200, 50, encoding)) == \
+        chunk_markdown(markdown, SECTIONS, 200, 50, encoding=encoding)
+
+
+# ============================================================================
+# Sections mode
+# ============================================================================
+
+GUIDE_SECTIONS = [
+    {"heading_path": ["Deployment"], "text": "How we deploy."},
+    {"heading_path": ["Deployment", "Steps"], "text": "Run make deploy."},
+    {"heading_path": ["Deployment", "Rollback"], "text": "Run make rollback."},
+    {"heading_path": ["Onboarding"], "text": "Welcome aboard. " * 30},
+    {"heading_path": ["Onboarding", "Laptop"], "text": "Request a laptop."},
+]
+
+
+def make_guide():
+    return (
+        "# Deployment\n\nHow we deploy.\n\n## Steps\n\nRun make deploy.\n\n## Rollback\n\nRun make rollback.\n\n"
+        "# Onboarding\n\n" + "Welcome aboard. " * 30 + "\n\n## Laptop\n\nRequest a laptop."
+    )
+
+
+def test_sections_mode_packs_siblings_under_shared_heading(encoding):
+    """Small sections of one topic become one chunk with the path they share"""
+    # Given
+    markdown = make_guide()
+
+    # When
+    chunks = chunk_markdown(markdown, GUIDE_SECTIONS, chunk_size=200, chunk_overlap=0, mode="sections", encoding=encoding)
+
+    # Then: Deployment + its subsections packed; Onboarding does not fit with them
+    assert chunks[0]["heading_path"] == ["Deployment"]
+    assert chunks[0]["text"].startswith("# Deployment") and "Run make rollback." in chunks[0]["text"]
+    assert "Onboarding" not in chunks[0]["text"]
+    assert "".join(chunk["text"] for chunk in chunks) == markdown
+    print(f"✅ {len(chunks)} section chunks: {[c['heading_path'] for c in chunks]}")
+
+
+def test_sections_mode_does_not_pack_unrelated_topics(encoding):
+    markdown = "# Deployment\n\nHow we deploy.\n\n# Billing\n\nInvoices go out monthly."
+    sections = [
+        {"heading_path": ["Deployment"], "text": "How we deploy."},
+        {"heading_path": ["Billing"], "text": "Invoices go out monthly."},
+    ]
+
+    chunks = chunk_markdown(markdown, sections, chunk_size=500, chunk_overlap=0, mode="sections", encoding=encoding)
+
+    assert [chunk["heading_path"] for chunk in chunks] == [["Deployment"], ["Billing"]]
+    assert [chunk["order"] for chunk in chunks] == [0, 1]
+
+
+def test_sections_mode_splits_only_oversized_sections(encoding):
+    markdown = make_guide()
+
+    chunks = chunk_markdown(markdown, GUIDE_SECTIONS, chunk_size=150, chunk_overlap=0, mode="sections", encoding=encoding)
+
+    onboarding = [chunk for chunk in chunks if chunk["heading_path"] == ["Onboarding"]]
+    assert len(onboarding) > 1
+    assert all(chunk["token_count"] <= 150 + LOOKAHEAD_TOKENS for chunk in onboarding)
+    # The last piece of Onboarding is packed with its Laptop subsection
+    assert chunks[-1]["heading_path"] == ["Onboarding"]
+    assert chunks[-1]["text"].endswith("## Laptop\n\nRequest a laptop.")
+    assert [chunk["order"] for chunk in chunks] == list(range(len(chunks)))
+
+
+def test_sections_mode_produces_fewer_chunks(encoding):
+    """Many short FAQ-style sections: packing beats sliding windows that straddle them"""
+    # Given
+    parts, sections = ["# FAQ\n\n"], []
+    for n in range(40):
+        answer = f"Answer {n}: " + "see the runbook. " * (n % 5 + 1)
+        parts.append(f"## Question {n}\n\n{answer}\n\n")
+        sections.append({"heading_path": ["FAQ", f"Question {n}"], "text": answer})
+    markdown = "".join(parts)
+
+    # When
+    window = chunk_markdown(markdown, sections, chunk_size=300, chunk_overlap=50, encoding=encoding)
+    packed = chunk_markdown(markdown, sections, chunk_size=300, chunk_overlap=50, mode="sections", encoding=encoding)
+
+    # Then
+    assert len(packed) < len(window)
+    assert all(chunk["heading_path"][0] == "FAQ" for chunk in packed)
+    print(f"✅ {len(window)} window chunks -> {len(packed)} section chunks")
+
+
+def test_unknown_mode_is_rejected(encoding):
+    with pytest.raises(ValueError):
+        chunk_markdown("text", mode="paragraphs", encoding=encoding)
+
+
+# ============================================================================
+# Content mode
+# ============================================================================
+
+def make_paragraphs(count, seed=3):
+    import random
+    rng = random.Random(seed)
+    words = "deploy service cluster cache token index query rollout the a of to and in".split()
+    return [
+        " ".join(rng.choice(words) for _ in range(rng.randint(20, 60))).capitalize() + "."
+        for _ in range(count)
+    ]
+
+
+def test_content_mode_covers_document_within_bounds(encoding):
+    # Given
+    markdown = "# Runbook\n\n" + "\n\n".join(make_paragraphs(120))
+
+    # When
+    chunks = chunk_markdown(markdown, chunk_size=600, chunk_overlap=50, mode="content", encoding=encoding)
+
+    # Then: no overlap, every chunk within the window chunker's bound
+    assert len(chunks) > 5
+    assert "".join(chunk["text"] for chunk in chunks) == markdown
+    assert all(chunk["token_count"] <= 600 + LOOKAHEAD_TOKENS for chunk in chunks)
+    assert [chunk["order"] for chunk in chunks] == list(range(len(chunks)))
+
+
+def test_content_mode_edit_only_changes_nearby_chunks(encoding):
+    """Inserting a paragraph near the top keeps later chunks byte-identical"""
+    # Given
+    paragraphs = make_paragraphs(120)
+    before = chunk_markdown("\n\n".join(paragraphs), chunk_size=600, mode="content", encoding=encoding)
+
+    # When
+    edited = paragraphs[:2] + ["A new paragraph about the cache rollout."] + paragraphs[2:]
+    after = chunk_markdown("\n\n".join(edited), chunk_size=600, mode="content", encoding=encoding)
+
+    # Then
+    old = {chunk["text"] for chunk in before}
+    changed = [chunk for chunk in after if chunk["text"] not in old]
+    assert len(changed) <= 2
+    assert after[-1]["text"] == before[-1]["text"]
+    print(f"✅ {len(after) - len(changed)}/{len(after)} chunks reused after an insert")
+
+
+def test_content_mode_splits_long_paragraphs(encoding):
+    markdown = "one two three four. " * 200 + "x" * 2000
+
+    chunks = chunk_markdown(markdown, chunk_size=300, mode="content", encoding=encoding)
+
+    assert "".join(chunk["text"] for chunk in chunks) == markdown
+    assert all(chunk["token_count"] <= 300 + LOOKAHEAD_TOKENS for chunk in chunks)
+
+
+def test_content_mode_heading_path(encoding):
+    markdown = make_guide()
+
+    chunks = chunk_markdown(markdown, GUIDE_SECTIONS, chunk_size=150, mode="content", encoding=encoding)
+
+    assert chunks[0]["heading_path"] == ["Deployment"]
+    assert chunks[-1]["heading_path"][0] == "Onboarding"
@@ -0,0 +1,53 @@
+"""
+Test asyncpg type codecs (binary pgvector, JSONB)
+
+Run with: pytest apps/backend/tests/test_codecs.py -v
+"""
+
+import struct
+import numpy as np
+import pytest
+from app.db.codecs import encode_vector, decode_vector, register_codecs
+
+
+def test_vector_roundtrip_is_float32():
+    """Encoding then decoding returns the same values as float32"""
+    vector = [0.1, -0.25, 3.5] + [0.0] * 1021
+
+    data = encode_vector(vector)
+    decoded = decode_vector(data)
+
+    assert len(data) == 4 + 4 * 1024
+    assert decoded.dtype == np.float32
+    assert decoded.shape == (1024,)
+    np.testing.assert_array_equal(decoded, np.asarray(vector, dtype=np.float32))
+    print("✅ Vector roundtrip OK")
+
+
+def test_vector_wire_format_matches_pgvector():
+    """Header is (uint16 dim, uint16 unused), values are big-endian float32"""
+    data = encode_vector(np.array([1.0, 2.0], dtype=np.float32))
+    assert data == struct.pack(">HH", 2, 0) + struct.pack(">ff", 1.0, 2.0)
+
+
+def test_vector_must_be_one_dimensional():
+    with pytest.raises(ValueError):
+        encode_vector([[1.0, 2.0]])
+
+
+@pytest.mark.asyncio
+async def test_register_codecs_uses_vector_schema():
+    """The vector codec is registered in whichever schema holds the extension"""
+    registered = []
+
+    class FakeConnection:
+        async def fetchval(self, query):
+            return "extensions"  # Supabase
+
+        async def set_type_codec(self, name, schema, encoder, decoder, format):
+            registered.append((name, schema, format))
+
+    await register_codecs(FakeConnection())
+
+    assert ("vector", "extensions", "binary") in registered
+    assert ("jsonb", "pg_catalog", "text") in registered
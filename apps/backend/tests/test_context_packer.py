@@ -0,0 +1,106 @@
+"""
+Test context packing (overlap removal + token budget)
+
+Run with: pytest apps/backend/tests/test_context_packer.py -v
+"""
+
+from app.services.context_packer import overlap_length, merge_adjacent, pack_context
+
+
+SHARED = "Then push the image to the registry and apply the manifests."
+
+
+def make_chunk(chunk_id, doc_id, order, text, tokens):
+    return {
+        "chunk_id": chunk_id, "doc_id": doc_id, "handover_id": None,
+        "order_in_doc": order, "text": text, "token_count": tokens,
+    }
+
+
+def test_overlap_length_finds_shared_text():
+    """The start of the next chunk that repeats the end of the previous one is detected"""
+    previous = "Build the Docker image first. " + SHARED
+    following = SHARED + " Finally check the pods."
+
+    assert overlap_length(previous, following) == len(SHARED)
+    # Unrelated chunks share nothing
+    assert overlap_length("Completely different text here.", following) == 0
+    print("✅ Overlap detected")
+
+
+def test_adjacent_chunks_are_merged_without_duplicate_text():
+    """Consecutive chunks of one document become a single block"""
+    # Given: chunks 1 and 0 of doc 10 (rerank order), plus a chunk from doc 20
+    chunks = [
+        make_chunk(2, 10, 1, SHARED + " Finally check the pods.", 100),
+        make_chunk(5, 20, 3, "Unrelated onboarding notes.", 50),
+        make_chunk(1, 10, 0, "Build the Docker image first. " + SHARED, 100),
+    ]
+
+    # When
+    blocks = merge_adjacent(chunks)
+
+    # Then: doc 10 is merged in document order and keeps its best rank
+    assert len(blocks) == 2
+    assert blocks[0]["text"] == "Build the Docker image first. " + SHARED + " Finally check the pods."
+    assert blocks[0]["text"].count(SHARED) == 1
+    assert blocks[0]["rank"] == 0
+    assert blocks[0]["chunk_ids"] == [1, 2]
+    assert blocks[0]["tokens"] < 200
+    assert blocks[1]["text"] == "Unrelated onboarding notes."
+    print("✅ Adjacent chunks merged")
+
+
+def test_non_adjacent_chunks_stay_separate():
+    """Chunks 0 and 2 of a document are not merged (chunk 1 is missing)"""
+    chunks = [
+        make_chunk(1, 10, 0, "First part.", 10),
+        make_chunk(3, 10, 2, "Third part.", 10),
+    ]
+    assert [b["text"] for b in merge_adjacent(chunks)] == ["First part.", "Third part."]
+
+
+def test_pack_context_respects_token_budget():
+    """Blocks are added best-first; ones that do not fit are skipped"""
+    chunks = [
+        make_chunk(1, 1, 0, "best", 300),
+        make_chunk(2, 2, 0, "too big", 800),
+        make_chunk(3, 3, 0, "small", 100),
+    ]
+
+    assert pack_context(chunks, token_budget=500) == ["best", "small"]
+    print("✅ Budget respected")
+
+
+def test_best_chunk_survives_over_budget_merged_block():
+    """A merged block over budget is split, so the top chunk is never dropped for its neighbours"""
+    # Given: the best chunk is doc 1 order 5; ranks 3-8 are its neighbours (7 x 500 tokens merged)
+    chunks = [
+        make_chunk(5, 1, 5, "BEST", 500),
+        make_chunk(20, 2, 0, "other1", 500),
+        make_chunk(30, 3, 0, "other2", 500),
+    ] + [make_chunk(order, 1, order, f"neighbour{order}", 500) for order in (3, 4, 6, 7, 8, 9)]
+
+    # When
+    packed = pack_context(chunks, token_budget=3000)
+
+    # Then: the 6 best-ranked chunks are sent; doc 1's are merged again around BEST
+    assert packed == ["\n".join(["neighbour3", "neighbour4", "BEST", "neighbour6"]), "other1", "other2"]
+    print("✅ Top-ranked chunk kept inside an over-budget block")
+
+
+def test_pack_context_truncates_oversized_best_block():
+    """If nothing fits, the best block is cut down instead of sending no context"""
+    chunks = [make_chunk(1, 1, 0, "x" * 4000, 1000)]
+
+    packed = pack_context(chunks, token_budget=250)
+
+    assert len(packed) == 1
+    assert len(packed[0]) == 1000
+
+
+def test_missing_token_count_is_estimated():
+    """Rows ingested before token_count existed still count against the budget"""
+    chunk = make_chunk(1, 1, 0, "y" * 400, None)
+    assert pack_context([chunk], token_budget=100) == ["y" * 400]
+    assert pack_context([chunk], token_budget=50) == ["y" * 200]
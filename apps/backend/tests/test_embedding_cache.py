@@ -0,0 +1,86 @@
+"""
+Test query embedding cache
+
+Run with: pytest apps/backend/tests/test_embedding_cache.py -v
+"""
+
+import pytest
+from app.services import embeddings
+from app.services.embedding_cache import QueryEmbeddingCache, normalize_query
+
+
+def test_normalize_query_folds_case_whitespace_punctuation():
+    """Trivial variations of a question share one key"""
+    assert normalize_query("  How do I deploy   Atlas?? ") == "how do i deploy atlas"
+    assert normalize_query("how do i deploy atlas") == normalize_query("How do I deploy Atlas?")
+    # Identifiers keep their underscores and digits
+    assert normalize_query("What is ERR_4032?") == "what is err_4032"
+
+
+def test_cache_hit_and_miss_counters():
+    """get() counts hits/misses and returns float32-rounded vectors"""
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60)
+
+    assert cache.get("m", "search_query", "deploy atlas") is None
+    cache.put("m", "search_query", "deploy atlas", [0.1] * 1024)
+
+    vector = cache.get("m", "search_query", "Deploy Atlas!")
+    assert len(vector) == 1024
+    assert vector[0] == pytest.approx(0.1, rel=1e-6)
+
+    # Different input_type is a different entry
+    assert cache.get("m", "search_document", "deploy atlas") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["size"] == 1
+
+
+def test_cache_lru_eviction():
+    """Least recently used entry is evicted first"""
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=60)
+    cache.put("m", "q", "a", [1.0])
+    cache.put("m", "q", "b", [2.0])
+
+    # Touch "a" so "b" becomes least recently used
+    cache.get("m", "q", "a")
+    cache.put("m", "q", "c", [3.0])
+
+    assert cache.get("m", "q", "b") is None
+    assert cache.get("m", "q", "a") == [1.0]
+    assert cache.get("m", "q", "c") == [3.0]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_ttl_expiry(monkeypatch):
+    """Entries older than the TTL are dropped on read"""
+    now = [1000.0]
+    monkeypatch.setattr("app.services.embedding_cache.time.monotonic", lambda: now[0])
+
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60)
+    cache.put("m", "q", "a", [1.0])
+
+    now[0] += 61
+    assert cache.get("m", "q", "a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_embed_query_uses_cache(monkeypatch):
+    """A repeated query does not call Cohere again"""
+    calls = []
+
+    async def fake_embed(texts, model, input_type):
+        calls.append(texts)
+        return [[0.25] * 1024]
+
+    monkeypatch.setattr(embeddings.cohere_client, "embed", fake_embed)
+    monkeypatch.setattr(embeddings, "query_cache", QueryEmbeddingCache())
+
+    first = await embeddings.embed_query("How do I deploy Atlas?")
+    second = await embeddings.embed_query("how do i deploy atlas")
+
+    assert len(calls) == 1
+    assert first == second
@@ -5,15 +5,17 @@ Run with: pytest apps/backend/tests/test_embeddings.py -v
 """
 
 import pytest
-from app.services.embeddings import embed_query
+from app.services import embeddings
+from app.services.embeddings import embed_query, embed_documents
 
-def test_embed_query_basic():
+@pytest.mark.asyncio
+async def test_embed_query_basic():
     """Test embed_query() with real API call"""
     # Given
     query = "How do I deploy the Atlas API?"
 
     # When
-    result = embed_query(query)
+    result = await embed_query(query)
 
     # Then - Verify requirements from table:
     # 1. Returns 1024 dimensions
@@ -28,21 +30,124 @@ def test_embed_query_basic():
     print(f"✅ embed_query() works! First 5 values: {result[:5]}")
 
 
-def test_embed_query_empty_string():
+@pytest.mark.asyncio
+async def test_embed_query_empty_string():
     """Test that empty query raises error"""
     with pytest.raises(ValueError):
-        embed_query("")
+        await embed_query("")
 
 
-def test_embed_query_none():
+@pytest.mark.asyncio
+async def test_embed_query_none():
     """Test that None query raises error"""
     with pytest.raises(ValueError):
-        embed_query(None)
+        await embed_query(None)
+
+
+@pytest.mark.asyncio
+async def test_embed_documents_reports_empty_chunks():
+    """Test embed_documents() with real API call: empty chunks fail individually"""
+    # Given
+    texts = ["To deploy Atlas, run make deploy.", "", "Rollback with make rollback."]
+
+    # When
+    vectors, errors = await embed_documents(texts)
+
+    # Then: Order is preserved and only the empty chunk failed
+    assert len(vectors) == 3
+    assert list(errors.keys()) == [1]
+    assert vectors[1] is None
+    assert len(vectors[0]) == 1024 and len(vectors[2]) == 1024
+    assert vectors[0] != vectors[2]
+
+    print("✅ embed_documents() works with real API!")
+
+
+@pytest.mark.asyncio
+async def test_embed_documents_batches_in_order(monkeypatch):
+    """Test embed_documents() batching with a mocked Cohere client"""
+    calls = []
+
+    async def fake_embed(texts, model, input_type):
+        calls.append(len(texts))
+        if "fail" in texts[0]:
+            raise Exception("API error")
+        # Encode the chunk number in the vector so order can be checked
+        return [[float(t.split()[-1])] * 1024 for t in texts]
+
+    async def no_stored(hashes):
+        return {}
+
+    async def ignore_store(entries, model, input_type):
+        pass
+
+    monkeypatch.setattr(embeddings.cohere_client, "embed", fake_embed)
+    monkeypatch.setattr(embeddings.db, "fetch_cached_embeddings", no_stored)
+    monkeypatch.setattr(embeddings.db, "store_cached_embeddings", ignore_store)
+    monkeypatch.setattr(embeddings, "EMBED_MAX_RETRIES", 1)
+
+    # Given: 200 chunks -> batches of 96, 96 and 8; the last batch fails
+    texts = [f"chunk {i}" for i in range(192)] + [f"fail {i}" for i in range(192, 200)]
+
+    # When
+    vectors, errors = await embed_documents(texts)
+
+    # Then
+    assert sorted(calls) == [8, 96, 96]
+    assert all(vectors[i][0] == float(i) for i in range(192))
+    assert sorted(errors.keys()) == list(range(192, 200))
+    assert all(vectors[i] is None for i in range(192, 200))
+
+
+@pytest.mark.asyncio
+async def test_embed_documents_reuses_stored_embeddings(monkeypatch):
+    """Only chunks missing from the embedding store are sent to Cohere"""
+    store = {}
+    sent = []
+
+    async def fake_fetch(hashes):
+        return {h: store[h] for h in hashes if h in store}
+
+    async def fake_store(entries, model, input_type):
+        store.update(dict(entries))
+
+    async def fake_embed(texts, model, input_type):
+        sent.extend(texts)
+        return [[0.5] * 1024 for _ in texts]
+
+    monkeypatch.setattr(embeddings.cohere_client, "embed", fake_embed)
+    monkeypatch.setattr(embeddings.db, "fetch_cached_embeddings", fake_fetch)
+    monkeypatch.setattr(embeddings.db, "store_cached_embeddings", fake_store)
+
+    # Given: A document was embedded once
+    await embed_documents(["intro", "setup", "deploy"])
+
+    # When: It is re-uploaded with one chunk edited
+    sent.clear()
+    vectors, errors = await embed_documents(["intro", "setup v2", "deploy"])
+
+    # Then: Only the edited chunk costs a Cohere call
+    assert sent == ["setup v2"]
+    assert errors == {}
+    assert all(len(v) == 1024 for v in vectors)
+
+
+def test_embedding_cache_key_is_content_addressed():
+    """Key depends on model, input_type and exact text"""
+    key = embeddings.embedding_cache_key("embed-english-v3.0", "search_document", "hello")
+
+    assert key == embeddings.embedding_cache_key("embed-english-v3.0", "search_document", "hello")
+    assert key != embeddings.embedding_cache_key("embed-english-v3.0", "search_query", "hello")
+    assert key != embeddings.embedding_cache_key("embed-english-v3.0", "search_document", "hello!")
+    assert len(key) == 64
 
 
 if __name__ == "__main__":
     # Can run directly: python tests/test_embeddings.py
-    test_embed_query_basic()
-    test_embed_query_empty_string()
-    test_embed_query_none()
+    import asyncio
+    from app.services.cohere_client import init_cohere_client
+    asyncio.run(init_cohere_client())
+    asyncio.run(test_embed_query_basic())
+    asyncio.run(test_embed_query_empty_string())
+    asyncio.run(test_embed_query_none())
     print("All embeddings tests passed!")
@@ -0,0 +1,292 @@
+"""
+Test hybrid retrieval: full-text search fused with vector search
+
+- Unit tests (no database): reciprocal rank fusion, concurrent branches,
+  AND-then-OR full-text queries
+- Database tests (test database): identifier matches, GIN index use
+
+Run with: pytest apps/backend/tests/test_hybrid_search.py -v
+"""
+
+import asyncio
+import json
+import pytest
+from contextlib import asynccontextmanager
+from app.db.client import acquire, transaction
+from app.services import retrieval
+from app.services.retrieval import (
+    FULLTEXT_SQL,
+    document_partition_keys,
+    fulltext_fallback_terms,
+    reciprocal_rank_fusion,
+    run_fulltext_search,
+    run_hybrid_search,
+)
+
+TEST_USER_ID = "550e8400-e29b-41d4-a716-446655440000"
+QUERY_VECTOR = [0.1] * 1024
+
+
+def chunk(chunk_id, **extra):
+    return {"chunk_id": chunk_id, "text": f"Chunk {chunk_id}", **extra}
+
+
+# ============================================================================
+# Reciprocal rank fusion
+# ============================================================================
+
+def test_fusion_favors_chunks_found_by_both():
+    # Given: chunk 3 is third by vector, first by full-text
+    vector = [chunk(1, score=0.9), chunk(2, score=0.8), chunk(3, score=0.7)]
+    fulltext = [chunk(3, text_rank=0.5), chunk(9, text_rank=0.4)]
+
+    # When
+    fused = reciprocal_rank_fusion(vector, fulltext, k=60)
+
+    # Then
+    assert [c["chunk_id"] for c in fused] == [3, 1, 2, 9]
+    assert fused[0]["rrf_score"] == pytest.approx(1 / 63 + 1 / 61)
+    assert fused[0]["score"] == 0.7  # vector copy kept
+    print("✅ Chunk found by both searches ranks first")
+
+
+def test_fusion_keeps_full_text_only_matches():
+    """An exact identifier the embedding missed still reaches rerank"""
+    vector = [chunk(n, score=1 - n / 100) for n in range(1, 6)]
+    fulltext = [chunk(42, text_rank=0.9)]
+
+    fused = reciprocal_rank_fusion(vector, fulltext)
+
+    assert 42 in [c["chunk_id"] for c in fused[:3]]
+    assert "score" not in next(c for c in fused if c["chunk_id"] == 42)
+
+
+def test_fusion_of_one_list_keeps_its_order():
+    vector = [chunk(5), chunk(2), chunk(8)]
+
+    assert [c["chunk_id"] for c in reciprocal_rank_fusion(vector, [])] == [5, 2, 8]
+
+
+# ============================================================================
+# Full-text query (no database)
+# ============================================================================
+
+def test_fallback_ors_positive_terms():
+    assert fulltext_fallback_terms('ERR_4032 "deploy token" expired') == (
+        'ERR_4032 or "deploy token" or expired', ""
+    )
+
+
+def test_fallback_keeps_negated_terms_as_exclusions():
+    """'-staging' must exclude in both queries, never become an alternative"""
+    terms, exclusions = fulltext_fallback_terms('deploy timeout -staging -"dry run"')
+
+    assert terms == "deploy or timeout"
+    assert exclusions == '-staging -"dry run"'
+    print("✅ Negated terms stay exclusions in the OR query")
+
+
+def test_no_fallback_for_a_single_term():
+    assert fulltext_fallback_terms("ERR_4032 -staging") == ("", "")
+    assert fulltext_fallback_terms("deploy or rollback") == ("deploy or rollback", "")
+
+
+class FakeConnection:
+    """Returns one result list per fetch, in order; records the arguments"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    async def fetch(self, sql, *args):
+        self.calls.append(args)
+        return self.results.pop(0)
+
+
+def fake_acquire(monkeypatch, conn):
+    acquired = []
+
+    @asynccontextmanager
+    async def acquire():
+        acquired.append(conn)
+        yield conn
+
+    monkeypatch.setattr(retrieval, "acquire", acquire)
+    return acquired
+
+
+def ranked(chunk_id, rank):
+    return chunk(chunk_id, rank=rank)
+
+
+@pytest.mark.asyncio
+async def test_full_text_falls_back_to_or_on_one_connection(monkeypatch):
+    # Given: the AND query finds one chunk, the OR query three (one of them again)
+    conn = FakeConnection([ranked(7, 0.9)], [ranked(8, 0.8), ranked(7, 0.6), ranked(9, 0.1)])
+    acquired = fake_acquire(monkeypatch, conn)
+
+    # When
+    results = await run_fulltext_search("deploy timeout -staging", ["Atlas"], TEST_USER_ID, top_k=3)
+
+    # Then: AND matches first, then new OR matches; exclusion passed to both queries' AND
+    assert [c["chunk_id"] for c in results] == [7, 8, 9]
+    assert results[0]["text_rank"] == 0.9 and "rank" not in results[0]
+    assert len(acquired) == 1
+    assert conn.calls[0][:2] == ("deploy timeout -staging", "")
+    assert conn.calls[1][:2] == ("deploy or timeout", "-staging")
+    print("✅ OR fallback filled the list, exclusion kept")
+
+
+@pytest.mark.asyncio
+async def test_full_text_skips_fallback_when_and_is_enough(monkeypatch):
+    conn = FakeConnection([ranked(1, 0.5), ranked(2, 0.4)])
+    fake_acquire(monkeypatch, conn)
+
+    results = await run_fulltext_search("deploy timeout", ["Atlas"], TEST_USER_ID, top_k=2)
+
+    assert [c["chunk_id"] for c in results] == [1, 2]
+    assert len(conn.calls) == 1
+
+
+# ============================================================================
+# run_hybrid_search (no database)
+# ============================================================================
+
+@pytest.fixture
+def fake_searches(monkeypatch):
+    calls = {"running": 0, "overlap": False}
+
+    async def track():
+        calls["running"] += 1
+        await asyncio.sleep(0.01)
+        calls["overlap"] |= calls["running"] == 2
+        calls["running"] -= 1
+
+    async def fake_vector(query_vector, user_projects, user_id, top_k):
+        await track()
+        return [chunk(n, score=1 - n / 1000) for n in range(1, 201)]
+
+    async def fake_fulltext(query, user_projects, user_id):
+        await track()
+        return [chunk(500, text_rank=0.9), chunk(3, text_rank=0.5)]
+
+    monkeypatch.setattr(retrieval, "run_vector_search", fake_vector)
+    monkeypatch.setattr(retrieval, "run_fulltext_search", fake_fulltext)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_runs_both_concurrently(fake_searches):
+    # When
+    results = await run_hybrid_search("ERR_4032 on deploy", QUERY_VECTOR, ["Atlas"], TEST_USER_ID, top_k=100)
+
+    # Then: both branches overlapped; fused and cut to the rerank budget
+    assert fake_searches["overlap"]
+    assert len(results) == 100
+    assert [c["chunk_id"] for c in results[:3]] == [3, 1, 500]
+    print("✅ Vector and full-text search ran concurrently")
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_falls_back_to_vector(fake_searches, monkeypatch):
+    async def broken_fulltext(query, user_projects, user_id):
+        raise Exception("column text_search does not exist")
+
+    monkeypatch.setattr(retrieval, "run_fulltext_search", broken_fulltext)
+
+    results = await run_hybrid_search("deploy", QUERY_VECTOR, ["Atlas"], TEST_USER_ID, top_k=10)
+
+    assert [c["chunk_id"] for c in results] == list(range(1, 11))
+
+
+# ============================================================================
+# Full-text search (test database)
+# ============================================================================
+
+class Rollback(Exception):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_full_text_finds_exact_identifier():
+    """A chunk mentioning ERR_4032 is found from a question that contains it"""
+    async with acquire() as conn:
+        try:
+            async with conn.transaction():
+                # Given
+                doc_id = await conn.fetchval("""
+                    INSERT INTO documents (title, project_id, visibility, uri, language)
+                    VALUES ('Error catalog', 'Atlas', 'Private', 'https://example.com/errors', 'en')
+                    RETURNING doc_id
+                """)
+                await conn.execute("""
+                    INSERT INTO chunks (doc_id, text, heading_path, embedding, order_in_doc, partition_key)
+                    VALUES ($1, 'ERR_4032: the deploy token expired. Rotate it with make rotate-token.',
+                            '{}', $2, 0, chunk_partition_key_for($1, NULL))
+                """, doc_id, QUERY_VECTOR)
+
+                # When
+                rows = await conn.fetch(
+                    FULLTEXT_SQL, "ERR_4032 deploy", "", document_partition_keys(["Atlas"]), TEST_USER_ID, 10
+                )
+
+                # Then
+                assert rows and rows[0]["doc_id"] == doc_id
+                raise Rollback()
+        except Rollback:
+            pass
+    print("✅ Full-text search matched ERR_4032")
+
+
+@pytest.mark.asyncio
+async def test_full_text_fallback_respects_negated_term():
+    """The OR query still excludes chunks containing a '-term' of the question"""
+    async with acquire() as conn:
+        try:
+            async with conn.transaction():
+                # Given: one chunk mentions staging, the other does not
+                doc_id = await conn.fetchval("""
+                    INSERT INTO documents (title, project_id, visibility, uri, language)
+                    VALUES ('Deploy notes', 'Atlas', 'Private', 'https://example.com/deploy', 'en')
+                    RETURNING doc_id
+                """)
+                for order, text in enumerate([
+                    "Deploy to staging with make deploy-staging.",
+                    "Deploy to production after the release review.",
+                ]):
+                    await conn.execute("""
+                        INSERT INTO chunks (doc_id, text, heading_path, embedding, order_in_doc, partition_key)
+                        VALUES ($1, $2, '{}', $3, $4, chunk_partition_key_for($1, NULL))
+                    """, doc_id, text, QUERY_VECTOR, order)
+
+                # When: no chunk has every term, so the OR form runs
+                terms, exclusions = fulltext_fallback_terms("deploy rollback -staging")
+                rows = await conn.fetch(
+                    FULLTEXT_SQL, terms, exclusions, document_partition_keys(["Atlas"]), TEST_USER_ID, 10
+                )
+
+                # Then
+                assert [row["text"] for row in rows] == ["Deploy to production after the release review."]
+                raise Rollback()
+        except Rollback:
+            pass
+    print("✅ Negated term excluded from OR matches")
+
+
+@pytest.mark.asyncio
+async def test_full_text_branch_uses_gin_index():
+    async with transaction() as conn:
+        await conn.execute("SET LOCAL enable_seqscan = off")
+        plan = await conn.fetchval(
+            "EXPLAIN (FORMAT JSON) " + FULLTEXT_SQL,
+            "ERR_4032", "", document_partition_keys(["Atlas"]), TEST_USER_ID, 50
+        )
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+
+    names, nodes = set(), [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            names.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    assert any(name.endswith("text_search_idx") for name in names)
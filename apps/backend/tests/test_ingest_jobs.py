@@ -0,0 +1,172 @@
+"""
+Test background ingestion jobs (queueing, pipeline progress, failures)
+
+Run with: pytest apps/backend/tests/test_ingest_jobs.py -v
+"""
+
+import hashlib
+import io
+import os
+from contextlib import asynccontextmanager
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.routes import upload
+from app.services import ingest_jobs
+
+
+@pytest.fixture
+def fake_db(monkeypatch, tmp_path):
+    """Records job updates and document writes instead of using Postgres; CPU work runs inline"""
+    state = {"progress": [], "finished": [], "chunks": None}
+
+    async def progress(job_id, stage, chunks_done=None, chunks_total=None):
+        state["progress"].append((stage, chunks_done, chunks_total))
+
+    async def finish(job_id, status, doc_id=None, errors=None):
+        state["finished"].append((status, doc_id, errors))
+
+    async def insert_document(**kwargs):
+        return 501
+
+    async def insert_chunks_bulk(doc_id, chunks, embeddings, conn=None):
+        state["chunks"] = (doc_id, len(chunks), embeddings)
+        return sum(1 for e in embeddings if e is not None)
+
+    @asynccontextmanager
+    async def transaction():
+        yield object()
+
+    async def run_inline(func, *args, time_limit=None):
+        # Worker processes are covered in test_offload.py
+        return func(*args)
+
+    monkeypatch.setattr(ingest_jobs.db, "update_ingest_job_progress", progress)
+    monkeypatch.setattr(ingest_jobs.db, "finish_ingest_job", finish)
+    monkeypatch.setattr(ingest_jobs.db, "insert_document", insert_document)
+    monkeypatch.setattr(ingest_jobs.db, "insert_chunks_bulk", insert_chunks_bulk)
+    monkeypatch.setattr(ingest_jobs, "transaction", transaction)
+    monkeypatch.setattr(ingest_jobs.offload, "run_cpu", run_inline)
+    monkeypatch.setattr(ingest_jobs, "upload_path_to_storage", lambda **kwargs: "https://storage/doc.md")
+    monkeypatch.setattr(ingest_jobs, "STAGING_DIR", str(tmp_path))
+    return state
+
+
+async def _stage(data):
+    path, _, _ = await ingest_jobs.stage_upload(io.BytesIO(data))
+    return path
+
+
+def _job(path, attempts=1):
+    return {
+        "job_id": 7, "filename": "guide.md", "project_id": "Atlas", "visibility": "Private",
+        "source_external_id": "upload:Atlas:abc", "content_hash": "abc",
+        "file_path": path, "attempts": attempts,
+    }
+
+
+@pytest.mark.asyncio
+async def test_run_job_reports_progress(fake_db, monkeypatch):
+    """A job walks through every stage and records chunk progress"""
+    # Given: A staged markdown file and an embedder that fails one chunk
+    path = await _stage(b"# Guide\n\nStep one.\n\nStep two.")
+    monkeypatch.setattr(ingest_jobs, "chunk_markdown", lambda md, sections, *args: [
+        {"text": "Step one.", "heading_path": ["Guide"]},
+        {"text": "Step two.", "heading_path": ["Guide"]},
+    ])
+
+    async def embed(texts):
+        return [[0.1] * 4, None], {1: "boom"}
+
+    monkeypatch.setattr(ingest_jobs, "embed_documents", embed)
+
+    # When: Running the job
+    await ingest_jobs.process_job(_job(path))
+
+    # Then: Stages are reported in order, the job succeeds with the chunk error, file is removed
+    stages = [stage for stage, _, _ in fake_db["progress"]]
+    assert stages == ["chunking", "embedding", "embedding", "uploading", "writing"]
+    assert ("embedding", 2, None) in fake_db["progress"]
+    assert fake_db["finished"] == [("succeeded", 501, ["Chunk 2: boom"])]
+    assert fake_db["chunks"][0] == 501
+    assert not os.path.exists(path)
+    print("✅ Job progress recorded")
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_marked_failed(fake_db):
+    """An unusable file fails the job with a readable reason and removes the staged file"""
+    path = await _stage(b"   ")
+
+    await ingest_jobs.process_job(_job(path))
+
+    assert fake_db["finished"] == [("failed", None, ["Extracted document is empty"])]
+    assert not os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_job_gives_up_after_max_attempts(fake_db):
+    path = await _stage(b"# Guide")
+
+    await ingest_jobs.process_job(_job(path, attempts=ingest_jobs.INGEST_JOB_MAX_ATTEMPTS + 1))
+
+    status, _, errors = fake_db["finished"][0]
+    assert status == "failed"
+    assert "Gave up" in errors[0]
+
+
+@pytest.mark.asyncio
+async def test_stage_upload_streams_and_hashes(monkeypatch, tmp_path):
+    """The upload is copied block by block and hashed on the way"""
+    monkeypatch.setattr(ingest_jobs, "STAGING_DIR", str(tmp_path))
+    monkeypatch.setattr(ingest_jobs, "UPLOAD_COPY_CHUNK_BYTES", 1024)
+    data = b"x" * 5000
+
+    path, content_hash, size = await ingest_jobs.stage_upload(io.BytesIO(data))
+
+    assert size == 5000
+    assert content_hash == hashlib.sha256(data).hexdigest()
+    assert open(path, "rb").read() == data
+
+
+@pytest.mark.asyncio
+async def test_stage_upload_rejects_oversized_file(monkeypatch, tmp_path):
+    """Copying stops at the cap and leaves nothing behind"""
+    monkeypatch.setattr(ingest_jobs, "STAGING_DIR", str(tmp_path))
+    monkeypatch.setattr(ingest_jobs, "UPLOAD_COPY_CHUNK_BYTES", 1024)
+
+    with pytest.raises(ingest_jobs.UploadTooLarge):
+        await ingest_jobs.stage_upload(io.BytesIO(b"x" * 5000), max_bytes=4096)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_returns_202_with_job(monkeypatch, tmp_path):
+    """POST /api/upload queues a job instead of ingesting inline"""
+    monkeypatch.setattr(upload.auth, "verify_jwt", lambda token: "user-1")
+
+    async def is_manager(user_id, project_id):
+        return True
+
+    async def not_found(source_id):
+        return None
+
+    async def create_job(filename, project_id, visibility, *args):
+        return {"job_id": 88, "status": "queued", "visibility": visibility}, True
+
+    monkeypatch.setattr(upload.auth, "check_user_is_manager", is_manager)
+    monkeypatch.setattr(upload, "find_document_by_source", not_found)
+    monkeypatch.setattr(ingest_jobs.db, "create_ingest_job", create_job)
+    monkeypatch.setattr(ingest_jobs, "STAGING_DIR", str(tmp_path))
+
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/api")
+    response = TestClient(app).post(
+        "/api/upload",
+        files={"file": ("guide.md", b"# Guide", "text/markdown")},
+        headers={"Authorization": "Bearer token"},
+    )
+
+    assert response.status_code == 202
+    assert response.json()["status_url"] == "/api/upload/jobs/88"
+    assert len(os.listdir(tmp_path)) == 1  # staged for the worker
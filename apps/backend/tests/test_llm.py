@@ -4,11 +4,14 @@ Test LLM service
 Run with: pytest apps/backend/tests/test_llm.py -v
 """
 
+import asyncio
 import pytest
+from app.services import llm
 from app.services.llm import call_llm
 
 
-def test_call_llm_with_real_api():
+@pytest.mark.asyncio
+async def test_call_llm_with_real_api():
     """Test call_llm() with real Groq API + fake chunks"""
 
     # Given: Fake context chunks
@@ -21,7 +24,7 @@ def test_call_llm_with_real_api():
     query = "How do I deploy the Atlas API?"
 
     # When
-    answer = call_llm(query, fake_chunks)
+    answer = await call_llm(query, fake_chunks)
 
     # Then - Verify requirements from table:
     # Returns non-empty string
@@ -36,21 +39,23 @@ def test_call_llm_with_real_api():
     print(f"✅ call_llm() works! Answer preview: {answer[:100]}...")
 
 
-def test_call_llm_with_empty_context():
+@pytest.mark.asyncio
+async def test_call_llm_with_empty_context():
     """Test LLM with no context chunks"""
 
     query = "How do I deploy?"
     empty_chunks = []
 
     # When
-    answer = call_llm(query, empty_chunks)
+    answer = await call_llm(query, empty_chunks)
 
     # Then: Should still return a string (might say "insufficient context")
     assert isinstance(answer, str)
     assert len(answer) > 0
 
 
-def test_call_llm_long_context():
+@pytest.mark.asyncio
+async def test_call_llm_long_context():
     """Test LLM with many chunks"""
 
     # Given: 12 chunks (typical rerank output)
@@ -58,7 +63,7 @@ def test_call_llm_long_context():
     query = "How do I deploy?"
 
     # When
-    answer = call_llm(query, chunks)
+    answer = await call_llm(query, chunks)
 
     # Then
     assert isinstance(answer, str)
@@ -67,8 +72,157 @@ def test_call_llm_long_context():
     print(f"✅ call_llm() handles 12 chunks! Answer length: {len(answer)} chars")
 
 
+@pytest.mark.asyncio
+async def test_call_llm_concurrency_limit_and_queue_time(monkeypatch):
+    """Requests beyond the concurrency limit wait, and the wait is reported separately"""
+
+    class FakeCompletions:
+        active = 0
+        peak = 0
+
+        async def create(self, **kwargs):
+            FakeCompletions.active += 1
+            FakeCompletions.peak = max(FakeCompletions.peak, FakeCompletions.active)
+            await asyncio.sleep(0.05)
+            FakeCompletions.active -= 1
+
+            class Message:
+                content = "answer"
+
+            class Choice:
+                message = Message()
+
+            class Response:
+                choices = [Choice()]
+
+            return Response()
+
+    class FakeClient:
+        class chat:
+            completions = FakeCompletions()
+
+    monkeypatch.setattr(llm, "client", FakeClient())
+    monkeypatch.setattr(llm, "_semaphore", asyncio.Semaphore(2))
+
+    # When: 4 requests arrive at once with only 2 slots
+    timings = [{} for _ in range(4)]
+    answers = await asyncio.gather(*(call_llm("q", ["ctx"], t) for t in timings))
+
+    # Then: Never more than 2 in flight; late requests report queue time
+    assert answers == ["answer"] * 4
+    assert FakeCompletions.peak == 2
+    assert all("llm_queue_ms" in t and "llm_generation_ms" in t for t in timings)
+    assert max(t["llm_queue_ms"] for t in timings) >= 40
+
+
+@pytest.mark.asyncio
+async def test_call_llm_cancellation_frees_slot(monkeypatch):
+    """Cancelling a waiting caller (client disconnected) releases its slot"""
+
+    class HangingCompletions:
+        async def create(self, **kwargs):
+            await asyncio.sleep(60)
+
+    class FakeClient:
+        class chat:
+            completions = HangingCompletions()
+
+    semaphore = asyncio.Semaphore(1)
+    monkeypatch.setattr(llm, "client", FakeClient())
+    monkeypatch.setattr(llm, "_semaphore", semaphore)
+
+    task = asyncio.ensure_future(call_llm("q", ["ctx"]))
+    await asyncio.sleep(0.01)
+    assert semaphore.locked()
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert not semaphore.locked()
+
+
+
+class FakeStream:
+    """Groq-style async stream: yields the tokens, sleeping `delay` before each"""
+
+    def __init__(self, tokens, delay=0.0):
+        self.tokens = tokens
+        self.delay = delay
+        self.closed = False
+
+    async def __aiter__(self):
+        for token in self.tokens:
+            await asyncio.sleep(self.delay)
+            delta = type("Delta", (), {"content": token})()
+            yield type("Chunk", (), {"choices": [type("Choice", (), {"delta": delta})()]})()
+
+    async def close(self):
+        self.closed = True
+
+
+def fake_stream_client(stream):
+    class Completions:
+        async def create(self, **kwargs):
+            return stream
+
+    class FakeClient:
+        class chat:
+            completions = Completions()
+
+    return FakeClient()
+
+
+@pytest.mark.asyncio
+async def test_stream_timeout_ignores_slow_consumer(monkeypatch):
+    """A consumer that takes longer than LLM_TIMEOUT overall does not cut the stream"""
+    stream = FakeStream(["To ", "deploy, ", "run make."])
+    monkeypatch.setattr(llm, "client", fake_stream_client(stream))
+    monkeypatch.setattr(llm, "_semaphore", asyncio.Semaphore(1))
+    monkeypatch.setattr(llm, "LLM_TIMEOUT", 0.05)
+
+    # When: the consumer spends 0.03s per token (0.09s in total)
+    tokens = []
+    async for token in llm.stream_llm("q", ["ctx"]):
+        tokens.append(token)
+        await asyncio.sleep(0.03)
+
+    # Then
+    assert "".join(tokens) == "To deploy, run make."
+    assert stream.closed
+    print("✅ Slow consumer streamed the whole answer")
+
+
+@pytest.mark.asyncio
+async def test_stream_times_out_when_groq_stalls(monkeypatch):
+    stream = FakeStream(["To ", "deploy"], delay=0.2)
+    monkeypatch.setattr(llm, "client", fake_stream_client(stream))
+    monkeypatch.setattr(llm, "_semaphore", asyncio.Semaphore(1))
+    monkeypatch.setattr(llm, "LLM_TIMEOUT", 0.05)
+
+    with pytest.raises(TimeoutError):
+        async for _ in llm.stream_llm("q", ["ctx"]):
+            pass
+
+    assert stream.closed
+
+
 if __name__ == "__main__":
-    test_call_llm_with_real_api()
-    test_call_llm_with_empty_context()
-    test_call_llm_long_context()
-    print("All LLM tests passed!")
\ No newline at end of file
+    from app.services.llm import init_llm_client
+    asyncio.run(init_llm_client())
+    asyncio.run(test_call_llm_with_real_api())
+    asyncio.run(test_call_llm_with_empty_context())
+    asyncio.run(test_call_llm_long_context())
+    print("All LLM tests passed!")
+
+def test_build_messages_compact_prompt_is_shorter():
+    """The compact template carries the same context and question in fewer characters"""
+    chunks = ["To deploy the Atlas API, run 'make deploy'."]
+
+    full = llm.build_messages("How do I deploy?", chunks, compact=False)
+    compact = llm.build_messages("How do I deploy?", chunks, compact=True)
+
+    assert chunks[0] in compact[1]["content"]
+    assert "How do I deploy?" in compact[1]["content"]
+    assert len(compact[0]["content"]) * 3 < len(full[0]["content"])
+    print("✅ Compact prompt is shorter")
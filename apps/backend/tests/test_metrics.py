@@ -0,0 +1,56 @@
+"""
+Test Prometheus metrics
+
+Run with: pytest apps/backend/tests/test_metrics.py -v
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.core.metrics import track_call
+from app.main import app
+
+
+def calls(outcome):
+    return REGISTRY.get_sample_value(
+        "rag_external_calls_total", {"service": "test", "operation": "op", "outcome": outcome}
+    ) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_track_call_counts_outcomes():
+    """Successful, timed-out and failed calls are counted separately"""
+    before = {outcome: calls(outcome) for outcome in ("ok", "timeout", "error")}
+
+    with track_call("test", "op"):
+        await asyncio.sleep(0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        with track_call("test", "op"):
+            await asyncio.wait_for(asyncio.sleep(1), timeout=0.01)
+
+    with pytest.raises(ValueError):
+        with track_call("test", "op"):
+            raise ValueError("invalid api key")
+
+    assert calls("ok") == before["ok"] + 1
+    assert calls("timeout") == before["timeout"] + 1
+    assert calls("error") == before["error"] + 1
+    print("✅ External call outcomes counted")
+
+
+def test_metrics_endpoint_exposes_route_and_pool_metrics():
+    """GET /metrics returns Prometheus text with route histograms and pool gauges"""
+    client = TestClient(app)
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'rag_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert "rag_db_pool_idle" in body
+    assert "rag_answer_cache_hits_total" in body
+    assert "rag_search_coalesced_total" in body
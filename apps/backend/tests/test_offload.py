@@ -0,0 +1,78 @@
+"""
+Test the CPU offload pool (process workers, limits, PDF batching)
+
+Run with: pytest apps/backend/tests/test_offload.py -v
+"""
+
+import asyncio
+import time
+import pytest
+from app.services import offload
+
+
+def _spin(seconds):
+    # Busy loop (a sleep would be interrupted just the same, but this is what a stuck parser looks like)
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+    return "finished"
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    yield
+    offload.close_process_pool()
+
+
+def test_page_batches_cover_every_page_in_order():
+    assert offload.page_batches(60, 25) == [(1, 25), (26, 50), (51, 60)]
+    assert offload.page_batches(25, 25) == [(1, 25)]
+    assert offload.page_batches(0, 25) == []
+
+
+@pytest.mark.asyncio
+async def test_run_cpu_returns_result_without_blocking_loop():
+    """The event loop keeps running while a worker process is busy"""
+    # Given: A CPU-bound task in the pool and a ticker on the loop
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+
+    # When: Waiting for the task
+    result = await offload.run_cpu(_spin, 0.5, time_limit=10)
+    ticking.cancel()
+
+    # Then: The result arrives and the loop ticked meanwhile
+    assert result == "finished"
+    assert ticks > 10
+    print("✅ Loop not blocked by CPU work")
+
+
+@pytest.mark.asyncio
+async def test_run_cpu_enforces_time_limit():
+    """A runaway task is interrupted inside the worker"""
+    started = time.monotonic()
+
+    with pytest.raises(offload.OffloadTimeout):
+        await offload.run_cpu(_spin, 30, time_limit=1)
+
+    assert time.monotonic() - started < 10
+    # The worker survived and serves the next task
+    assert await offload.run_cpu(_spin, 0, time_limit=5) == "finished"
+
+
+@pytest.mark.asyncio
+async def test_extract_document_plain_text(tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text("# Notes\n\nHello")
+
+    markdown, sections = await offload.extract_document(str(path), "notes.md")
+
+    assert markdown == "# Notes\n\nHello"
+    assert sections[0]["heading_path"] == ["Document"]
@@ -0,0 +1,135 @@
+"""
+Test the adaptive rerank budget and rerank text truncation
+
+Run with: pytest apps/backend/tests/test_rerank_budget.py -v
+"""
+
+import logging
+from types import SimpleNamespace
+import pytest
+from app.services import retrieval
+from app.services.retrieval import choose_rerank_budget, score_elbow, truncate_for_rerank, rerank
+from app.core.constants import RERANK_CANDIDATES, RERANK_MIN_CANDIDATES, RERANK_CHARS_PER_TOKEN
+
+
+def candidates(scores):
+    return [
+        {"chunk_id": n, "text": f"Chunk {n}", "token_count": 3, "score": score}
+        for n, score in enumerate(scores)
+    ]
+
+
+# ============================================================================
+# Budget
+# ============================================================================
+
+def test_peaked_scores_get_a_small_budget():
+    """A handful of strong matches, then a flat tail: rerank little more than the floor"""
+    # Given: 5 strong matches, 95 weak ones
+    scores = [0.9 - 0.01 * i for i in range(5)] + [0.4 - 0.0005 * i for i in range(95)]
+
+    # When
+    budget = choose_rerank_budget(candidates(scores), top_k=12)
+
+    # Then
+    assert budget == RERANK_MIN_CANDIDATES
+    print(f"✅ Peaked scores: budget {budget} of {len(scores)}")
+
+
+def test_plateau_ends_at_elbow():
+    """60 similar matches, then a steep fall: rerank the plateau"""
+    scores = [0.8 - 0.0005 * i for i in range(60)] + [0.7 - 0.01 * i for i in range(40)]
+
+    budget = choose_rerank_budget(candidates(scores), top_k=12)
+
+    assert 55 <= budget <= 65
+
+
+def test_evenly_falling_scores_use_the_ceiling():
+    scores = [0.9 - 0.004 * i for i in range(150)]
+
+    assert score_elbow(scores[:RERANK_CANDIDATES]) is None
+    assert choose_rerank_budget(candidates(scores), top_k=12) == RERANK_CANDIDATES
+
+
+def test_budget_is_at_least_top_k():
+    scores = [0.9] + [0.3] * 99
+
+    assert choose_rerank_budget(candidates(scores), top_k=40) == 40
+
+
+def test_few_candidates_are_all_reranked():
+    assert choose_rerank_budget(candidates([0.9, 0.5, 0.1]), top_k=12) == 3
+
+
+def test_full_text_only_candidates_do_not_break_budget():
+    chunks = candidates([0.9 - 0.004 * i for i in range(50)])
+    chunks.insert(1, {"chunk_id": 999, "text": "ERR_4032", "token_count": 3, "text_rank": 0.7})
+
+    assert choose_rerank_budget(chunks, top_k=12) == len(chunks)
+
+
+def test_strong_match_low_in_fused_order_is_kept():
+    """The budget follows the fused list: a strong vector match fused down to 40th still gets reranked"""
+    # Given: peaked scores, but fusion moved one of the 5 strong matches to position 40
+    chunks = candidates([0.9 - 0.01 * i for i in range(5)] + [0.4 - 0.0005 * i for i in range(95)])
+    chunks.insert(40, chunks.pop(2))
+
+    # When
+    budget = choose_rerank_budget(chunks, top_k=12)
+
+    # Then
+    assert budget == 41
+    assert chunks[40]["score"] == pytest.approx(0.88)
+    print(f"✅ Budget {budget} reaches the strong match at fused position 40")
+
+
+# ============================================================================
+# Truncation
+# ============================================================================
+
+def test_chunks_that_fit_are_sent_whole():
+    chunk = {"text": "x" * 4000, "token_count": 400}
+
+    assert truncate_for_rerank(chunk, 512) == chunk["text"]
+    assert truncate_for_rerank({"text": "short", "token_count": None}, 512) == "short"
+
+
+def test_long_chunks_are_cut_to_the_window():
+    chunk = {"text": "deploy " * 200, "token_count": None}
+
+    text = truncate_for_rerank(chunk, 100)
+
+    assert len(text) == 100 * RERANK_CHARS_PER_TOKEN
+    assert chunk["text"].startswith(text)
+
+
+# ============================================================================
+# rerank()
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_rerank_sends_budget_and_logs_it(monkeypatch, caplog):
+    # Given: a peaked candidate list, one candidate far longer than the window
+    chunks = candidates([0.9 - 0.01 * i for i in range(5)] + [0.4 - 0.0005 * i for i in range(95)])
+    chunks[0] = dict(chunks[0], text="deploy " * 1000, token_count=1000)
+    sent = {}
+
+    async def fake_rerank(query, documents, model, top_n):
+        sent["documents"] = documents
+        sent["top_n"] = top_n
+        return [SimpleNamespace(index=i, relevance_score=1 - i / 10) for i in range(top_n)]
+
+    monkeypatch.setattr(retrieval.cohere_client, "rerank", fake_rerank)
+
+    # When
+    with caplog.at_level(logging.INFO, logger="app.services.retrieval"):
+        reranked = await rerank(chunks, "How do I deploy?", top_k=12)
+
+    # Then
+    assert len(sent["documents"]) == RERANK_MIN_CANDIDATES
+    assert len(sent["documents"][0]) == 512 * RERANK_CHARS_PER_TOKEN
+    assert reranked[0]["text"] == chunks[0]["text"]  # results keep the full text
+    assert len(reranked) == 12
+    assert f"Rerank budget: {RERANK_MIN_CANDIDATES} of 100" in caplog.text
+    print(f"✅ Sent {len(sent['documents'])} of {len(chunks)} candidates to rerank")
@@ -0,0 +1,129 @@
+"""
+Tests for the streaming search endpoint
+
+Tests POST /api/search/stream with all services mocked (no API credits used).
+
+Run with: pytest apps/backend/tests/test_search_stream.py -v
+"""
+
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api.routes import search
+from app.services import answer_cache
+from app.services.answer_cache import SemanticAnswerCache
+
+client = TestClient(app)
+
+
+def parse_events(body: str):
+    """Splits an SSE body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def mocked_pipeline(monkeypatch):
+    """Mocks auth, embeddings, retrieval, LLM and audit; returns the audit calls"""
+    audit_calls = []
+
+    async def fake_projects(user_id):
+        return ["Atlas"]
+
+    async def fake_embed(query):
+        return [0.1] * 1024
+
+    async def fake_search(**kwargs):
+        return [{
+            "chunk_id": 1, "doc_id": 10, "handover_id": None, "title": "Atlas Deploy Guide",
+            "text": "Run make deploy.", "uri": "https://notion.so/abc", "score": 0.8
+        }]
+
+    async def fake_fulltext(query, user_projects, user_id):
+        return []
+
+    async def fake_rerank(chunks, query, top_k):
+        return [dict(chunks[0], rerank_score=0.95)]
+
+    async def fake_stream(query, context_chunks, timings=None):
+        for token in ["To deploy", ", run", " `make deploy`."]:
+            yield token
+
+    async def fake_audit(user_id, query, used_doc_ids):
+        audit_calls.append((user_id, query, used_doc_ids))
+
+    async def fake_versions(doc_ids, handover_ids):
+        return {("document", doc_id): "v1" for doc_id in doc_ids}
+
+    monkeypatch.setattr(search.auth, "verify_jwt", lambda token: "user-1")
+    monkeypatch.setattr(search.auth, "get_user_projects", fake_projects)
+    monkeypatch.setattr(search.embeddings, "embed_query", fake_embed)
+    monkeypatch.setattr(search.retrieval, "run_vector_search", fake_search)
+    monkeypatch.setattr(search.retrieval, "run_fulltext_search", fake_fulltext)
+    monkeypatch.setattr(search.retrieval, "rerank", fake_rerank)
+    monkeypatch.setattr(search.llm, "stream_llm", fake_stream)
+    monkeypatch.setattr(search.audit, "audit_log", fake_audit)
+    monkeypatch.setattr(search.db, "fetch_source_versions", fake_versions)
+    monkeypatch.setattr(answer_cache, "answer_cache", SemanticAnswerCache())
+    return audit_calls
+
+
+def test_search_stream_event_order(mocked_pipeline):
+    """Citations come first, then tokens, then done with used_doc_ids and timings"""
+    response = client.post(
+        "/api/search/stream",
+        json={"query": "How do I deploy Atlas?"},
+        headers={"Authorization": "Bearer test"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(response.text)
+    names = [name for name, _ in events]
+    assert names == ["citations", "token", "token", "token", "done"]
+
+    assert events[0][1]["chunks"][0]["doc_id"] == 10
+    assert "".join(data["text"] for name, data in events if name == "token") == "To deploy, run `make deploy`."
+
+    done = events[-1][1]
+    assert done["used_doc_ids"] == [10]
+    assert {"embed_ms", "search_ms", "rerank_ms", "llm_ms", "total_ms"} <= set(done["timings"])
+
+    # Audit is still written for streamed answers
+    assert mocked_pipeline == [("user-1", "How do I deploy Atlas?", [10])]
+
+
+def test_search_stream_requires_auth(mocked_pipeline):
+    """Missing token is rejected before the stream opens"""
+    response = client.post("/api/search/stream", json={"query": "How do I deploy Atlas?"})
+    assert response.status_code == 401
+
+
+def test_search_stream_repeat_is_served_from_answer_cache(mocked_pipeline, monkeypatch):
+    """A second identical question replays the cached answer without rerank or LLM"""
+    # Given: One answered question
+    first = client.post("/api/search/stream", json={"query": "How do I deploy Atlas?"},
+                        headers={"Authorization": "Bearer test"})
+    assert parse_events(first.text)[-1][0] == "done"
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("pipeline should not run on a cache hit")
+
+    monkeypatch.setattr(search.retrieval, "rerank", fail)
+    monkeypatch.setattr(search.llm, "stream_llm", fail)
+
+    # When: The same question is asked again
+    second = client.post("/api/search/stream", json={"query": "How do I deploy Atlas?"},
+                         headers={"Authorization": "Bearer test"})
+
+    # Then: Same citations and answer, flagged as cached
+    events = parse_events(second.text)
+    assert [name for name, _ in events] == ["citations", "token", "done"]
+    assert events[1][1]["text"] == "To deploy, run `make deploy`."
+    assert events[-1][1]["cached"] is True
+    assert answer_cache.answer_cache.stats()["hits"] == 1
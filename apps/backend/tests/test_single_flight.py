@@ -0,0 +1,98 @@
+"""
+Test single-flight request coalescing
+
+Run with: pytest apps/backend/tests/test_single_flight.py -v
+"""
+
+import asyncio
+import pytest
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_execution():
+    """Callers with the same key get one execution's result"""
+    flights = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    # When: 10 identical requests arrive together, plus one different one
+    results = await asyncio.gather(
+        *(flights.do("deploy atlas", work) for _ in range(10)),
+        flights.do("reset password", work)
+    )
+
+    # Then
+    assert results == ["answer"] * 11
+    assert len(runs) == 2
+    assert flights.stats() == {"in_flight": 0, "executions": 2, "coalesced": 9}
+    print("✅ 10 requests → 1 execution")
+
+
+@pytest.mark.asyncio
+async def test_waiter_cancellation_does_not_abort_shared_work():
+    """One client disconnecting leaves the others with a result"""
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.1)
+        return "answer"
+
+    leader = asyncio.create_task(flights.do("q", work))
+    follower = asyncio.create_task(flights.do("q", work))
+    await asyncio.sleep(0.01)
+
+    # When: The first caller goes away
+    leader.cancel()
+
+    # Then: The second still gets the shared result
+    assert await follower == "answer"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_last_waiter_cancellation_cancels_work():
+    """When nobody is waiting any more, the shared work is stopped"""
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(flights.do("q", work))
+    await asyncio.sleep(0.01)
+    caller.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert flights.in_flight() == 0
+
+    # A new caller starts a fresh execution instead of joining the cancelled one
+    async def quick():
+        return "fresh"
+
+    assert await flights.do("q", quick) == "fresh"
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_key_is_released():
+    """Every waiter sees the failure, and the next call runs again"""
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("rerank failed")
+
+    results = await asyncio.gather(
+        flights.do("q", failing), flights.do("q", failing), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flights.in_flight() == 0
@@ -0,0 +1,106 @@
+"""
+Test request tracing (spans, Server-Timing, JSONL export)
+
+Run with: pytest apps/backend/tests/test_tracing.py -v
+"""
+
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.core import tracing
+from app.core.tracing import span, traced
+from app.main import app
+
+
+def test_spans_nest_and_sum_into_server_timing():
+    """Child spans point at their parent; same-name spans are summed"""
+    # Given: A trace with a nested span and two db.query spans
+    trace = tracing.start_trace("POST /api/search")
+    with span("vector_search"):
+        with span("db.query"):
+            pass
+        with span("db.query"):
+            pass
+    trace.root.end = trace.root.start + 0.5
+
+    # Then
+    outer, first, second = trace.spans
+    assert first.parent == outer.id and second.parent == outer.id
+    assert outer.parent == 0
+
+    header = trace.server_timing()
+    assert header.count("db.query;dur=") == 1
+    assert header.startswith("vector_search;dur=")
+    assert header.endswith("total;dur=500.0")
+    print("✅ Server-Timing:", header)
+
+
+@pytest.mark.asyncio
+async def test_spans_follow_tasks_and_decorated_functions():
+    """Spans recorded inside asyncio tasks attach to the span that started them"""
+    @traced("rerank")
+    async def rerank():
+        await asyncio.sleep(0)
+
+    trace = tracing.start_trace("POST /api/search")
+    with span("pipeline"):
+        await asyncio.gather(rerank(), rerank())
+
+    pipeline = trace.spans[0]
+    assert [s.name for s in trace.spans] == ["pipeline", "rerank", "rerank"]
+    assert all(s.parent == pipeline.id for s in trace.spans[1:])
+
+
+def test_spans_are_noops_outside_a_trace():
+    """Workers, tests and startup code run without a trace"""
+    tracing._current_trace.set(None)
+    with span("db.query") as current:
+        assert current is None
+
+
+@pytest.mark.asyncio
+async def test_export_is_sampled(tmp_path, monkeypatch):
+    """Sampled or slow traces are appended as JSON lines; others are dropped"""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "EXPORT_PATH", str(path))
+    monkeypatch.setattr(tracing, "SLOW_MS", 10_000)
+
+    # Not sampled, fast → dropped
+    monkeypatch.setattr(tracing, "SAMPLE_RATE", 0.0)
+    await tracing.finish_trace(tracing.start_trace("GET /health"))
+    assert not path.exists()
+
+    # Sampled → exported with its spans
+    monkeypatch.setattr(tracing, "SAMPLE_RATE", 1.0)
+    trace = tracing.start_trace("POST /api/search")
+    with span("embed", cached=True):
+        pass
+    await tracing.finish_trace(trace)
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    exported = json.loads(lines[0])
+    assert exported["name"] == "POST /api/search"
+    assert exported["spans"][0]["name"] == "embed"
+    assert exported["spans"][0]["attrs"] == {"cached": True}
+
+
+@pytest.mark.asyncio
+async def test_export_is_off_without_a_path(tmp_path, monkeypatch):
+    """Nothing is written unless TRACE_EXPORT_PATH is set"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tracing, "EXPORT_PATH", None)
+    monkeypatch.setattr(tracing, "SAMPLE_RATE", 1.0)
+
+    await tracing.finish_trace(tracing.start_trace("POST /api/search"))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_middleware_sets_server_timing_header(monkeypatch):
+    """Every response carries a Server-Timing header"""
+    monkeypatch.setattr(tracing, "SAMPLE_RATE", 0.0)
+    response = TestClient(app).get("/health")
+    assert response.status_code == 200
+    assert "total;dur=" in response.headers["server-timing"]
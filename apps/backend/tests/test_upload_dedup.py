@@ -0,0 +1,141 @@
+"""
+Test idempotent uploads (same file + project = same document)
+
+Run with: pytest apps/backend/tests/test_upload_dedup.py -v
+"""
+
+import hashlib
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.routes import upload
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    """Upload router with auth mocked and job queueing instrumented"""
+    calls = {"queued": 0, "reuse": []}
+
+    monkeypatch.setattr(upload.auth, "verify_jwt", lambda token: "user-1")
+
+    async def is_manager(user_id, project_id):
+        return True
+
+    async def enqueue(**kwargs):
+        calls["queued"] += 1
+        raise AssertionError("duplicate upload must not be re-ingested")
+
+    async def reuse(doc_id, visibility):
+        calls["reuse"].append((doc_id, visibility))
+
+    monkeypatch.setattr(upload.auth, "check_user_is_manager", is_manager)
+    monkeypatch.setattr(upload.ingest_jobs, "enqueue_upload", enqueue)
+    monkeypatch.setattr(upload.ingest_jobs, "STAGING_DIR", str(tmp_path))
+    monkeypatch.setattr(upload, "reuse_document", reuse)
+
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/api")
+    return TestClient(app), calls, tmp_path
+
+
+def test_source_id_depends_on_content_and_project():
+    """Same bytes in another project is a different document"""
+    content_hash = hashlib.sha256(b"report").hexdigest()
+
+    assert upload.upload_source_id(content_hash, "Atlas") == f"upload:Atlas:{content_hash}"
+    assert upload.upload_source_id(content_hash, "Atlas") != upload.upload_source_id(content_hash, "Phoenix")
+    assert upload.upload_source_id(content_hash, None) == f"upload:public:{content_hash}"
+    print("✅ Upload key = project + content hash")
+
+
+def test_duplicate_upload_returns_existing_document(client, monkeypatch):
+    """A repeated upload returns the stored document without queueing a job"""
+    # Given: The file is already indexed for this project
+    http, calls, staging = client
+    source_id = upload.upload_source_id(hashlib.sha256(b"%PDF-1.7 runbook").hexdigest(), "Atlas")
+
+    async def find(key):
+        assert key == source_id
+        return {"doc_id": 42, "title": "runbook.pdf", "visibility": "Public",
+                "deleted_at": None, "chunk_count": 18}
+
+    monkeypatch.setattr(upload, "find_document_by_source", find)
+
+    # When: Uploading it again with a new visibility
+    response = http.post(
+        "/api/upload",
+        files={"file": ("runbook.pdf", b"%PDF-1.7 runbook", "application/pdf")},
+        data={"project_id": "Atlas", "visibility": "Private"},
+        headers={"Authorization": "Bearer token"},
+    )
+
+    # Then: Existing document is returned, visibility applied, nothing queued or left on disk
+    assert response.status_code == 200
+    body = response.json()
+    assert body["doc_id"] == 42
+    assert body["duplicate"] is True
+    assert body["total_chunks"] == 18
+    assert calls["queued"] == 0
+    assert calls["reuse"] == [(42, "Private")]
+    assert list(staging.iterdir()) == []
+    print("✅ Duplicate upload short-circuits")
+
+
+def active_job(**extra):
+    return {"job_id": 88, "status": "running", "project_id": "Atlas", "visibility": "Public",
+            "uploaded_by": "user-2", **extra}
+
+
+def test_upload_joining_active_job_with_other_visibility_conflicts(client, monkeypatch):
+    """The active job keeps the first upload's visibility, so a different one is refused"""
+    # Given: Another manager's upload of the same file is still running as Public
+    http, calls, staging = client
+
+    async def find(key):
+        return None
+
+    async def enqueue(**kwargs):
+        await upload.ingest_jobs.discard_staged(kwargs["file_path"])
+        return active_job()
+
+    monkeypatch.setattr(upload, "find_document_by_source", find)
+    monkeypatch.setattr(upload.ingest_jobs, "enqueue_upload", enqueue)
+
+    # When
+    response = http.post(
+        "/api/upload",
+        files={"file": ("runbook.pdf", b"%PDF-1.7 runbook", "application/pdf")},
+        data={"project_id": "Atlas", "visibility": "Private"},
+        headers={"Authorization": "Bearer token"},
+    )
+
+    # Then
+    assert response.status_code == 409
+    assert "job 88" in response.json()["detail"]
+    assert list(staging.iterdir()) == []
+    print("✅ Visibility conflict with the active job reported")
+
+
+def test_job_status_is_visible_to_project_managers(client, monkeypatch):
+    """A manager who joined another manager's job can poll it; others get 404"""
+    http, calls, staging = client
+    managers = {("user-1", "Atlas")}
+
+    async def is_manager(user_id, project_id):
+        return (user_id, project_id) in managers
+
+    async def fetch(job_id):
+        return active_job(stage="embedding", chunks_done=3, chunks_total=10, doc_id=None, errors=[],
+                          attempts=1, filename="runbook.pdf", created_at=None, started_at=None,
+                          finished_at=None)
+
+    monkeypatch.setattr(upload.auth, "check_user_is_manager", is_manager)
+    monkeypatch.setattr(upload, "fetch_ingest_job", fetch)
+
+    response = http.get("/api/upload/jobs/88", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 200
+    assert response.json()["stage"] == "embedding"
+
+    managers.clear()
+    response = http.get("/api/upload/jobs/88", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 404
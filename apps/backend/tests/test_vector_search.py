@@ -0,0 +1,238 @@
+"""
+Test index-ordered vector search
+
+- Unit tests (no database): branch merge, settings, scores
+- EXPLAIN tests (test database): each branch is planned as HNSW index scans
+  over the user's chunk partitions only
+
+Run with: pytest apps/backend/tests/test_vector_search.py -v
+"""
+
+import json
+from contextlib import asynccontextmanager
+import pytest
+from app.db.client import transaction
+from app.services import retrieval
+from app.services.retrieval import (
+    DOCUMENT_BRANCH_SQL,
+    HANDOVER_BRANCH_SQL,
+    HNSW_SETTINGS_SQL,
+    run_vector_search,
+    document_partition_keys,
+    ef_search_for,
+)
+
+TEST_USER_ID = "550e8400-e29b-41d4-a716-446655440000"
+QUERY_VECTOR = [0.1] * 1024
+
+
+def row(chunk_id, distance, source_type="document"):
+    return {
+        "chunk_id": chunk_id,
+        "doc_id": chunk_id if source_type == "document" else None,
+        "handover_id": chunk_id if source_type == "handover" else None,
+        "title": f"Source {chunk_id}",
+        "text": f"Chunk {chunk_id}",
+        "uri": "https://notion.so/x",
+        "heading_path": [],
+        "order_in_doc": 0,
+        "token_count": 10,
+        "source_type": source_type,
+        "distance": distance,
+    }
+
+
+class FakeConnection:
+    def __init__(self, rows_by_sql):
+        self.rows_by_sql = rows_by_sql
+        self.settings = []
+        self.queries = []
+        self.transactions = 0
+
+    async def execute(self, sql, *args):
+        self.settings.append(args)
+
+    async def fetch(self, sql, *args):
+        self.queries.append((sql, args))
+        return self.rows_by_sql[sql]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    conn = FakeConnection({
+        DOCUMENT_BRANCH_SQL: [row(1, 0.10), row(2, 0.30), row(3, 0.50)],
+        HANDOVER_BRANCH_SQL: [row(7, 0.20, "handover"), row(8, 0.60, "handover")],
+    })
+
+    @asynccontextmanager
+    async def fake_transaction():
+        conn.transactions += 1
+        yield conn
+
+    monkeypatch.setattr(retrieval, "transaction", fake_transaction)
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_branches_are_merged_by_distance(fake_db):
+    # When
+    results = await run_vector_search(QUERY_VECTOR, ["Atlas"], TEST_USER_ID, top_k=4)
+
+    # Then: interleaved by distance, cut to top_k, score = 1 - distance
+    assert [r["chunk_id"] for r in results] == [1, 7, 2, 3]
+    assert [r["source_type"] for r in results] == ["document", "handover", "document", "document"]
+    assert results[0]["score"] == pytest.approx(0.9)
+    assert "distance" not in results[0]
+    print("✅ Branches merged by distance")
+
+
+@pytest.mark.asyncio
+async def test_branches_share_one_transaction(fake_db):
+    """One pool connection per search: settings applied once, then both branches in turn"""
+    await run_vector_search(QUERY_VECTOR, ["Atlas"], TEST_USER_ID, top_k=200)
+
+    assert fake_db.transactions == 1
+    assert len(fake_db.settings) == 1
+    mode, ef_search, max_tuples = fake_db.settings[0]
+    assert mode == "relaxed_order"
+    assert ef_search == "200"
+    assert int(max_tuples) > 0
+    assert [sql for sql, _ in fake_db.queries] == [DOCUMENT_BRANCH_SQL, HANDOVER_BRANCH_SQL]
+
+
+def test_document_partition_keys():
+    assert document_partition_keys([]) == ["public"]
+    assert document_partition_keys(["Atlas", "Phoenix"]) == ["public", "project:Atlas", "project:Phoenix"]
+
+
+@pytest.mark.asyncio
+async def test_document_branch_gets_partition_keys(fake_db):
+    await run_vector_search(QUERY_VECTOR, ["Atlas"], TEST_USER_ID, top_k=10)
+
+    assert (DOCUMENT_BRANCH_SQL, (QUERY_VECTOR, ["public", "project:Atlas"], 10)) in fake_db.queries
+
+
+def test_ef_search_bounds():
+    assert ef_search_for(12) == 40
+    assert ef_search_for(200) == 200
+    assert ef_search_for(5000) == 1000
+
+
+# ============================================================================
+# EXPLAIN (test database)
+# ============================================================================
+
+def index_names(plan):
+    """All index names used anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    names = set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            names.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return names
+
+
+def relation_names(plan):
+    """All tables (partitions) scanned anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    names = set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Relation Name" in node:
+            names.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return names
+
+
+def limit_subtree_joins(plan):
+    """Join node types below the LIMIT that drives the index walk (the ANN subquery)."""
+    def find_limit(node):
+        if node["Node Type"] == "Limit":
+            return node
+        for child in node.get("Plans", []):
+            found = find_limit(child)
+            if found:
+                return found
+        return None
+
+    joins = []
+    nodes = [find_limit(plan[0]["Plan"])]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] in ("Nested Loop", "Hash Join", "Merge Join"):
+            joins.append(node["Node Type"])
+        nodes.extend(node.get("Plans", []))
+    return joins
+
+
+async def explain(sql, *args):
+    """
+    EXPLAIN a branch with the search settings.
+
+    The test database is tiny, so on cost alone the planner would rather
+    scan and sort; enable_seqscan = off asks whether the query shape CAN be
+    answered from the index (the old UNION query could not).
+    """
+    async with transaction() as conn:
+        await conn.execute(HNSW_SETTINGS_SQL, "relaxed_order", "200", "20000")
+        await conn.execute("SET LOCAL enable_seqscan = off")
+        plan = await conn.fetchval("EXPLAIN (FORMAT JSON) " + sql, *args)
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+async def partition_name(project_id):
+    async with transaction() as conn:
+        return await conn.fetchval("SELECT chunk_partition_name($1)", project_id)
+
+
+@pytest.mark.asyncio
+async def test_document_branch_scans_only_user_partitions():
+    """Public plus the user's project: other projects' partitions are pruned"""
+    # When
+    plan = await explain(DOCUMENT_BRANCH_SQL, QUERY_VECTOR, document_partition_keys(["Atlas"]), 200)
+
+    # Then
+    chunk_partitions = {name for name in relation_names(plan) if name.startswith("chunks_")}
+    assert chunk_partitions == {"chunks_public", await partition_name("Atlas")}
+    assert "chunks_public_embedding_idx" in index_names(plan)
+    assert all(name.endswith("_embedding_idx") for name in index_names(plan) if name.startswith("chunks_"))
+    print(f"✅ Document branch: HNSW scans on {sorted(chunk_partitions)}")
+
+
+@pytest.mark.asyncio
+async def test_handover_branch_scans_handover_partition():
+    plan = await explain(HANDOVER_BRANCH_SQL, QUERY_VECTOR, TEST_USER_ID, 200)
+
+    assert {name for name in relation_names(plan) if name.startswith("chunks_")} == {"chunks_handovers"}
+    assert "chunks_handovers_embedding_idx" in index_names(plan)
+    print("✅ Handover branch: index scan on chunks_handovers_embedding_idx")
+
+
+@pytest.mark.asyncio
+async def test_index_walk_filters_on_chunk_row_alone():
+    """ACL columns live on chunks: no join under the LIMIT, titles are joined for k rows only"""
+    document_plan = await explain(DOCUMENT_BRANCH_SQL, QUERY_VECTOR, document_partition_keys(["Atlas"]), 200)
+    handover_plan = await explain(HANDOVER_BRANCH_SQL, QUERY_VECTOR, TEST_USER_ID, 200)
+
+    assert limit_subtree_joins(document_plan) == []
+    assert limit_subtree_joins(handover_plan) == []
+
+
+@pytest.mark.asyncio
+async def test_union_ordered_by_score_cannot_use_index():
+    """The previous query shape: ORDER BY a computed alias across a UNION ALL"""
+    union_sql = """
+        (SELECT c.chunk_id, 1 - (c.embedding <=> $1::vector) AS score
+         FROM chunks c JOIN documents d ON d.doc_id = c.doc_id WHERE d.project_id = ANY($2))
+        UNION ALL
+        (SELECT c.chunk_id, 1 - (c.embedding <=> $1::vector) AS score
+         FROM chunks c WHERE c.handover_id IS NOT NULL)
+        ORDER BY score DESC
+        LIMIT $3
+    """
+
+    plan = await explain(union_sql, QUERY_VECTOR, ["Atlas"], 200)
+
+    assert not any(name.endswith("_embedding_idx") for name in index_names(plan))
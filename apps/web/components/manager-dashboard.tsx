@@ -148,7 +148,12 @@ function UploadSection() {
         visibility
       )
 
-      setUploadStatus(`✅ Successfully uploaded "${result.title}" - ${result.chunks_created} chunks created!`)
+      if (result.job_id) {
+        // Ingestion runs in the background (GET /api/upload/jobs/:job_id for progress)
+        setUploadStatus(`⏳ "${result.title}" uploaded - indexing in the background`)
+      } else {
+        setUploadStatus(`✅ "${result.title}" is already indexed (${result.total_chunks} chunks)`)
+      }
 
       // Refresh documents list
       const docs = await listDocuments()
@@ -0,0 +1,37 @@
+-- ============================================================================
+-- Migration: Add Content-Addressed Embedding Cache
+-- ============================================================================
+-- Maps sha256(model, input_type, chunk text) → embedding vector.
+-- Shared by the backend upload pipeline and the Notion ingestion worker, so
+-- unchanged chunk text is never sent to Cohere twice (re-uploads, re-syncs).
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+  content_hash TEXT PRIMARY KEY,      -- sha256 hex of model + input_type + text
+  model TEXT NOT NULL,                -- e.g. 'embed-english-v3.0'
+  input_type TEXT NOT NULL,           -- e.g. 'search_document'
+  embedding VECTOR(1024) NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Lets old entries be purged when the embedding model changes
+CREATE INDEX IF NOT EXISTS embedding_cache_model_idx ON embedding_cache(model);
+
+COMMIT;
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- Key format (must match backend and workers):
+--   sha256("{model}\n{input_type}\n{text}") as lowercase hex
+--
+-- Lookups are done in bulk, one query per embedding batch:
+--   SELECT content_hash, embedding FROM embedding_cache WHERE content_hash = ANY($1)
+--
+-- Purging after a model upgrade:
+--   DELETE FROM embedding_cache WHERE model <> 'embed-english-v3.0';
+--
+-- ============================================================================
@@ -0,0 +1,22 @@
+-- ============================================================================
+-- Migration: Store Token Count per Chunk
+-- ============================================================================
+-- The chunker already counts tokens (cl100k_base) at ingest time. Storing the
+-- count lets the backend pack LLM context to a token budget without
+-- re-tokenizing chunk text on every search.
+-- ============================================================================
+
+BEGIN;
+
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS token_count INT;
+
+COMMIT;
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- Existing rows keep token_count = NULL; the backend falls back to an
+-- estimate (~4 characters per token) for them until they are re-ingested.
+--
+-- ============================================================================
@@ -0,0 +1,66 @@
+-- ============================================================================
+-- Migration: Add Background Ingestion Jobs
+-- ============================================================================
+-- POST /api/upload now stages the file and returns 202 with a job id. Worker
+-- tasks (in the API process or `python -m app.services.ingest_jobs`) claim
+-- queued jobs with FOR UPDATE SKIP LOCKED and run extraction, chunking,
+-- embedding and the database writes. GET /api/upload/jobs/{id} reports
+-- progress from this table.
+-- ============================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+  job_id BIGSERIAL PRIMARY KEY,
+  status TEXT NOT NULL DEFAULT 'queued'
+    CHECK (status IN ('queued','running','succeeded','failed')),
+  stage TEXT NOT NULL DEFAULT 'queued',     -- queued → extracting → chunking → embedding → uploading → writing → done
+  filename TEXT NOT NULL,
+  project_id TEXT REFERENCES projects(project_id),
+  visibility TEXT NOT NULL CHECK (visibility IN ('Public','Private')),
+  uploaded_by UUID REFERENCES employees(employee_id),
+  source_external_id TEXT NOT NULL,         -- upload:<project>:<sha256>, becomes documents.source_external_id
+  content_hash TEXT NOT NULL,
+  file_path TEXT,                           -- staged file, removed when the job finishes
+  doc_id BIGINT REFERENCES documents(doc_id) ON DELETE SET NULL,
+  chunks_total INT,
+  chunks_done INT NOT NULL DEFAULT 0,
+  errors TEXT[] NOT NULL DEFAULT '{}',
+  attempts INT NOT NULL DEFAULT 0,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  started_at TIMESTAMPTZ,
+  heartbeat_at TIMESTAMPTZ,                 -- bumped on every progress update
+  finished_at TIMESTAMPTZ
+);
+
+-- Queue scan for workers
+CREATE INDEX IF NOT EXISTS ingest_jobs_pending_idx ON ingest_jobs(job_id)
+  WHERE status IN ('queued','running');
+
+-- At most one active job per file + project (repeated uploads join it)
+CREATE UNIQUE INDEX IF NOT EXISTS ingest_jobs_active_source_unique ON ingest_jobs(source_external_id)
+  WHERE status IN ('queued','running');
+
+COMMIT;
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- Claiming a job (one statement, safe with many workers):
+--   UPDATE ingest_jobs SET status = 'running', ...
+--   WHERE job_id = (SELECT job_id FROM ingest_jobs
+--                   WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < <lease>)
+--                   ORDER BY job_id FOR UPDATE SKIP LOCKED LIMIT 1)
+--   RETURNING *;
+--
+-- A 'running' job whose heartbeat is older than the lease (worker crashed)
+-- is claimed again; it fails for good after INGEST_JOB_MAX_ATTEMPTS.
+--
+-- Staged files live on the API host's disk (UPLOAD_STAGING_DIR), so separate
+-- worker processes must run on the same host or share that directory.
+--
+-- Cleaning up old jobs:
+--   DELETE FROM ingest_jobs WHERE finished_at < now() - interval '30 days';
+--
+-- ============================================================================
@@ -0,0 +1,40 @@
+-- ============================================================================
+-- Migration: Index-Ordered Vector Search (documents and handovers)
+-- ============================================================================
+-- run_vector_search() now runs documents and handovers as two queries, each
+-- `ORDER BY embedding <=> $1 LIMIT k`, so each can walk an HNSW index:
+--   - documents: chunks_embedding_hnsw (existing)
+--   - handovers: chunks_handover_embedding_hnsw (new, partial), so the
+--     handover branch does not walk the far larger set of document vectors
+--
+-- ACL-filtered branches use pgvector iterative index scans
+-- (hnsw.iterative_scan, set per query), which need pgvector >= 0.8.0.
+-- ============================================================================
+
+BEGIN;
+
+-- No-op when the installed version is already the newest available
+ALTER EXTENSION vector UPDATE;
+
+CREATE INDEX IF NOT EXISTS chunks_handover_embedding_hnsw
+  ON chunks USING hnsw (embedding vector_cosine_ops)
+  WHERE handover_id IS NOT NULL;
+
+COMMIT;
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- Check the installed pgvector version (must be >= 0.8.0):
+--   SELECT extversion FROM pg_extension WHERE extname = 'vector';
+--
+-- Check a branch uses the index (look for "Index Scan using chunks_embedding_hnsw"):
+--   BEGIN;
+--   SET LOCAL hnsw.iterative_scan = relaxed_order;
+--   EXPLAIN SELECT c.chunk_id FROM chunks c JOIN documents d ON d.doc_id = c.doc_id
+--   WHERE d.deleted_at IS NULL AND (d.visibility = 'Public' OR d.project_id = ANY('{Atlas}'))
+--   ORDER BY c.embedding <=> (SELECT embedding FROM chunks LIMIT 1) LIMIT 200;
+--   ROLLBACK;
+--
+-- ============================================================================
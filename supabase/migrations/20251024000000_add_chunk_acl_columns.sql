@@ -0,0 +1,151 @@
+-- ============================================================================
+-- Migration: Denormalized ACL Columns on Chunks
+-- ============================================================================
+-- Vector search used to join chunks to documents / handovers to check who
+-- may see each candidate. Chunks now carry their own copy of those fields,
+-- so the ANN query filters on the chunk row alone (join-free while walking
+-- the HNSW index; titles are joined for the k results only).
+--
+--   visibility  'Public' / 'Private' (document chunks; NULL for handovers)
+--   project_id  document's project (NULL for handovers)
+--   is_deleted  document is soft-deleted (deleted_at IS NOT NULL)
+--   principals  handover chunks: sender, recipient and CC'd employees
+--
+-- Triggers keep them in sync:
+--   - chunks_fill_acl: fills them on INSERT (also for COPY) and when a chunk
+--     is moved to another document / handover
+--   - documents_sync_chunk_acl: visibility, project or deleted_at changes
+--   - handovers_sync_chunk_acl: sender, recipient or CC list changes
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Columns
+-- ============================================================================
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS visibility TEXT;
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS project_id TEXT;
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS is_deleted BOOLEAN NOT NULL DEFAULT false;
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS principals UUID[];
+
+-- ============================================================================
+-- 2. Backfill
+-- ============================================================================
+UPDATE chunks c
+SET visibility = d.visibility,
+    project_id = d.project_id,
+    is_deleted = d.deleted_at IS NOT NULL
+FROM documents d
+WHERE d.doc_id = c.doc_id;
+
+UPDATE chunks c
+SET principals = array_remove(
+      ARRAY[h.from_employee_id, h.to_employee_id] || COALESCE(h.cc_employee_ids, '{}'), NULL
+    )
+FROM handovers h
+WHERE h.handover_id = c.handover_id;
+
+-- ============================================================================
+-- 3. Triggers
+-- ============================================================================
+CREATE OR REPLACE FUNCTION chunks_fill_acl() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF NEW.doc_id IS NOT NULL THEN
+    SELECT d.visibility, d.project_id, d.deleted_at IS NOT NULL
+      INTO NEW.visibility, NEW.project_id, NEW.is_deleted
+      FROM documents d
+     WHERE d.doc_id = NEW.doc_id;
+    NEW.principals := NULL;
+  ELSE
+    SELECT array_remove(ARRAY[h.from_employee_id, h.to_employee_id] || COALESCE(h.cc_employee_ids, '{}'), NULL)
+      INTO NEW.principals
+      FROM handovers h
+     WHERE h.handover_id = NEW.handover_id;
+    NEW.visibility := NULL;
+    NEW.project_id := NULL;
+    NEW.is_deleted := false;
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS chunks_fill_acl ON chunks;
+CREATE TRIGGER chunks_fill_acl
+  BEFORE INSERT OR UPDATE OF doc_id, handover_id ON chunks
+  FOR EACH ROW EXECUTE FUNCTION chunks_fill_acl();
+
+CREATE OR REPLACE FUNCTION documents_sync_chunk_acl() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE chunks
+     SET visibility = NEW.visibility,
+         project_id = NEW.project_id,
+         is_deleted = NEW.deleted_at IS NOT NULL
+   WHERE doc_id = NEW.doc_id;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS documents_sync_chunk_acl ON documents;
+CREATE TRIGGER documents_sync_chunk_acl
+  AFTER UPDATE OF visibility, project_id, deleted_at ON documents
+  FOR EACH ROW
+  WHEN (
+    OLD.visibility IS DISTINCT FROM NEW.visibility
+    OR OLD.project_id IS DISTINCT FROM NEW.project_id
+    OR (OLD.deleted_at IS NULL) <> (NEW.deleted_at IS NULL)
+  )
+  EXECUTE FUNCTION documents_sync_chunk_acl();
+
+CREATE OR REPLACE FUNCTION handovers_sync_chunk_acl() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE chunks
+     SET principals = array_remove(
+           ARRAY[NEW.from_employee_id, NEW.to_employee_id] || COALESCE(NEW.cc_employee_ids, '{}'), NULL
+         )
+   WHERE handover_id = NEW.handover_id;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS handovers_sync_chunk_acl ON handovers;
+CREATE TRIGGER handovers_sync_chunk_acl
+  AFTER UPDATE OF from_employee_id, to_employee_id, cc_employee_ids ON handovers
+  FOR EACH ROW
+  WHEN (
+    OLD.from_employee_id IS DISTINCT FROM NEW.from_employee_id
+    OR OLD.to_employee_id IS DISTINCT FROM NEW.to_employee_id
+    OR OLD.cc_employee_ids IS DISTINCT FROM NEW.cc_employee_ids
+  )
+  EXECUTE FUNCTION handovers_sync_chunk_acl();
+
+-- ============================================================================
+-- 4. Indexes
+-- ============================================================================
+-- Handover branch: principals @> ARRAY[user_id]
+CREATE INDEX IF NOT EXISTS chunks_principals_gin ON chunks USING gin (principals);
+
+-- Document branch, when the planner prefers an exact scan of a small project
+CREATE INDEX IF NOT EXISTS chunks_project_idx ON chunks(project_id) WHERE NOT is_deleted;
+
+COMMIT;
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- Ingestion code does not set these columns: chunks_fill_acl copies them
+-- from the parent row on every insert (COPY included).
+--
+-- Documents are hard-deleted with ON DELETE CASCADE, which removes their
+-- chunks; is_deleted only mirrors soft deletes (deleted_at).
+--
+-- Check that no chunk is out of sync (should return 0):
+--   SELECT count(*) FROM chunks c JOIN documents d ON d.doc_id = c.doc_id
+--   WHERE c.visibility IS DISTINCT FROM d.visibility
+--      OR c.project_id IS DISTINCT FROM d.project_id
+--      OR c.is_deleted <> (d.deleted_at IS NOT NULL);
+--
+-- ============================================================================
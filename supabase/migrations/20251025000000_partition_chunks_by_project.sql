@@ -0,0 +1,267 @@
+-- ============================================================================
+-- Migration: Project-Partitioned Chunks
+-- ============================================================================
+-- One HNSW index over every chunk made a private-project search walk other
+-- projects' vectors and throw them away. chunks is now LIST-partitioned by
+-- partition_key, and every partition has its own HNSW index:
+--
+--   chunks_public          'public'          Public document chunks
+--   chunks_handovers       'handover'        handover chunks
+--   chunks_project_<name>  'project:<id>'    Private chunks of one project
+--   chunks_default         (anything else)   Private documents without a project
+--
+-- run_vector_search() filters on partition_key = ANY('{public, project:...}')
+-- so Postgres prunes the search to the user's projects plus Public.
+--
+-- Project partitions are created by create_chunk_partition(project_id),
+-- called here for every existing project and by a trigger on projects for
+-- new ones.
+--
+-- Migration path: the old table is renamed, its rows copied into the
+-- partitioned table (partition_key derived from the ACL columns added in
+-- 20251024000000), then dropped. chunk_id values and the sequence are kept.
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Partition key functions
+-- ============================================================================
+-- Partition of a chunk, from its own ACL columns (used by the CHECK below)
+CREATE OR REPLACE FUNCTION chunk_partition_key(p_visibility TEXT, p_project_id TEXT, p_handover_id BIGINT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+  SELECT CASE
+    WHEN p_handover_id IS NOT NULL THEN 'handover'
+    WHEN p_visibility = 'Public' THEN 'public'
+    ELSE 'project:' || COALESCE(p_project_id, '')
+  END
+$$;
+
+-- Partition of a new chunk, from its parent row (used by ingestion)
+CREATE OR REPLACE FUNCTION chunk_partition_key_for(p_doc_id BIGINT, p_handover_id BIGINT)
+RETURNS TEXT
+LANGUAGE sql STABLE AS $$
+  SELECT CASE
+    WHEN p_handover_id IS NOT NULL THEN 'handover'
+    ELSE (
+      SELECT chunk_partition_key(d.visibility, d.project_id, NULL)
+      FROM documents d
+      WHERE d.doc_id = p_doc_id
+    )
+  END
+$$;
+
+-- Table name of a project's partition: readable, unique, within 63 bytes
+CREATE OR REPLACE FUNCTION chunk_partition_name(p_project_id TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+  SELECT 'chunks_project_'
+         || left(trim(both '_' from regexp_replace(lower(p_project_id), '[^a-z0-9]+', '_', 'g')), 32)
+         || '_' || left(md5(p_project_id), 8)
+$$;
+
+-- ============================================================================
+-- 2. Partitioned table
+-- ============================================================================
+LOCK TABLE chunks IN ACCESS EXCLUSIVE MODE;
+
+-- Keep the sequence when the old table is dropped
+ALTER SEQUENCE chunks_chunk_id_seq OWNED BY NONE;
+ALTER TABLE chunks RENAME TO chunks_unpartitioned;
+
+CREATE TABLE chunks (
+  chunk_id BIGINT NOT NULL DEFAULT nextval('chunks_chunk_id_seq'),
+  doc_id BIGINT,
+  handover_id BIGINT,
+  heading_path TEXT[],
+  order_in_doc INT NOT NULL,
+  page INT,
+  text TEXT NOT NULL,
+  embedding VECTOR(1024) NOT NULL,
+  token_count INT,
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  visibility TEXT,
+  project_id TEXT,
+  is_deleted BOOLEAN NOT NULL DEFAULT false,
+  principals UUID[],
+  partition_key TEXT NOT NULL
+) PARTITION BY LIST (partition_key);
+
+CREATE TABLE chunks_public PARTITION OF chunks FOR VALUES IN ('public');
+CREATE TABLE chunks_handovers PARTITION OF chunks FOR VALUES IN ('handover');
+CREATE TABLE chunks_default PARTITION OF chunks DEFAULT;
+
+-- ============================================================================
+-- 3. Project partitions
+-- ============================================================================
+CREATE OR REPLACE FUNCTION create_chunk_partition(p_project_id TEXT) RETURNS TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+  partition_name TEXT := chunk_partition_name(p_project_id);
+  partition_value TEXT := chunk_partition_key('Private', p_project_id, NULL);
+BEGIN
+  IF to_regclass(partition_name) IS NOT NULL THEN
+    RETURN partition_name;
+  END IF;
+
+  -- Rows of this project may already sit in the default partition: move
+  -- them into the new table before attaching it (indexes are built on attach)
+  EXECUTE format('CREATE TABLE %I (LIKE chunks INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name);
+  EXECUTE format(
+    'WITH moved AS (DELETE FROM chunks_default WHERE partition_key = %L RETURNING *) '
+    'INSERT INTO %I SELECT * FROM moved',
+    partition_value, partition_name
+  );
+  EXECUTE format('ALTER TABLE chunks ATTACH PARTITION %I FOR VALUES IN (%L)', partition_name, partition_value);
+
+  RETURN partition_name;
+END;
+$$;
+
+SELECT create_chunk_partition(project_id) FROM projects;
+
+CREATE OR REPLACE FUNCTION projects_create_chunk_partition() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  PERFORM create_chunk_partition(NEW.project_id);
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS projects_create_chunk_partition ON projects;
+CREATE TRIGGER projects_create_chunk_partition
+  AFTER INSERT ON projects
+  FOR EACH ROW EXECUTE FUNCTION projects_create_chunk_partition();
+
+-- ============================================================================
+-- 4. Copy existing chunks
+-- ============================================================================
+-- Before any index or trigger exists on the new table: a plain bulk load,
+-- ACL columns as maintained on the old table
+INSERT INTO chunks (
+  chunk_id, doc_id, handover_id, heading_path, order_in_doc, page, text, embedding,
+  token_count, updated_at, visibility, project_id, is_deleted, principals, partition_key
+)
+SELECT
+  chunk_id, doc_id, handover_id, heading_path, order_in_doc, page, text, embedding,
+  token_count, updated_at, visibility, project_id, is_deleted, principals,
+  chunk_partition_key(visibility, project_id, handover_id)
+FROM chunks_unpartitioned;
+
+DROP TABLE chunks_unpartitioned;
+ALTER SEQUENCE chunks_chunk_id_seq OWNED BY chunks.chunk_id;
+
+-- ============================================================================
+-- 5. Constraints
+-- ============================================================================
+-- Unique constraints on a partitioned table must include the partition key
+-- (all chunks of one document share a partition, so these stay unique)
+ALTER TABLE chunks ADD CONSTRAINT chunks_pkey PRIMARY KEY (chunk_id, partition_key);
+CREATE UNIQUE INDEX chunks_doc_order_unique ON chunks(doc_id, order_in_doc, partition_key);
+
+ALTER TABLE chunks ADD CONSTRAINT chunks_doc_id_fkey
+  FOREIGN KEY (doc_id) REFERENCES documents(doc_id) ON DELETE CASCADE;
+ALTER TABLE chunks ADD CONSTRAINT chunks_handover_id_fkey
+  FOREIGN KEY (handover_id) REFERENCES handovers(handover_id) ON DELETE CASCADE;
+
+ALTER TABLE chunks ADD CONSTRAINT chunks_source_check
+  CHECK (
+    (doc_id IS NOT NULL AND handover_id IS NULL) OR
+    (doc_id IS NULL AND handover_id IS NOT NULL)
+  );
+
+-- A chunk inserted with the wrong partition_key fails here, after
+-- chunks_fill_acl has filled the ACL columns from its parent
+ALTER TABLE chunks ADD CONSTRAINT chunks_partition_key_check
+  CHECK (partition_key = chunk_partition_key(visibility, project_id, handover_id));
+
+-- ============================================================================
+-- 6. Indexes
+-- ============================================================================
+-- One HNSW index per partition (chunks_public_embedding_idx, ...)
+CREATE INDEX chunks_embedding_hnsw ON chunks USING hnsw (embedding vector_cosine_ops);
+CREATE INDEX chunks_handover_idx ON chunks(handover_id);
+
+-- Handover branch: principals @> ARRAY[user_id]
+CREATE INDEX chunks_handovers_principals_gin ON chunks_handovers USING gin (principals);
+
+-- ============================================================================
+-- 7. ACL triggers
+-- ============================================================================
+CREATE OR REPLACE FUNCTION chunks_fill_acl() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF NEW.doc_id IS NOT NULL THEN
+    SELECT d.visibility, d.project_id, d.deleted_at IS NOT NULL
+      INTO NEW.visibility, NEW.project_id, NEW.is_deleted
+      FROM documents d
+     WHERE d.doc_id = NEW.doc_id;
+    NEW.principals := NULL;
+  ELSE
+    SELECT array_remove(ARRAY[h.from_employee_id, h.to_employee_id] || COALESCE(h.cc_employee_ids, '{}'), NULL)
+      INTO NEW.principals
+      FROM handovers h
+     WHERE h.handover_id = NEW.handover_id;
+    NEW.visibility := NULL;
+    NEW.project_id := NULL;
+    NEW.is_deleted := false;
+  END IF;
+  -- Inserts are routed before this trigger runs, so inserters supply
+  -- partition_key; a chunk moved to another parent is re-routed here
+  IF TG_OP = 'UPDATE' THEN
+    NEW.partition_key := chunk_partition_key(NEW.visibility, NEW.project_id, NEW.handover_id);
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER chunks_fill_acl
+  BEFORE INSERT OR UPDATE OF doc_id, handover_id ON chunks
+  FOR EACH ROW EXECUTE FUNCTION chunks_fill_acl();
+
+-- Visibility or project changes move the document's chunks between partitions
+CREATE OR REPLACE FUNCTION documents_sync_chunk_acl() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE chunks
+     SET visibility = NEW.visibility,
+         project_id = NEW.project_id,
+         is_deleted = NEW.deleted_at IS NOT NULL,
+         partition_key = chunk_partition_key(NEW.visibility, NEW.project_id, NULL)
+   WHERE doc_id = NEW.doc_id;
+  RETURN NULL;
+END;
+$$;
+
+COMMIT;
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- Inserting chunks: partition_key is NOT NULL and must match the parent.
+-- Compute it in the INSERT, or once per document for COPY:
+--   INSERT INTO chunks (doc_id, ..., partition_key)
+--   VALUES ($1, ..., chunk_partition_key_for($1, NULL));
+--
+-- The HNSW indexes are rebuilt by this migration; on a large table raise
+-- maintenance_work_mem for the session first (e.g. SET maintenance_work_mem = '2GB').
+--
+-- A project created in the same transaction as its first chunks works too:
+-- the projects trigger creates the partition on insert.
+--
+-- Dropping a project does not drop its partition (documents reference the
+-- project, so it only goes away once it has no documents):
+--   DROP TABLE IF EXISTS chunks_project_...;   -- SELECT chunk_partition_name('<id>')
+--
+-- Partition sizes:
+--   SELECT tableoid::regclass AS partition, count(*) FROM chunks GROUP BY 1 ORDER BY 2 DESC;
+--
+-- Check that a search only touches the user's partitions (look for
+-- "Index Scan using chunks_public_embedding_idx" and one project partition):
+--   EXPLAIN SELECT chunk_id FROM chunks
+--   WHERE partition_key = ANY('{public,project:Atlas}') AND NOT is_deleted
+--   ORDER BY embedding <=> (SELECT embedding FROM chunks LIMIT 1) LIMIT 200;
+--
+-- ============================================================================
@@ -0,0 +1,79 @@
+-- ============================================================================
+-- Migration: Full-Text Search on Chunks (hybrid retrieval)
+-- ============================================================================
+-- Embeddings handle exact identifiers ("ERR_4032", service names, ticket
+-- keys) poorly. Search now also runs a full-text query over chunks and fuses
+-- both ranked lists (reciprocal rank fusion, app/services/retrieval.py).
+--
+--   text_search  tsvector, generated from text ('english' configuration)
+--   chunks_text_search_gin  GIN index, one per partition
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Column and index
+-- ============================================================================
+-- Rewrites every partition once to compute the column
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS text_search tsvector
+  GENERATED ALWAYS AS (to_tsvector('english', text)) STORED;
+
+CREATE INDEX IF NOT EXISTS chunks_text_search_gin ON chunks USING gin (text_search);
+
+-- ============================================================================
+-- 2. Project partitions
+-- ============================================================================
+-- New partitions must carry the generated column, and rows moved out of the
+-- default partition must be copied without it (generated columns cannot be
+-- inserted)
+CREATE OR REPLACE FUNCTION create_chunk_partition(p_project_id TEXT) RETURNS TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+  partition_name TEXT := chunk_partition_name(p_project_id);
+  partition_value TEXT := chunk_partition_key('Private', p_project_id, NULL);
+  stored_columns TEXT;
+BEGIN
+  IF to_regclass(partition_name) IS NOT NULL THEN
+    RETURN partition_name;
+  END IF;
+
+  SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+    INTO stored_columns
+    FROM pg_attribute
+   WHERE attrelid = 'chunks'::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+  -- Rows of this project may already sit in the default partition: move
+  -- them into the new table before attaching it (indexes are built on attach)
+  EXECUTE format(
+    'CREATE TABLE %I (LIKE chunks INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)',
+    partition_name
+  );
+  EXECUTE format(
+    'WITH moved AS (DELETE FROM chunks_default WHERE partition_key = %L RETURNING %s) '
+    'INSERT INTO %I (%s) SELECT %s FROM moved',
+    partition_value, stored_columns, partition_name, stored_columns, stored_columns
+  );
+  EXECUTE format('ALTER TABLE chunks ATTACH PARTITION %I FOR VALUES IN (%L)', partition_name, partition_value);
+
+  RETURN partition_name;
+END;
+$$;
+
+COMMIT;
+
+-- ============================================================================
+-- NOTES
+-- ============================================================================
+--
+-- Queries require every term (websearch_to_tsquery), ranked by ts_rank_cd;
+-- when that finds too few chunks the app retries with the terms OR-ed and
+-- any '-term' exclusions still ANDed on. Quoted phrases and identifiers split
+-- by the parser (ERR_4032 → 'err' <-> '4032') stay phrases.
+--
+-- Try it:
+--   SELECT chunk_id, ts_rank_cd(text_search, q) AS rank
+--   FROM chunks, websearch_to_tsquery('english', 'ERR_4032 timeout') AS q
+--   WHERE partition_key = ANY('{public,project:Atlas}') AND text_search @@ q
+--   ORDER BY rank DESC LIMIT 20;
+--
+-- ============================================================================
@@ -100,8 +100,9 @@ ON CONFLICT (doc_id) DO NOTHING;
 -- 5. SAMPLE CHUNKS (with embeddings for search)
 -- =============================================================================
 -- Create chunks with dummy embeddings for testing vector search
+-- partition_key must match the document: 'public', 'project:<id>' or 'handover'
 
-INSERT INTO chunks (chunk_id, doc_id, heading_path, order_in_doc, text, embedding)
+INSERT INTO chunks (chunk_id, doc_id, heading_path, order_in_doc, text, embedding, partition_key)
 VALUES
   (
     1,
@@ -109,7 +110,8 @@ VALUES
     ARRAY['Deployment', 'Atlas API'],
     1,
     'To deploy the Atlas API, first ensure all environment variables are set correctly in your .env file, then run make deploy to start the deployment process.',
-    ARRAY(SELECT 0.1::real FROM generate_series(1, 1024))::vector
+    ARRAY(SELECT 0.1::real FROM generate_series(1, 1024))::vector,
+    'project:atlas-api'
   ),
   (
     2,
@@ -117,7 +119,8 @@ VALUES
     ARRAY['Handbook', 'Getting Started'],
     1,
     'Welcome to the company! This handbook contains all the information you need to get started, including onboarding steps, company policies, and team contacts.',
-    ARRAY(SELECT 0.2::real FROM generate_series(1, 1024))::vector
+    ARRAY(SELECT 0.2::real FROM generate_series(1, 1024))::vector,
+    'public'
   ),
   (
     3,
@@ -125,9 +128,10 @@ VALUES
     ARRAY['Design System', 'Components'],
     1,
     'The Phoenix UI uses a modern design system with reusable components. All components follow Material Design principles with custom branding.',
-    ARRAY(SELECT 0.15::real FROM generate_series(1, 1024))::vector
+    ARRAY(SELECT 0.15::real FROM generate_series(1, 1024))::vector,
+    'project:phoenix-ui'
   )
-ON CONFLICT (chunk_id) DO NOTHING;
+ON CONFLICT (chunk_id, partition_key) DO NOTHING;
 
 -- =============================================================================
 -- 6. SAMPLE HANDOVERS
@@ -207,7 +211,7 @@ ON CONFLICT (handover_id) DO NOTHING;
 -- =============================================================================
 -- Create chunks for handovers so they appear in RAG search
 
-INSERT INTO chunks (chunk_id, handover_id, heading_path, order_in_doc, text, embedding)
+INSERT INTO chunks (chunk_id, handover_id, heading_path, order_in_doc, text, embedding, partition_key)
 VALUES
   (
     4,
@@ -215,7 +219,8 @@ VALUES
     ARRAY['Handover', 'Atlas API Project'],
     1,
     'Atlas API Project Handover: Transferring Atlas API project knowledge. Current status: API deployed to production, documentation updated. Next steps: Review deployment checklist, schedule knowledge transfer meeting.',
-    ARRAY(SELECT 0.12::real FROM generate_series(1, 1024))::vector
+    ARRAY(SELECT 0.12::real FROM generate_series(1, 1024))::vector,
+    'handover'
   ),
   (
     5,
@@ -223,9 +228,10 @@ VALUES
     ARRAY['Handover', 'Phoenix UI Onboarding'],
     1,
     'Phoenix UI Onboarding: Onboarding Lisa to Phoenix UI project. Environment setup completed, access granted. Next: Complete first feature ticket.',
-    ARRAY(SELECT 0.18::real FROM generate_series(1, 1024))::vector
+    ARRAY(SELECT 0.18::real FROM generate_series(1, 1024))::vector,
+    'handover'
   )
-ON CONFLICT (chunk_id) DO NOTHING;
+ON CONFLICT (chunk_id, partition_key) DO NOTHING;
 
 -- =============================================================================
 -- 8. RESET SEQUENCES
@@ -9,9 +9,16 @@ Run this script manually or via cron/scheduler to sync Notion content.
 
 import argparse
 import hashlib
+import os
+import sys
 from dotenv import load_dotenv
-from lib import notion_client, normalizer, chunker, embeddings, db_operations
-from lib.constants import CHUNK_SIZE, CHUNK_OVERLAP
+from lib import notion_client, normalizer, embeddings, db_operations
+from lib.constants import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_MODE
+
+# The chunker is shared with the backend (same chunks for Notion pages and
+# uploads): import it from the repository checkout
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "backend"))
+from app.services.chunker import chunk_markdown, CHUNK_MODES  # noqa: E402
 
 # Load environment variables from .env file
 load_dotenv()
@@ -80,7 +87,7 @@ def detect_visibility(page: dict) -> str:
         return "Private"  # Default to Private if not specified
 
 
-def ingest_page(page: dict):
+def ingest_page(page: dict, chunk_mode: str = CHUNK_MODE):
     """
     Ingests a single Notion page.
 
@@ -90,11 +97,12 @@ def ingest_page(page: dict):
         3. Compute content hash
         4. Upsert document (check if content changed)
         5. If changed: Delete old chunks, create new chunks
-        6. Embed each chunk
+        6. Embed chunks (reusing cached embeddings for unchanged text)
         7. Insert chunks into database
 
     Args:
         page (dict): Notion page object from list_notion_pages()
+        chunk_mode (str): "window", "sections" or "content" (see apps/backend/app/services/chunker.py)
     """
     page_id = page["id"]
     title = page["properties"]["Title"]["title"][0]["plain_text"]
@@ -138,31 +146,23 @@ def ingest_page(page: dict):
 
     # Step 7: Chunk the document
     print("   ├─ Chunking document...")
-    chunks = chunker.chunk_markdown(markdown, sections, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunks = chunk_markdown(markdown, sections, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, mode=chunk_mode)
     print(f"   ├─ Created {len(chunks)} chunks")
 
-    # Step 8: Embed and insert each chunk
+    # Step 8: Embed all chunks (unchanged chunk text is reused from the embedding cache)
     print("   ├─ Embedding chunks...")
-    for i, chunk in enumerate(chunks):
-        # Embed the chunk
-        embedding = embeddings.embed_text(chunk["text"])
-
-        # Insert into database
-        db_operations.insert_chunk(
-            doc_id=doc_id,
-            text=chunk["text"],
-            embedding=embedding,
-            heading_path=chunk.get("heading_path", []),
-            order_in_doc=i
-        )
-
-        if (i + 1) % 5 == 0:
-            print(f"   ├─ Embedded {i + 1}/{len(chunks)} chunks")
+    vectors = embeddings.embed_texts([chunk["text"] for chunk in chunks])
+
+    # Step 9: Replace the old chunks in one transaction, so searches never
+    # see the document without chunks (vectors above are reused where text is unchanged)
+    with db_operations.transaction() as conn:
+        db_operations.delete_chunks(doc_id, conn=conn)
+        db_operations.insert_chunks_bulk(doc_id, chunks, vectors, conn=conn)
 
     print(f"   └─ ✓ Completed ({len(chunks)} chunks embedded)")
 
 
-def main(database_id: str):
+def main(database_id: str, chunk_mode: str = CHUNK_MODE):
     """
     Main ingestion pipeline.
 
@@ -173,6 +173,7 @@ def main(database_id: str):
 
     Args:
         database_id (str): Notion database ID
+        chunk_mode (str): Chunking mode passed to chunk_markdown()
     """
     print("🚀 Starting Notion Ingestion")
     print(f"📊 Database ID: {database_id}\n")
@@ -186,7 +187,7 @@ def main(database_id: str):
     for i, page in enumerate(pages, 1):
         print(f"[{i}/{len(pages)}]", end=" ")
         try:
-            ingest_page(page)
+            ingest_page(page, chunk_mode)
         except Exception as e:
             title = page["properties"]["Title"]["title"][0]["plain_text"]
             print(f"   └─ ❌ Error processing {title}: {e}")
@@ -203,11 +204,18 @@ if __name__ == "__main__":
         required=True,
         help="Notion database ID (from database URL)"
     )
+    parser.add_argument(
+        "--chunk-mode",
+        choices=CHUNK_MODES,
+        default=CHUNK_MODE,
+        help="window: overlapping token windows; sections: pack whole sections per topic; "
+             "content: content-defined boundaries (edits re-embed only nearby chunks)"
+    )
 
     args = parser.parse_args()
 
     # Run ingestion
-    main(args.notion_db_id)
+    main(args.notion_db_id, args.chunk_mode)
 
 
 # Usage Examples:
@@ -215,14 +223,17 @@ if __name__ == "__main__":
 # 1. Ingest pages from Notion database:
 #    python ingest_notion.py --notion-db-id abc123def456
 #
-# 2. Run as cron job (every 6 hours):
+# 2. Chunk by document structure instead (small sections packed per topic):
+#    python ingest_notion.py --notion-db-id abc123def456 --chunk-mode sections
+#
+# 3. Run as cron job (every 6 hours):
 #    0 */6 * * * cd /path/to/workers && python ingest_notion.py --notion-db-id abc123
 #
-# 3. Run in GitHub Actions:
+# 4. Run in GitHub Actions:
 #    - name: Ingest Notion
 #      run: python workers/ingest_notion.py --notion-db-id ${{ secrets.NOTION_DB_ID }}
 #
-# 4. Run in AWS Lambda:
+# 5. Run in AWS Lambda:
 #    def lambda_handler(event, context):
 #        main(os.getenv("NOTION_DB_ID"))
 
@@ -2,4 +2,4 @@
 # This __init__.py marks the 'lib' directory as a Python package.
 # No code needed - just an empty file to enable imports like:
 #   from lib.notion_client import list_notion_pages
-#   from lib.chunker import chunk_markdown
\ No newline at end of file
+#   from lib.normalizer import normalize_to_markdown
\ No newline at end of file
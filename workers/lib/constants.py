@@ -7,10 +7,12 @@ These values must be kept in sync with backend constants and database schema.
 # Embedding configuration
 EMBEDDING_MODEL = "embed-english-v3.0"
 EMBEDDING_DIM = 1024  # Must match database VECTOR(1024) dimension
+EMBED_BATCH_SIZE = 96  # Cohere accepts at most 96 texts per embed request
 
 # Chunking configuration
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
+CHUNK_MODE = "content"  # Pages are edited and re-synced: content-defined boundaries re-embed only chunks near an edit ("window", "sections" also available)
 
 # Document visibility options
 VALID_VISIBILITIES = ["Public", "Private"]
\ No newline at end of file
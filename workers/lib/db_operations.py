@@ -5,8 +5,11 @@ Database Operations for Workers
 Handles upserting documents and chunks to the database.
 """
 
-from typing import List, Optional
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
 import psycopg2
+from psycopg2.extras import execute_values
 import os
 from .constants import EMBEDDING_DIM
 
@@ -18,6 +21,25 @@ def get_connection():
     return psycopg2.connect(db_url)
 
 
+@contextmanager
+def transaction() -> Iterator["psycopg2.extensions.connection"]:
+    """
+    Opens a connection and runs the block in one transaction: committed if
+    the block succeeds, rolled back if it raises.
+
+    Example:
+        >>> with transaction() as conn:
+        ...     delete_chunks(doc_id, conn=conn)
+        ...     insert_chunks_bulk(doc_id, chunks, vectors, conn=conn)
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
 def upsert_document(
     source_external_id: str,
     title: str,
@@ -213,7 +235,8 @@ def insert_chunk(
     embedding: List[float],
     heading_path: List[str],
     order_in_doc: int,
-    page: Optional[int] = None
+    page: Optional[int] = None,
+    token_count: Optional[int] = None
 ) -> None:
     
     """Insert a document chunk"""
@@ -228,8 +251,10 @@ def insert_chunk(
             heading_path,
             order_in_doc,
             page,
+            token_count,
+            partition_key,
             updated_at
-        ) VALUES (%s, %s, %s, %s, %s, %s, NOW());
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, chunk_partition_key_for(%s, NULL), NOW());
     """
     conn = get_connection()
     try:
@@ -240,7 +265,9 @@ def insert_chunk(
                 embedding,  # pgvector supports list directly if column type is vector
                 heading_path,
                 order_in_doc,
-                page
+                page,
+                token_count,
+                doc_id  # chunks is partitioned: route the row to its document's partition
             ))
             conn.commit()
     except Exception as e:
@@ -358,6 +385,63 @@ def insert_chunk(
     #raise NotImplementedError("TODO: Implement chunk insertion with vector storage")
 
 
+def delete_chunks(doc_id: int, conn=None) -> None:
+    """
+    Delete all chunks of a document (before re-inserting on re-ingestion).
+
+    Pass `conn` from transaction() to delete and re-insert atomically
+    (default: own connection and transaction).
+    """
+    query = "DELETE FROM chunks WHERE doc_id = %s;"
+    with nullcontext(conn) if conn is not None else transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (doc_id,))
+
+
+def insert_chunks_bulk(
+    doc_id: int,
+    chunks: List[Dict[str, Any]],
+    embeddings: List[List[float]],
+    conn=None
+) -> int:
+    """
+    Inserts all chunks of a document with one multi-row INSERT.
+
+    Args:
+        doc_id: Document ID the chunks belong to
+        chunks: Chunker output (text, heading_path, token_count); order_in_doc
+            is the chunk's index
+        embeddings: embeddings[i] is the vector for chunks[i]
+        conn: Connection of an open transaction() (default: own connection
+            and transaction)
+
+    Returns:
+        Number of chunks inserted
+    """
+    for embedding in embeddings:
+        if len(embedding) != EMBEDDING_DIM:
+            raise ValueError(f"Embedding must be {EMBEDDING_DIM}-dimensional")
+
+    query = """
+        INSERT INTO chunks (
+            doc_id, text, embedding, heading_path, order_in_doc, token_count, partition_key, updated_at
+        ) VALUES %s;
+    """
+    # chunks is partitioned: route every row to its document's partition
+    template = "(%s, %s, %s, %s, %s, %s, chunk_partition_key_for(%s, NULL), NOW())"
+    rows = [
+        (doc_id, chunk["text"], embedding, chunk.get("heading_path", []), i, chunk.get("token_count"), doc_id)
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+    ]
+    if not rows:
+        return 0
+
+    with nullcontext(conn) if conn is not None else transaction() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, query, rows, template=template)
+    return len(rows)
+
+
 def check_content_changed(source_external_id: str, new_content_hash: str) -> bool:
     """Return True if content has changed (or doc not exists)"""
     query = "SELECT content_hash FROM documents WHERE source_external_id = %s;"
@@ -420,4 +504,69 @@ def check_content_changed(source_external_id: str, new_content_hash: str) -> boo
         - Re-ingestion (page edited): content_hash = "def456"
           → Re-embed chunks (hash changed)
     """
-   # raise NotImplementedError("TODO: Implement content change detection")
\ No newline at end of file
+   # raise NotImplementedError("TODO: Implement content change detection")
+
+def fetch_cached_embeddings(content_hashes: List[str]) -> Dict[str, List[float]]:
+    """
+    Looks up stored embeddings by content hash with a single = ANY query.
+
+    Args:
+        content_hashes (List[str]): Keys from embeddings.embedding_cache_key()
+
+    Returns:
+        Dict[str, List[float]]: {content_hash: embedding} for hashes that were found
+    """
+    if not content_hashes:
+        return {}
+
+    query = """
+        SELECT content_hash, embedding::text
+        FROM embedding_cache
+        WHERE content_hash = ANY(%s);
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(query, (list(content_hashes),))
+            # pgvector text format '[0.1,0.2,...]' is valid JSON
+            return {content_hash: json.loads(embedding) for content_hash, embedding in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def store_cached_embeddings(
+    entries: List[Tuple[str, List[float]]],
+    model: str,
+    input_type: str
+) -> None:
+    """
+    Saves freshly computed embeddings so identical text is never re-embedded.
+
+    Args:
+        entries (List[Tuple[str, List[float]]]): [(content_hash, embedding), ...]
+        model (str): Embedding model used
+        input_type (str): Cohere input_type used
+    """
+    if not entries:
+        return
+
+    query = """
+        INSERT INTO embedding_cache (content_hash, model, input_type, embedding)
+        VALUES %s
+        ON CONFLICT (content_hash) DO NOTHING;
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                query,
+                [(content_hash, model, input_type, str(embedding)) for content_hash, embedding in entries],
+                template="(%s, %s, %s, %s::vector)"
+            )
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
@@ -8,31 +8,84 @@ Same as backend embeddings, but with input_type="search_document" instead of "se
 """
 
 from typing import List
+import hashlib
 import os
 import cohere
-from .constants import EMBEDDING_MODEL
+from .constants import EMBEDDING_MODEL, EMBED_BATCH_SIZE
+from . import db_operations
 
-def embed_text(text: str) -> List[float]:
-    
-    if not text or text.strip() == "":
+
+def embedding_cache_key(model: str, input_type: str, text: str) -> str:
+    """
+    Content address of an embedding in the embedding_cache table.
+
+    Must match apps/backend/app/services/embeddings.embedding_cache_key().
+    """
+    return hashlib.sha256(f"{model}\n{input_type}\n{text}".encode("utf-8")).hexdigest()
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embeds many document chunks, reusing stored embeddings for unchanged text.
+
+    Each batch of EMBED_BATCH_SIZE texts is looked up in the embedding_cache
+    table with one = ANY query; only the misses are sent to Cohere, and the
+    new vectors are written back for the next sync.
+
+    Args:
+        texts (List[str]): Chunk texts, in document order
+
+    Returns:
+        List[List[float]]: One 1024-dim vector per text, in input order
+
+    Raises:
+        ValueError: If any text is empty or COHERE_API_KEY is not set
+        Exception: If the Cohere API call fails
+    """
+    if any(not text or text.strip() == "" for text in texts):
         raise ValueError("Input text cannot be empty or None")
 
     api_key = os.getenv("COHERE_API_KEY")
     if not api_key:
         raise ValueError("COHERE_API_KEY not set in environment variables")
 
-    try:
-        client = cohere.Client(api_key)
-        response = client.embed(
-            texts=[text],
-            model=EMBEDDING_MODEL,
-            input_type="search_document"
-        )
-        # نرجع المصفوفه الاولى علشان نبي نص واحد
-        return response.embeddings[0]
-
-    except Exception as e:
-        raise Exception(f"Failed to get embedding from Cohere: {e}")
+    client = None
+    vectors: List[List[float]] = []
+
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[start:start + EMBED_BATCH_SIZE]
+        hashes = [embedding_cache_key(EMBEDDING_MODEL, "search_document", text) for text in batch]
+
+        stored = db_operations.fetch_cached_embeddings(list(set(hashes)))
+        missing = [i for i, h in enumerate(hashes) if h not in stored]
+
+        if missing:
+            try:
+                client = client or cohere.Client(api_key)
+                response = client.embed(
+                    texts=[batch[i] for i in missing],
+                    model=EMBEDDING_MODEL,
+                    input_type="search_document"
+                )
+            except Exception as e:
+                raise Exception(f"Failed to get embedding from Cohere: {e}")
+
+            fresh = [(hashes[i], vector) for i, vector in zip(missing, response.embeddings)]
+            db_operations.store_cached_embeddings(fresh, EMBEDDING_MODEL, "search_document")
+            stored.update(dict(fresh))
+
+        vectors.extend(stored[h] for h in hashes)
+
+    return vectors
+
+
+def embed_text(text: str) -> List[float]:
+    
+    if not text or text.strip() == "":
+        raise ValueError("Input text cannot be empty or None")
+
+    # Single text goes through the same cached, batched path
+    return embed_texts([text])[0]
     
 #ــــــــــــــــــــــــــــــــــ
     
@@ -2,10 +2,15 @@
 pytest configuration for worker tests
 
 This file runs automatically before all tests in this directory.
-It loads environment variables from .env file so tests can access API keys.
+It loads environment variables from .env file so tests can access API keys,
+and makes the backend's shared chunker importable (as ingest_notion.py does).
 """
 
+import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "apps", "backend"))
+
 # Load .env file from project root
 load_dotenv()
\ No newline at end of file
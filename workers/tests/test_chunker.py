@@ -5,7 +5,7 @@ Run with: pytest workers/tests/test_chunker.py -v
 """
 
 import pytest
-from lib.chunker import chunk_markdown
+from app.services.chunker import chunk_markdown
 
 
 def test_chunk_markdown_short_doc():
@@ -0,0 +1,73 @@
+"""
+Test worker embeddings
+
+Run with: pytest workers/tests/test_embeddings.py -v
+"""
+
+import pytest
+from lib import embeddings
+
+
+class FakeResponse:
+    def __init__(self, vectors):
+        self.embeddings = vectors
+
+
+@pytest.fixture
+def fake_backends(monkeypatch):
+    """In-memory embedding_cache table + a Cohere client that records what it was sent"""
+    store = {}
+    sent = []
+
+    class FakeClient:
+        def __init__(self, api_key):
+            pass
+
+        def embed(self, texts, model, input_type):
+            sent.append(list(texts))
+            return FakeResponse([[float(len(t))] * 1024 for t in texts])
+
+    monkeypatch.setenv("COHERE_API_KEY", "test-key")
+    monkeypatch.setattr(embeddings.cohere, "Client", FakeClient)
+    monkeypatch.setattr(
+        embeddings.db_operations, "fetch_cached_embeddings",
+        lambda hashes: {h: store[h] for h in hashes if h in store}
+    )
+    monkeypatch.setattr(
+        embeddings.db_operations, "store_cached_embeddings",
+        lambda entries, model, input_type: store.update(dict(entries))
+    )
+    return store, sent
+
+
+def test_embed_texts_only_embeds_changed_chunks(fake_backends):
+    """Re-syncing an edited page only sends the new chunk text to Cohere"""
+    store, sent = fake_backends
+
+    # Given: A page that was ingested once
+    embeddings.embed_texts(["intro", "setup", "deploy"])
+    assert sent == [["intro", "setup", "deploy"]]
+
+    # When: The page is re-ingested after one chunk changed
+    sent.clear()
+    vectors = embeddings.embed_texts(["intro", "setup (edited)", "deploy"])
+
+    # Then: Only the edited chunk was embedded, order is kept
+    assert sent == [["setup (edited)"]]
+    assert [v[0] for v in vectors] == [5.0, 14.0, 6.0]
+
+
+def test_embed_texts_batches_of_96(fake_backends):
+    """Large pages are embedded 96 texts per request"""
+    store, sent = fake_backends
+
+    embeddings.embed_texts([f"chunk {i}" for i in range(200)])
+
+    assert [len(batch) for batch in sent] == [96, 96, 8]
+    assert len(store) == 200
+
+
+def test_embed_texts_rejects_empty(fake_backends):
+    """Empty chunk text raises ValueError"""
+    with pytest.raises(ValueError):
+        embeddings.embed_texts(["ok", "  "])